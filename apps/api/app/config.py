@@ -21,6 +21,78 @@ class Settings(BaseSettings):
     # Security
     secret_key: str
     jwt_secret_key: str | None = None  # Optional, falls back to secret_key
+    audit_checkpoint_secret: str | None = None  # Optional, falls back to secret_key
+    api_key_secret: str | None = None  # Optional, falls back to secret_key; changing it invalidates all API keys
+
+    # Exports
+    export_max_parallel_slices: int = 8  # Upper bound on concurrent connections per parallel export
+    export_slice_connections: int = 6  # Process-wide cap on slice readers; keep below the DB pool size (5 + 10 overflow)
+    export_parallel_min_consents: int = 1_000_000  # Orgs below this many consents export on one connection (superadmins exempt)
+
+    # Audit sink (buffered COPY writer for high-volume audit logging)
+    audit_sink_enabled: bool = False
+    audit_sink_batch_size: int = 500
+    audit_sink_flush_interval_ms: int = 200
+    audit_sink_max_queue: int = 10000  # Producers flush inline beyond this depth
+    audit_sink_dead_letter_path: str = "/var/lib/consentvault/audit-dead-letter.jsonl"  # Rejected or unflushed rows
+
+    # Live audit stream (SSE)
+    audit_stream_notify: bool = False  # Fan out across workers with Postgres LISTEN/NOTIFY
+    audit_stream_queue_size: int = 1000  # Per-connection buffer before events are dropped
+    audit_stream_keepalive_seconds: int = 15
+    audit_stream_ticket_seconds: int = 60  # Lifetime of the ?ticket= tokens EventSource clients connect with
+    audit_stream_recheck_seconds: int = 60  # How often open streams re-check membership and session expiry
+
+    # Audit partitioning and retention
+    audit_partition_months_ahead: int = 3
+    audit_partition_min_months_ahead: int = 1  # Warn when fewer future months than this are partitioned
+    audit_retention_months: int | None = None  # None keeps audit logs forever; orgs can override
+
+    # Audit sensitivity registry (sensitive events are hidden from viewers)
+    audit_sensitive_actions: str = ""  # Comma-separated exact action names
+    audit_sensitive_keywords: str = "export"  # Comma-separated substrings of action names
+
+    # Cold archive (compressed columnar files for old audit logs and revoked consents)
+    archive_dir: str = "/var/lib/consentvault/archive"
+    archive_after_days: int | None = None  # None disables archiving
+
+    # Rollups (pre-aggregated dashboard counts)
+    rollup_interval_seconds: int = 60
+    rollup_lag_seconds: int = 60  # Rows committing later than this after their timestamp are not rolled up
+
+    # Per-org counters (dashboard totals); the reconcile job corrects drift
+    org_counter_reconcile_seconds: int = 3600
+
+    # Consent breakdown materialized views (purposes, user agents)
+    consent_breakdown_refresh_seconds: int = 300
+
+    # Verified API keys cached per worker; revoked keys stop working within this many seconds
+    api_key_cache_seconds: int = 30
+
+    # Verified access tokens cached per worker until they expire (0 disables)
+    token_cache_max_entries: int = 10000
+
+    # Role claims in access tokens (authorize without membership queries)
+    jwt_role_claims: bool = False
+    membership_version_cache_seconds: int = 5  # How long a revoked membership may still be honoured
+
+    # Password hashing: bcrypt cost is calibrated at startup to the target unless pinned
+    password_hash_target_ms: int = 250
+    password_hash_rounds: int | None = None
+    password_hash_min_rounds: int = 12  # Stored hashes below this cost are rehashed on login (same on every worker)
+
+    # Password hashing process pool (0 workers hashes in the threadpool)
+    password_pool_workers: int = 2
+    password_pool_max_pending: int = 32  # Logins beyond this get a 429
+
+    # Background job scheduler (one leader across workers runs the jobs)
+    scheduler_enabled: bool = True
+    audit_checkpoint_interval_seconds: int = 3600
+
+    # Dashboard response cache (per worker; 0 disables)
+    dashboard_cache_ttl_seconds: int = 15
+    dashboard_cache_max_entries: int = 10000
+    dashboard_cache_notify: bool = False  # Invalidate across workers via Postgres NOTIFY
 
     # CORS
     allowed_origins: str = ""
@@ -38,11 +110,31 @@ class Settings(BaseSettings):
             return []
         return [origin.strip() for origin in self.allowed_origins.split(",") if origin.strip()]
 
+    @property
+    def audit_sensitive_actions_set(self) -> frozenset[str]:
+        """Parse sensitive audit action names from comma-separated string."""
+        return frozenset(a.strip().lower() for a in self.audit_sensitive_actions.split(",") if a.strip())
+
+    @property
+    def audit_sensitive_keywords_list(self) -> list[str]:
+        """Parse sensitive audit action keywords from comma-separated string."""
+        return [k.strip().lower() for k in self.audit_sensitive_keywords.split(",") if k.strip()]
+
     @property
     def jwt_key(self) -> str:
         """Get JWT secret key, falling back to secret_key if not set."""
         return self.jwt_secret_key or self.secret_key
 
+    @property
+    def audit_checkpoint_key(self) -> str:
+        """Get the audit checkpoint signing key, falling back to secret_key if not set."""
+        return self.audit_checkpoint_secret or self.secret_key
+
+    @property
+    def api_key_hmac_key(self) -> str:
+        """Get the API key hashing key, falling back to secret_key if not set."""
+        return self.api_key_secret or self.secret_key
+
 
 settings = Settings()
 
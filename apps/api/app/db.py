@@ -3,16 +3,22 @@ import os
 import uuid
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     JSON,
     Column,
+    Date,
     DateTime,
     ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
     create_engine,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import INET, JSONB, UUID
 from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker
@@ -56,6 +62,8 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     is_superadmin = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Bumped by triggers when memberships, roles, superadmin or email change (see security.claims)
+    membership_version = Column(BigInteger, default=0, server_default="0", nullable=False)
 
     org_memberships = relationship("OrgUser", back_populates="user", cascade="all, delete-orphan")
 
@@ -68,7 +76,7 @@ class Org(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
     region = Column(String(100), nullable=False)
-    api_key = Column(String(64), unique=True, nullable=False, index=True)
+    audit_retention_months = Column(Integer, nullable=True)  # Overrides AUDIT_RETENTION_MONTHS
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     members = relationship("OrgUser", back_populates="org", cascade="all, delete-orphan")
@@ -76,6 +84,28 @@ class Org(Base):
     consents = relationship("Consent", back_populates="org", cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="org")
     data_right_requests = relationship("DataRightRequest", back_populates="org", cascade="all, delete-orphan")
+    api_keys = relationship("ApiKey", back_populates="org", cascade="all, delete-orphan")
+
+
+class ApiKey(Base):
+    """
+    Ingestion API key of an organization, stored as its public prefix and an
+    HMAC-SHA256 of the whole key (see app.services.api_keys). An org can have
+    several active keys so keys can be rotated without downtime.
+    """
+
+    __tablename__ = "api_keys"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False, index=True)
+    prefix = Column(String(16), nullable=False, index=True)
+    key_hash = Column(String(64), nullable=False, unique=True)
+    name = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True)  # Set on old keys during rotation
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    org = relationship("Org", back_populates="api_keys")
 
 
 class OrgUser(Base):
@@ -135,6 +165,12 @@ class Consent(Base):
 
     org = relationship("Org", back_populates="consents")
 
+    # Range scans of the rollup job past its watermarks
+    __table_args__ = (
+        Index("ix_consents_accepted_at", "accepted_at"),
+        Index("ix_consents_revoked_at", "revoked_at", postgresql_where=revoked_at.isnot(None)),
+    )
+
 
 class AuditLog(Base):
     """Audit log model for tracking all actions.
@@ -142,6 +178,9 @@ class AuditLog(Base):
     Note: org_id is required (non-nullable) to ensure all audit events are properly
     scoped to an organization. This guarantees that org admins can always see
     activities related to their organization, even when triggered by superadmins.
+
+    The table is range-partitioned by created_at (one partition per month, see
+    app.services.audit_partitions), so created_at is part of the primary key.
     """
 
     __tablename__ = "audit_logs"
@@ -153,10 +192,80 @@ class AuditLog(Base):
     entity_type = Column(String(100), nullable=False, index=True)
     entity_id = Column(UUID(as_uuid=True), nullable=True)
     metadata_json = Column(JSONB, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)
+
+    # Per-org hash chain (see app.services.audit_chain); NULL for pre-chain rows
+    chain_seq = Column(BigInteger, nullable=True)
+    prev_hash = Column(String(64), nullable=True)
+    row_hash = Column(String(64), nullable=True)
+
+    # "normal" or "sensitive", classified at write time (see app.services.audit_sensitivity)
+    sensitivity = Column(String(16), nullable=False, default="normal", server_default="normal")
 
     org = relationship("Org", back_populates="audit_logs")
 
+    # Composite indexes backing filtered keyset pagination on (created_at, id)
+    __table_args__ = (
+        Index("ix_audit_logs_org_created", "org_id", "created_at", "id"),
+        Index("ix_audit_logs_org_action_created", "org_id", "action", "created_at", "id"),
+        Index("ix_audit_logs_org_entity_created", "org_id", "entity_type", "entity_id", "created_at", "id"),
+        Index("ix_audit_logs_org_user_created", "org_id", "user_email", "created_at", "id"),
+        Index("ix_audit_logs_org_chain_seq", "org_id", "chain_seq"),
+        # Viewer listings: only non-sensitive rows, in keyset order
+        Index(
+            "ix_audit_logs_org_created_normal",
+            "org_id",
+            "created_at",
+            "id",
+            postgresql_where=text("sensitivity = 'normal'"),
+        ),
+        # Metadata containment search (metadata_json @> '{...}')
+        Index(
+            "ix_audit_logs_metadata_path_ops",
+            "metadata_json",
+            postgresql_using="gin",
+            postgresql_ops={"metadata_json": "jsonb_path_ops"},
+        ),
+        # DSAR investigations: all events about one data subject, in keyset order
+        Index(
+            "ix_audit_logs_org_subject_email_created",
+            "org_id",
+            text("(metadata_json ->> 'subject_email')"),
+            "created_at",
+            "id",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class AuditChainHead(Base):
+    """Latest position of an organization's audit hash chain."""
+
+    __tablename__ = "audit_chain_heads"
+
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    last_seq = Column(BigInteger, nullable=False, default=0)
+    last_hash = Column(String(64), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class AuditCheckpoint(Base):
+    """Signed, verified position in an organization's audit hash chain."""
+
+    __tablename__ = "audit_checkpoints"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    chain_seq = Column(BigInteger, nullable=False)
+    row_hash = Column(String(64), nullable=False)
+    row_created_at = Column(DateTime(timezone=True), nullable=False)
+    signature = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_audit_checkpoints_org_seq", "org_id", "chain_seq"),
+    )
+
 
 class DataRightRequest(Base):
     """Data Subject Access Request (DSAR) model."""
@@ -175,6 +284,80 @@ class DataRightRequest(Base):
 
     org = relationship("Org", back_populates="data_right_requests")
 
+    __table_args__ = (
+        Index("ix_data_right_requests_created_at", "created_at"),
+    )
+
+
+class OrgCounter(Base):
+    """Current row counts per organization, maintained on write (see app.services.org_counters)."""
+
+    __tablename__ = "org_counters"
+
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    consents = Column(BigInteger, nullable=False, default=0, server_default="0")
+    consents_revoked = Column(BigInteger, nullable=False, default=0, server_default="0")
+    dsars = Column(BigInteger, nullable=False, default=0, server_default="0")
+    audit_events = Column(BigInteger, nullable=False, default=0, server_default="0")
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bumped on every change
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class SubjectSketch(Base):
+    """HyperLogLog sketch of consenting subjects per org, purpose and UTC day (see app.services.subject_sketches)."""
+
+    __tablename__ = "subject_sketches"
+
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    purpose = Column(String(255), primary_key=True)
+    day = Column(Date, primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
+
+
+class RollupHourly(Base):
+    """Per-org event counts per hour, by metric and dimension (see app.services.rollups)."""
+
+    __tablename__ = "rollup_hourly"
+
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    dimension = Column(String(255), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class RollupDaily(Base):
+    """Per-org event counts per UTC day, by metric and dimension (see app.services.rollups)."""
+
+    __tablename__ = "rollup_daily"
+
+    org_id = Column(UUID(as_uuid=True), ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    metric = Column(String(32), primary_key=True)
+    dimension = Column(String(255), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Position up to which a rollup source has been aggregated."""
+
+    __tablename__ = "rollup_watermarks"
+
+    source = Column(String(32), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class MatviewRefresh(Base):
+    """Last refresh of a materialized view and what it cost."""
+
+    __tablename__ = "matview_refreshes"
+
+    name = Column(String(63), primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    duration_ms = Column(Integer, nullable=True)
+    row_count = Column(BigInteger, nullable=True)
+
 
 def init_db():
     """Initialize database - create all tables."""
@@ -1,25 +1,32 @@
 """Dependencies for FastAPI routes."""
 from uuid import UUID
 
-from fastapi import Depends, Header, HTTPException, Query, status
+from fastapi import Depends, Header, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.db import Org, OrgUser, User, get_db
-from app.security import verify_token
+from app.db import Org, OrgUser, SessionLocal, User, get_db
+from app.security import STREAM_TICKET_PURPOSE, verify_token
+from app.security.claims import TokenUser, user_from_claims
 from app.security.permissions import has_minimum_role
+from app.security.roles import get_user_org_membership
+from app.services.api_keys import org_for_api_key
+from app.services.audit_service import AuditContext
 
 security = HTTPBearer()
 security_optional = HTTPBearer(auto_error=False)
 
 
 def get_org_by_api_key(
+    request: Request,
     x_api_key: str | None = Header(None, alias="X-API-Key"),
     db: Session = Depends(get_db),
 ) -> Org:
     """
-    Validates organization based on provided X-API-Key header.
+    Validates organization based on provided X-API-Key header
+    (hashed keys, see app.services.api_keys).
     Used by consent/data-rights/audit endpoints.
+    Sets the request's audit context to the organization.
     """
     if not x_api_key:
         raise HTTPException(
@@ -27,17 +34,24 @@ def get_org_by_api_key(
             detail="Missing API key",
         )
 
-    org = db.query(Org).filter(Org.api_key == x_api_key).first()
+    org = org_for_api_key(db, x_api_key)
     if not org:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
         )
 
+    request.state.audit_context = AuditContext.from_request(request, org_id=org.id, via="api_key")
     return org
 
 
+def _load_user(user_id: UUID, payload: dict, db: Session) -> User | TokenUser | None:
+    """The token's user: from its role claims while they are current, else from the database."""
+    return user_from_claims(db, user_id, payload) or db.query(User).filter(User.id == user_id).first()
+
+
 def get_current_user_optional(
+    request: Request,
     token: HTTPAuthorizationCredentials | None = Depends(security_optional),
     db: Session = Depends(get_db),
 ) -> User | None:
@@ -48,6 +62,8 @@ def get_current_user_optional(
         payload = verify_token(token.credentials)
     except Exception:
         return None
+    if payload.get("purpose"):
+        return None
 
     user_id_str = payload.get("sub")
     if not user_id_str:
@@ -58,23 +74,33 @@ def get_current_user_optional(
     except (ValueError, TypeError):
         return None
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _load_user(user_id, payload, db)
+    if user:
+        request.state.audit_context = AuditContext.from_request(request, actor_email=user.email, via="jwt")
     return user
 
 
-def get_current_user(
-    token: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current authenticated user from JWT token."""
+def _authenticate(request: Request, credentials: str, db: Session, purpose: str | None = None) -> tuple[User, dict]:
+    """
+    The user and verified claims of a JWT issued for ``purpose``.
+
+    Access tokens carry no purpose; single-purpose tokens such as stream
+    tickets are only accepted where that purpose is expected.
+    """
     try:
-        payload = verify_token(token.credentials)
+        payload = verify_token(credentials)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {str(e)}",
         )
 
+    if payload.get("purpose") != purpose:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token not valid for this endpoint",
+        )
+
     user_id_str = payload.get("sub")
     if not user_id_str:
         raise HTTPException(
@@ -90,17 +116,62 @@ def get_current_user(
             detail="Invalid user ID format",
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _load_user(user_id, payload, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
-    return user
+    request.state.audit_context = AuditContext.from_request(request, actor_email=user.email, via="jwt")
+    return user, payload
+
+
+def get_current_user(
+    request: Request,
+    token: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> User:
+    """Get current authenticated user from JWT token and set the request's audit context."""
+    return _authenticate(request, token.credentials, db)[0]
+
+
+def get_stream_user(
+    request: Request,
+    token: HTTPAuthorizationCredentials | None = Depends(security_optional),
+    ticket: str | None = Query(None, description="Stream ticket from POST /audit/stream/ticket (EventSource cannot set headers)"),
+) -> User:
+    """
+    Get current user from the Authorization header or a stream ticket.
+
+    Access tokens are only accepted in the header: query strings end up in
+    proxy and access logs, so EventSource clients pass a short-lived ticket
+    instead. The expiry of the session behind the stream is stored in
+    ``request.state.stream_expires_at`` so the stream can end with it.
+
+    Uses its own short-lived session: a get_db session would only be closed
+    when the streaming response ends, holding a pooled connection meanwhile.
+    """
+    if not token and not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+    db = SessionLocal()
+    try:
+        if token:
+            user, payload = _authenticate(request, token.credentials, db)
+            request.state.stream_expires_at = payload["exp"]
+        else:
+            user, payload = _authenticate(request, ticket, db, purpose=STREAM_TICKET_PURPOSE)
+            request.state.stream_expires_at = payload["session_exp"]
+        return user
+    finally:
+        db.close()
 
 
 def get_current_org(
+    request: Request,
     org_id_header: UUID | None = Header(None, alias="X-Org-ID"),
     org_id_query: UUID | None = Query(None, alias="org_id"),
     current_user: User = Depends(get_current_user),
@@ -128,14 +199,11 @@ def get_current_org(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Organization not found",
             )
+        request.state.audit_context = request.state.audit_context.for_org(org.id)
         return org
 
     # Verify user membership in org
-    membership = (
-        db.query(OrgUser)
-        .filter(OrgUser.org_id == target_org_id, OrgUser.user_id == current_user.id)
-        .first()
-    )
+    membership = get_user_org_membership(current_user, db, target_org_id)
     if not membership:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -149,9 +217,21 @@ def get_current_org(
             detail="Organization not found",
         )
 
+    request.state.audit_context = request.state.audit_context.for_org(org.id)
     return org
 
 
+def get_audit_context(request: Request) -> AuditContext:
+    """
+    Audit context set by the auth dependencies of this request.
+
+    Declare it after the route's auth dependency (dependencies resolve in
+    order); unauthenticated routes get an anonymous context.
+    """
+    context = getattr(request.state, "audit_context", None)
+    return context or AuditContext.from_request(request)
+
+
 def require_role(required_role: str):
     """Dependency factory to enforce minimum role in organization."""
 
@@ -172,14 +252,7 @@ def require_role(required_role: str):
                     self.role = "admin"
             return SuperadminMembership()
 
-        membership = (
-            db.query(OrgUser)
-            .filter(
-                OrgUser.org_id == current_org.id,
-                OrgUser.user_id == current_user.id,
-            )
-            .first()
-        )
+        membership = get_user_org_membership(current_user, db, current_org.id)
         if not membership:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -8,7 +8,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.db import SessionLocal, User, init_db
 from app.routers import auth, audit, billing, consents, consents_legacy, dashboard, data_rights, export, health, orgs, test, users, widget
-from app.security import hash_password
+from app.security import calibrate_password_hashing, hash_password
+from app.security.password_pool import password_pool
+from app.services.audit_partitions import ensure_audit_partitions
+from app.services.audit_sink import audit_sink
+from app.services.audit_stream import audit_broadcaster
+from app.services.response_cache import dashboard_cache
+from app.services.jobs import register_jobs
+from app.services.scheduler import scheduler
 
 
 @asynccontextmanager
@@ -16,6 +23,12 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown."""
     # Startup: Initialize database
     init_db()
+
+    # Make sure audit_logs has partitions for this month and the next few
+    try:
+        ensure_audit_partitions()
+    except Exception as e:
+        print(f"⚠️  Could not create audit log partitions: {e}")
     
     # Create default superadmin if none exists (only if AUTO_CREATE_SUPERADMIN env is set)
     # For clean dev-reset, leave this disabled and create users manually
@@ -36,8 +49,35 @@ async def lifespan(app: FastAPI):
         finally:
             db.close()
     
+    # Buffered audit writer (COPY batches) for high-volume deployments
+    if settings.audit_sink_enabled:
+        audit_sink.start()
+
+    # Cross-worker live audit stream (no-op unless AUDIT_STREAM_NOTIFY is set)
+    audit_broadcaster.start()
+
+    # Cross-worker dashboard cache invalidation (no-op unless DASHBOARD_CACHE_NOTIFY is set)
+    dashboard_cache.start()
+
+    # Pick the bcrypt cost for this hardware, then start the hashing workers with it
+    try:
+        calibrate_password_hashing()
+    except Exception as e:
+        print(f"⚠️  Could not calibrate password hashing, using defaults: {e}")
+    password_pool.start()
+
+    # Background jobs (rollups, counters, checkpoints, partitions, retention, archive)
+    if settings.scheduler_enabled:
+        register_jobs()
+        scheduler.start()
+
     yield
-    # Shutdown: (if needed in the future)
+    # Shutdown: stop background jobs and drain buffered audit events
+    scheduler.stop()
+    password_pool.stop()
+    audit_sink.stop()
+    audit_broadcaster.stop()
+    dashboard_cache.stop()
 
 app = FastAPI(
     title="ConsentVault API",
@@ -48,6 +88,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Response headers the dashboard needs to read (pagination cursors and totals, export stamps)
+EXPOSED_HEADERS = ["X-Next-Cursor", "X-Export-Snapshot-At", "X-Total-Count", "ETag", "Last-Modified"]
+
 # CORS configuration
 if settings.app_env == "dev":
     app.add_middleware(
@@ -56,6 +99,7 @@ if settings.app_env == "dev":
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=EXPOSED_HEADERS,
     )
 else:
     # In production, use ALLOWED_ORIGINS from env
@@ -66,6 +110,7 @@ else:
         allow_credentials=True,
         allow_methods=["GET", "POST"],
         allow_headers=["*"],
+        expose_headers=EXPOSED_HEADERS,
     )
 
 # Mount all main routers (no /v1 prefix)
@@ -1,18 +1,179 @@
 """Audit log router."""
+import asyncio
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Header, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import literal_column, select, tuple_
+from sqlalchemy.orm import Query as SAQuery, Session
 
-from app.db import AuditLog, Org, OrgUser, User, get_db
-from app.deps import get_org_by_api_key, get_current_user_optional, get_current_user
-from app.schemas import AuditLogOut
+from app.config import settings
+from app.db import AuditLog, Org, OrgUser, SessionLocal, User, get_db
+from app.deps import get_org_by_api_key, get_current_user_optional, get_current_user, get_stream_user, security
+from app.schemas import AuditLogOut, StreamTicketOut
+from app.security import create_stream_ticket, verify_token
+from app.services.api_keys import org_for_api_key
+from app.services.archive_service import archive_store
+from app.services.audit_chain import verify_org_chain
+from app.services.audit_sensitivity import NORMAL, classify_action
+from app.services.audit_stream import audit_broadcaster, event_payload
+from app.utils.conditional import check_not_modified
+from app.utils.jsonb import jsonb_contains
+from app.utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/audit", tags=["Audit"])
 
+# Maximum events replayed to a reconnecting stream client
+STREAM_REPLAY_LIMIT = 500
+
+# Rendered with a literal key so it matches the ix_audit_logs_org_subject_email_created expression
+SUBJECT_EMAIL = AuditLog.metadata_json.op("->>")(literal_column("'subject_email'"))
+
+
+class AuditLogFilters:
+    """Common filter and keyset pagination parameters for audit log listings."""
+
+    def __init__(
+        self,
+        action: str | None = Query(None, description="Exact action name"),
+        entity_type: str | None = Query(None),
+        entity_id: UUID | None = Query(None),
+        user_email: str | None = Query(None),
+        subject_email: str | None = Query(None, description="Data subject email recorded in the event metadata"),
+        metadata: str | None = Query(
+            None, description='JSON object the event metadata must contain, e.g. {"purpose": "marketing"}'
+        ),
+        since: datetime | None = Query(None, description="Only events at or after this time"),
+        until: datetime | None = Query(None, description="Only events before this time"),
+        cursor: str | None = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    ):
+        self.action = action
+        self.entity_type = entity_type
+        self.entity_id = entity_id
+        self.user_email = user_email
+        self.subject_email = subject_email
+        self.metadata = self._parse_metadata(metadata)
+        # A plain subject_email condition is served by the dedicated expression index
+        if isinstance(self.metadata.get("subject_email"), str) and not self.subject_email:
+            self.subject_email = self.metadata.pop("subject_email")
+        self.since = since
+        self.until = until
+        self.cursor = cursor
+
+    @staticmethod
+    def _parse_metadata(metadata: str | None) -> dict:
+        if not metadata:
+            return {}
+        try:
+            value = json.loads(metadata)
+        except ValueError:
+            value = None
+        if not isinstance(value, dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="metadata must be a JSON object",
+            )
+        return value
+
+    def position(self) -> tuple[datetime, UUID] | None:
+        """Decoded cursor position, if any."""
+        if not self.cursor:
+            return None
+        try:
+            return decode_cursor(self.cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def matches(self, row: dict) -> bool:
+        """Apply the column filters to an archived row."""
+        return (
+            (not self.action or row["action"] == self.action)
+            and (not self.entity_type or row["entity_type"] == self.entity_type)
+            and (not self.entity_id or row["entity_id"] == self.entity_id)
+            and (not self.user_email or row["user_email"] == self.user_email)
+            and (not self.subject_email or (row["metadata_json"] or {}).get("subject_email") == self.subject_email)
+            and (not self.metadata or jsonb_contains(row["metadata_json"] or {}, self.metadata))
+        )
+
+    def archived(self, org_id: UUID | None, limit: int, hide_sensitive: bool = False) -> list:
+        """
+        Archived rows matching the filters, when ``since`` reaches into the cold archive.
+
+        Listings without a lower time bound only read the hot table.
+        """
+        if not self.since:
+            return []
+        archived_until = archive_store.archived_until("audit_logs", org_id)
+        if not archived_until or self.since > archived_until:
+            return []
+
+        def match(row: dict) -> bool:
+            # Files archived before sensitivity existed carry no classification
+            if hide_sensitive and (row["sensitivity"] or classify_action(row["action"])) != NORMAL:
+                return False
+            return self.matches(row)
+
+        rows = archive_store.query(
+            "audit_logs", org_id, self.since, self.until, match=match, before=self.position(), limit=limit
+        )
+        return [SimpleNamespace(**row) for row in rows]
+
+    def apply(self, query: SAQuery) -> SAQuery:
+        """Apply filters and the cursor position to an org-scoped audit query."""
+        if self.action:
+            query = query.filter(AuditLog.action == self.action)
+        if self.entity_type:
+            query = query.filter(AuditLog.entity_type == self.entity_type)
+        if self.entity_id:
+            query = query.filter(AuditLog.entity_id == self.entity_id)
+        if self.user_email:
+            query = query.filter(AuditLog.user_email == self.user_email)
+        if self.subject_email:
+            query = query.filter(SUBJECT_EMAIL == self.subject_email)
+        if self.metadata:
+            # jsonb @> served by the jsonb_path_ops GIN index
+            query = query.filter(AuditLog.metadata_json.contains(self.metadata))
+        if self.since:
+            query = query.filter(AuditLog.created_at >= self.since)
+        if self.until:
+            query = query.filter(AuditLog.created_at < self.until)
+        if self.cursor:
+            created_at, row_id = self.position()
+            # The plain created_at bound is redundant with the row comparison but
+            # lets the planner prune newer monthly partitions.
+            query = query.filter(
+                AuditLog.created_at <= created_at,
+                tuple_(AuditLog.created_at, AuditLog.id) < tuple_(created_at, row_id),
+            )
+        return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+
+def _fetch_page(query: SAQuery, limit: int, response: Response, archived: list = ()) -> list[AuditLog]:
+    """
+    Fetch one page and expose the next cursor in the X-Next-Cursor header.
+
+    Archived rows are merged in by (created_at, id) so a page can span both tiers.
+    """
+    logs = query.limit(limit).all()
+    if archived:
+        logs = sorted([*logs, *archived], key=lambda l: (l.created_at, l.id), reverse=True)[:limit]
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].created_at, logs[-1].id)
+    return logs
+
 
 @router.get("/logs")
 def get_audit_logs(
+    request: Request,
+    response: Response,
+    filters: AuditLogFilters = Depends(),
+    limit: int = Query(200, ge=1, le=1000, description="Maximum number of logs to return"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -20,6 +181,7 @@ def get_audit_logs(
     Get audit logs scoped to user's organization.
     Superadmins see all logs; regular users see logs for their org.
     Viewers see limited logs (no sensitive actions).
+    Results can be filtered and paged with the cursor from X-Next-Cursor.
     
     Note: org_id is now guaranteed to be non-null for all audit logs,
     ensuring org admins can always see activities related to their organization,
@@ -27,7 +189,8 @@ def get_audit_logs(
     """
     from app.security.roles import get_user_org_membership, can_view_sensitive
     
-    q = db.query(AuditLog).order_by(AuditLog.created_at.desc())
+    q = db.query(AuditLog)
+    scope_org_id, hide_sensitive = None, False
     
     # Superadmins see all logs
     if not current_user.is_superadmin:
@@ -36,13 +199,17 @@ def get_audit_logs(
             raise HTTPException(status_code=403, detail="User not part of any organization")
         
         # Scope to user's organization
-        q = q.filter(AuditLog.org_id == org_user.org_id)
+        scope_org_id = org_user.org_id
+        q = q.filter(AuditLog.org_id == scope_org_id)
         
         # Viewers see limited logs (no sensitive actions like exports)
         if not can_view_sensitive(current_user, db):
-            q = q.filter(~AuditLog.action.ilike("%export%"))
+            hide_sensitive = True
+            q = q.filter(AuditLog.sensitivity == NORMAL)
     
-    logs = q.limit(200).all()
+    check_not_modified(request, response, db, scope_org_id, variant=NORMAL if hide_sensitive else "all")
+    archived = filters.archived(scope_org_id, limit, hide_sensitive)
+    logs = _fetch_page(filters.apply(q), limit, response, archived)
     
     return [
         {
@@ -55,8 +222,221 @@ def get_audit_logs(
     ]
 
 
+@router.get("/verify")
+def verify_audit_chain(
+    org_id: UUID | None = Query(None, description="Organization ID (required for superadmins)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Verify the tamper-evident hash chain of an organization's audit log.
+
+    Only rows written after the last verified checkpoint are re-hashed; a
+    successful verification records a new signed checkpoint at the chain head.
+    Requires permission to view sensitive audit data.
+    """
+    from app.security.roles import get_user_org_membership, can_view_sensitive
+
+    if current_user.is_superadmin:
+        if not org_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="org_id is required",
+            )
+    else:
+        org_user = get_user_org_membership(current_user, db)
+        if not org_user:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User not part of any organization",
+            )
+        if org_id and org_id != org_user.org_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User is not a member of this organization",
+            )
+        if not can_view_sensitive(current_user, db):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Requires permission to view sensitive audit data",
+            )
+        org_id = org_user.org_id
+
+    return verify_org_chain(org_id)
+
+
+def _sse(event: dict) -> str:
+    """Format an audit event as a Server-Sent Events message."""
+    return f"id: {event['cursor']}\nevent: audit\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def _replay_events(org_id: UUID | None, include_sensitive: bool, position: tuple[datetime, UUID]) -> list[dict]:
+    """Events committed after a client's Last-Event-ID, oldest first."""
+    created_at, row_id = position
+    stmt = (
+        select(AuditLog.__table__)
+        .where(
+            AuditLog.created_at >= created_at,
+            tuple_(AuditLog.created_at, AuditLog.id) > tuple_(created_at, row_id),
+        )
+        .order_by(AuditLog.created_at, AuditLog.id)
+        .limit(STREAM_REPLAY_LIMIT)
+    )
+    if org_id:
+        stmt = stmt.where(AuditLog.org_id == org_id)
+    if not include_sensitive:
+        stmt = stmt.where(AuditLog.sensitivity == NORMAL)
+    db = SessionLocal()
+    try:
+        return [event_payload(dict(row)) for row in db.execute(stmt).mappings()]
+    finally:
+        db.close()
+
+
+def _stream_still_allowed(user_id: UUID, org_id: UUID | None, include_sensitive: bool) -> bool:
+    """Whether the user may still watch a stream of this org and sensitivity scope."""
+    from app.security.roles import get_user_org_membership, can_view_sensitive
+
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        if not user:
+            return False
+        if user.is_superadmin:
+            return True
+        if org_id is None or not get_user_org_membership(user, db, org_id):
+            return False
+        return not include_sensitive or can_view_sensitive(user, db)
+    finally:
+        db.close()
+
+
+async def _stream_events(
+    request: Request,
+    user_id: UUID,
+    org_id: UUID | None,
+    include_sensitive: bool,
+    position,
+    expires_at: float,
+):
+    subscription = audit_broadcaster.subscribe(org_id, include_sensitive)
+    next_check = time.monotonic() + settings.audit_stream_recheck_seconds
+    try:
+        yield "retry: 3000\n\n"
+        # Subscribe before replaying so nothing committed in between is lost
+        replayed = set()
+        if position:
+            for event in await run_in_threadpool(_replay_events, org_id, include_sensitive, position):
+                replayed.add(event["id"])
+                yield _sse(event)
+
+        while True:
+            if time.time() >= expires_at:
+                # The client has to sign in again and request a new ticket
+                yield "event: expired\ndata: {}\n\n"
+                break
+            if time.monotonic() >= next_check:
+                if not await run_in_threadpool(_stream_still_allowed, user_id, org_id, include_sensitive):
+                    yield "event: revoked\ndata: {}\n\n"
+                    break
+                next_check = time.monotonic() + settings.audit_stream_recheck_seconds
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.audit_stream_keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if subscription.lagged:
+                # Events were dropped for this slow client; it should re-list
+                subscription.lagged = False
+                yield "event: lagged\ndata: {}\n\n"
+            if event["id"] not in replayed:
+                yield _sse(event)
+    finally:
+        audit_broadcaster.unsubscribe(subscription)
+
+
+@router.post("/stream/ticket", response_model=StreamTicketOut)
+def create_audit_stream_ticket(
+    token: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Issue a short-lived ticket for opening ``/audit/stream`` with EventSource.
+
+    The ticket is only accepted by the stream, for ``AUDIT_STREAM_TICKET_SECONDS``,
+    so access tokens never have to be put in a URL. Streams opened with it end
+    when the access token it was issued for expires.
+    """
+    session_expires_at = verify_token(token.credentials)["exp"]
+    return {
+        "ticket": create_stream_ticket(current_user.id, session_expires_at),
+        "expires_in": settings.audit_stream_ticket_seconds,
+    }
+
+
+@router.get("/stream")
+def stream_audit_logs(
+    request: Request,
+    org_id: UUID | None = Query(None, description="Organization ID (optional for superadmins)"),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_stream_user),
+):
+    """
+    Live tail of audit events over Server-Sent Events.
+
+    Events are pushed as they are committed, scoped to the user's organization;
+    viewers do not receive sensitive events. EventSource clients authenticate
+    with ?ticket= (see POST /audit/stream/ticket) and resume after a reconnect
+    via Last-Event-ID, with a fresh ticket.
+
+    Open streams periodically re-check the user's membership and end with an
+    ``expired`` or ``revoked`` event once the session expires or access is lost.
+    """
+    from app.security.roles import get_user_org_membership, can_view_sensitive
+
+    include_sensitive = True
+    if not current_user.is_superadmin:
+        # Not get_db: that session would stay checked out until the stream ends
+        db = SessionLocal()
+        try:
+            org_user = get_user_org_membership(current_user, db)
+            if not org_user:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="User not part of any organization",
+                )
+            if org_id and org_id != org_user.org_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="User is not a member of this organization",
+                )
+            org_id = org_user.org_id
+            include_sensitive = can_view_sensitive(current_user, db)
+        finally:
+            db.close()
+
+    position = None
+    if last_event_id:
+        try:
+            position = decode_cursor(last_event_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return StreamingResponse(
+        _stream_events(request, current_user.id, org_id, include_sensitive, position, request.state.stream_expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("", response_model=list[AuditLogOut])
 def list_audit_logs(
+    response: Response,
+    filters: AuditLogFilters = Depends(),
     x_api_key: str | None = Header(None, alias="X-API-Key"),
     org_id: UUID | None = Query(None, description="Organization ID (optional for superadmins with JWT)"),
     current_user: User | None = Depends(get_current_user_optional),
@@ -69,6 +449,7 @@ def list_audit_logs(
     Superadmins can view all logs without org_id.
     Regular users see logs scoped to their organization.
     Viewers see limited logs (no sensitive actions).
+    Results can be filtered and paged with the cursor from X-Next-Cursor.
     
     Note: org_id is now guaranteed to be non-null for all audit logs,
     ensuring org admins can always see activities related to their organization,
@@ -78,20 +459,14 @@ def list_audit_logs(
     
     # API key authentication (for API integrations)
     if x_api_key:
-        org = db.query(Org).filter(Org.api_key == x_api_key).first()
+        org = org_for_api_key(db, x_api_key)
         if not org:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid API key",
             )
-        logs = (
-            db.query(AuditLog)
-            .filter(AuditLog.org_id == org.id)
-            .order_by(AuditLog.created_at.desc())
-            .limit(limit)
-            .all()
-        )
-        return logs
+        query = db.query(AuditLog).filter(AuditLog.org_id == org.id)
+        return _fetch_page(filters.apply(query), limit, response, filters.archived(org.id, limit))
     
     # JWT authentication (for dashboard)
     if not current_user:
@@ -100,12 +475,14 @@ def list_audit_logs(
             detail="Authentication required (API key or JWT token)",
         )
     
-    query = db.query(AuditLog).order_by(AuditLog.created_at.desc())
+    query = db.query(AuditLog)
+    scope_org_id, hide_sensitive = None, False
     
     # Superadmins can view all logs
     if current_user.is_superadmin:
         if org_id:
             # Superadmin can filter by specific org if requested
+            scope_org_id = org_id
             query = query.filter(AuditLog.org_id == org_id)
     else:
         # Regular users: scope to their organization
@@ -127,10 +504,12 @@ def list_audit_logs(
         else:
             # Auto-scope to user's org
             query = query.filter(AuditLog.org_id == org_user.org_id)
+        scope_org_id = org_user.org_id
         
         # Viewers see limited logs (no sensitive actions)
         if not can_view_sensitive(current_user, db):
-            query = query.filter(~AuditLog.action.ilike("%export%"))
+            hide_sensitive = True
+            query = query.filter(AuditLog.sensitivity == NORMAL)
     
-    logs = query.limit(limit).all()
-    return logs
+    archived = filters.archived(scope_org_id, limit, hide_sensitive)
+    return _fetch_page(filters.apply(query), limit, response, archived)
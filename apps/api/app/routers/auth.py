@@ -3,20 +3,33 @@ from datetime import timedelta
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.db import Org, OrgUser, User, get_db
 from app.deps import get_current_user
 from app.schemas import LoginRequest, TokenResponse
-from app.security import create_access_token, hash_password, verify_password
+from app.security import create_access_token, needs_rehash
+from app.security.claims import role_claims
+from app.security.password_pool import PasswordPoolFull, password_pool
+from app.services.metrics import metrics
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    """Authenticate user and return JWT access token."""
-    user = db.query(User).filter(User.email == request.email.lower().strip()).first()
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
+    """
+    Authenticate user and return JWT access token.
+
+    The bcrypt check runs in the password pool rather than a threadpool slot;
+    when the pool is saturated the login is rejected with a 429 straight away.
+    Passwords hashed below the current bcrypt cost are rehashed on success.
+    With JWT_ROLE_CLAIMS the token also carries the user's org roles.
+    """
+    email = request.email.lower().strip()
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
 
     if not user:
         raise HTTPException(
@@ -24,35 +37,64 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
             detail="Incorrect email or password",
         )
 
-    if not verify_password(request.password, user.password_hash):
+    try:
+        valid = await password_pool.verify(request.password, user.password_hash)
+    except PasswordPoolFull:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many logins in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    if needs_rehash(user.password_hash):
+        await _rehash(user, request.password, db)
+
     # Use 7-day expiration for all tokens
     access_token_expires = timedelta(days=7)
     
+    # Read before the memberships: a change in between then invalidates the claims
+    membership_version = user.membership_version
+
     # Superadmin login - no org validation needed
     if user.is_superadmin:
-        access_token = create_access_token(
-            data={"sub": str(user.id), "email": user.email, "is_superadmin": True},
-            expires_delta=access_token_expires,
-        )
+        claims = {"sub": str(user.id), "email": user.email, "is_superadmin": True}
+        if settings.jwt_role_claims:
+            claims.update(role_claims(user, [], membership_version))
+        access_token = create_access_token(data=claims, expires_delta=access_token_expires)
         return TokenResponse(access_token=access_token)
 
     # Regular user login - get user's org memberships
-    memberships = db.query(OrgUser).filter(OrgUser.user_id == user.id).all()
-    org_ids = [str(m.org_id) for m in memberships]
+    claims = {"sub": str(user.id), "email": user.email}
+    if settings.jwt_role_claims:
+        memberships = await run_in_threadpool(lambda: db.query(OrgUser).filter(OrgUser.user_id == user.id).all())
+        claims.update(role_claims(user, memberships, membership_version))
 
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email},
-        expires_delta=access_token_expires,
-    )
+    access_token = create_access_token(data=claims, expires_delta=access_token_expires)
 
     return TokenResponse(access_token=access_token)
 
 
+async def _rehash(user: User, password: str, db: Session):
+    """Store the password under the current hashing policy (skipped if the pool is busy)."""
+    try:
+        new_hash = await password_pool.hash(password)
+    except PasswordPoolFull:
+        return  # Next login will try again
+
+    def store():
+        user.password_hash = new_hash
+        db.commit()
+        db.refresh(user)  # Reload here rather than lazily on the event loop
+
+    await run_in_threadpool(store)
+    metrics.incr("password.rehashed")
+
+
 @router.get("/me")
 def get_current_user_info(
     current_user: User = Depends(get_current_user),
@@ -1,17 +1,22 @@
 """Consent router."""
 from datetime import UTC, datetime
+from types import SimpleNamespace
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Header, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Header, status
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from app.db import Consent, Org, User, get_db
-from app.deps import get_current_org, get_org_by_api_key, get_current_user_optional, get_current_user
+from app.deps import get_audit_context, get_current_org, get_org_by_api_key, get_current_user_optional, get_current_user
 from app.schemas import ConsentCreate, ConsentOut
 from app.security import compute_version_hash
 from app.security.roles import get_user_org_membership
-from app.services.audit_service import log_event
+from app.services.api_keys import org_for_api_key
+from app.services.archive_service import archive_store
+from app.services.audit_service import AuditContext, log_event
+from app.services.org_counters import bump_counters
+from app.utils.conditional import check_not_modified
 
 router = APIRouter(prefix="/consents", tags=["Consents"])
 
@@ -22,6 +27,7 @@ def create_consent(
     request: Request = None,
     org: Org = Depends(get_org_by_api_key),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """
     Create consent record (requires API key in Authorization header).
@@ -68,14 +74,14 @@ def create_consent(
     )
 
     db.add(consent)
+    bump_counters(db, org.id, consents=1, consents_revoked=1 if revoked_at else 0)
     db.commit()
     db.refresh(consent)
 
     # Log audit action
-    # For API key auth, we use the org as the "actor" context
     log_event(
         db=db,
-        actor=org,  # Use org as actor context for API key auth
+        context=audit,
         action="created",
         entity_type="consent",
         entity_id=consent.id,
@@ -92,6 +98,8 @@ def create_consent(
 
 @router.get("", response_model=list[ConsentOut])
 def list_consents(
+    request: Request,
+    response: Response,
     x_api_key: str | None = Header(None, alias="X-API-Key"),
     subject_id: str | None = Query(None),
     subject_email: str | None = Query(None),
@@ -106,15 +114,20 @@ def list_consents(
     List consents with filters.
     Supports both X-API-Key header (for API integrations) and JWT auth (for dashboard).
     Regular users see consents scoped to their organization.
+    Revoked consents that were moved to the cold archive are included when
+    from_date reaches back into the archived range.
     """
+    scope_org_id = None
+
     # API key authentication (for API integrations)
     if x_api_key:
-        org = db.query(Org).filter(Org.api_key == x_api_key).first()
+        org = org_for_api_key(db, x_api_key)
         if not org:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid API key",
             )
+        scope_org_id = org.id
         query = db.query(Consent).filter(Consent.org_id == org.id)
     else:
         # JWT authentication (for dashboard)
@@ -135,8 +148,11 @@ def list_consents(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="User not part of any organization",
                 )
+            scope_org_id = org_user.org_id
             query = db.query(Consent).filter(Consent.org_id == org_user.org_id)
 
+    check_not_modified(request, response, db, scope_org_id)
+
     if subject_id:
         query = query.filter(Consent.subject_id == subject_id)
     if subject_email:
@@ -158,6 +174,29 @@ def list_consents(
         )
 
     consents = query.order_by(Consent.accepted_at.desc()).limit(1000).all()
+
+    archived_until = archive_store.archived_until("consents", scope_org_id)
+    if from_date and archived_until and from_date <= archived_until:
+        needle = q.lower() if q else None
+
+        def match(row: dict) -> bool:
+            return (
+                (not subject_id or row["subject_id"] == subject_id)
+                and (not subject_email or row["subject_email"] == subject_email)
+                and (not purpose or row["purpose"] == purpose)
+                and (not to_date or row["accepted_at"] <= to_date)
+                and (not needle or any(
+                    needle in (row[field] or "").lower()
+                    for field in ("subject_id", "subject_email", "purpose", "text")
+                ))
+            )
+
+        archived = archive_store.query("consents", scope_org_id, since=from_date, match=match, limit=1000)
+        consents = sorted(
+            [*consents, *(SimpleNamespace(**row) for row in archived)],
+            key=lambda c: c.accepted_at,
+            reverse=True,
+        )[:1000]
     return consents
 
 
@@ -166,6 +205,7 @@ def revoke_consent(
     consent_id: UUID,
     org: Org = Depends(get_org_by_api_key),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Revoke a consent (requires API key)."""
     consent = db.query(Consent).filter(
@@ -173,6 +213,13 @@ def revoke_consent(
         Consent.org_id == org.id,
     ).first()
 
+    if not consent and archive_store.find("consents", org.id, consent_id):
+        # Only revoked consents are archived
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Consent already revoked",
+        )
+
     if not consent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -186,13 +233,13 @@ def revoke_consent(
         )
 
     consent.revoked_at = datetime.now(UTC)
+    bump_counters(db, org.id, consents_revoked=1)
     db.commit()
 
     # Log audit action
-    # For API key auth, we use the org as the "actor" context
     log_event(
         db=db,
-        actor=org,  # Use org as actor context for API key auth
+        context=audit,
         action="revoked",
         entity_type="consent",
         entity_id=consent.id,
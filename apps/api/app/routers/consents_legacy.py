@@ -10,6 +10,8 @@ from app.db import Consent, Org, OrgUser, get_db
 from app.deps import get_current_org, get_current_user, require_role
 from app.schemas import ConsentCreate, ConsentOut
 from app.security import compute_version_hash
+from app.services.archive_service import archive_store
+from app.services.org_counters import bump_counters
 
 router = APIRouter(prefix="/consents", tags=["Consents"])
 
@@ -60,6 +62,7 @@ def create_consent_legacy(
     )
 
     db.add(consent)
+    bump_counters(db, org_id, consents=1)
     db.commit()
     db.refresh(consent)
 
@@ -142,6 +145,13 @@ def revoke_consent(
         Consent.org_id == current_org.id,
     ).first()
 
+    if not consent and archive_store.find("consents", current_org.id, consent_id):
+        # Only revoked consents are archived
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Consent already revoked",
+        )
+
     if not consent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,6 +165,7 @@ def revoke_consent(
         )
 
     consent.revoked_at = datetime.utcnow()
+    bump_counters(db, current_org.id, consents_revoked=1)
     db.commit()
 
     return {"message": "Consent revoked", "consent_id": str(consent_id)}
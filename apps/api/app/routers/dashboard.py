@@ -1,29 +1,40 @@
 """Dashboard router."""
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.db import get_db, Consent, DataRightRequest, AuditLog, Org, OrgUser
+from app.db import get_db, AuditLog, Org, OrgCounter, OrgUser
 from app.deps import get_current_user
 from app.security.roles import get_user_org_membership, can_view_sensitive
+from app.services.audit_sensitivity import NORMAL, classify_action
+from app.services.consent_breakdowns import consent_breakdown
+from app.services.org_counters import get_counters, total_counters
+from app.services.response_cache import dashboard_cache
+from app.services.rollups import CONSENT_GRANULARITIES, GRANULARITIES, as_utc, consent_timeseries, timeseries
+from app.services.subject_sketches import EXACT_AUTO_DAYS, SUBJECT_GRANULARITIES, unique_subjects
+from app.utils.conditional import check_not_modified
+
+TIMESERIES_METRICS = ("audit", "consents", "consents_revoked", "dsars", "dsar_status")
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/summary")
 def get_summary(
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Return top-level counts for dashboard cards, scoped to user's organization."""
     try:
         # Super admin sees everything
-        if current_user.is_superadmin:
-            api_logs = db.query(AuditLog).count()
-            consents = db.query(Consent).count()
-            data_rights = db.query(DataRightRequest).count()
-            activity = db.query(AuditLog).count()
-        else:
+        org_id = None
+        if not current_user.is_superadmin:
             # Determine user's active org
             org_user = get_user_org_membership(current_user, db)
             if not org_user:
@@ -31,17 +42,18 @@ def get_summary(
             
             org_id = org_user.org_id
 
-            # Scope queries by org_id
-            api_logs = db.query(AuditLog).filter(AuditLog.org_id == org_id).count()
-            consents = db.query(Consent).filter(Consent.org_id == org_id).count()
-            data_rights = db.query(DataRightRequest).filter(DataRightRequest.org_id == org_id).count()
-            activity = db.query(AuditLog).filter(AuditLog.org_id == org_id).count()
+        check_not_modified(request, response, db, org_id)
 
+        def compute():
+            # Scope counts by org_id
+            return total_counters(db) if org_id is None else get_counters(db, org_id)
+
+        totals = dashboard_cache.get_or_compute(("summary", org_id), org_id, compute)
         return {
-            "api_logs": api_logs,
-            "consents": consents,
-            "data_rights": data_rights,
-            "activity": activity,
+            "api_logs": totals["audit_events"],
+            "consents": totals["consents"],
+            "data_rights": totals["dsars"],
+            "activity": totals["audit_events"],
             "is_superadmin": current_user.is_superadmin,
         }
     except HTTPException:
@@ -59,60 +71,234 @@ def get_recent_activity(
     """Recent audit trail for dashboard activity, scoped to user's organization."""
     try:
         query = db.query(AuditLog).order_by(AuditLog.created_at.desc())
+        org_id, include_sensitive = None, True
 
         if not current_user.is_superadmin:
             org_user = get_user_org_membership(current_user, db)
             if not org_user:
                 raise HTTPException(status_code=403, detail="User not part of any organization")
-            query = query.filter(AuditLog.org_id == org_user.org_id)
+            org_id = org_user.org_id
+            query = query.filter(AuditLog.org_id == org_id)
             
             # Viewers see limited activity (no sensitive actions)
-            if not can_view_sensitive(current_user, db):
-                query = query.filter(~AuditLog.action.ilike("%export%"))
-
-        recent = query.limit(limit).all()
-        return [
-            {
-                "id": str(a.id),
-                "action": a.action,
-                "timestamp": a.created_at.isoformat(),
-            }
-            for a in recent
-        ]
+            include_sensitive = can_view_sensitive(current_user, db)
+            if not include_sensitive:
+                query = query.filter(AuditLog.sensitivity == NORMAL)
+
+        def compute():
+            return [
+                {
+                    "id": str(a.id),
+                    "action": a.action,
+                    "timestamp": a.created_at.isoformat(),
+                }
+                for a in query.limit(limit).all()
+            ]
+
+        return dashboard_cache.get_or_compute(("recent", org_id, include_sensitive, limit), org_id, compute)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get activity: {str(e)}")
 
 
+# Sortable columns of /dashboard/orgs
+ORG_SORT_KEYS = ("name", "region", "created_at", "users", "consents", "api_logs", "data_rights")
+
+
 @router.get("/orgs")
 def list_orgs_with_stats(
+    response: Response,
+    sort: str = Query("name", description=f"Sort key: {', '.join(ORG_SORT_KEYS)}"),
+    order: str = Query("asc", description="asc or desc"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    """Return all organizations with key metrics (for superadmins)."""
+    """
+    Return organizations with key metrics (for superadmins).
+
+    Stats come from a single query over org counters and grouped memberships;
+    the total number of orgs is returned in the X-Total-Count header.
+    """
     if not current_user.is_superadmin:
         raise HTTPException(status_code=403, detail="Access denied")
+    if sort not in ORG_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(ORG_SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+
+    users = select(OrgUser.org_id, func.count().label("users")).group_by(OrgUser.org_id).subquery()
+    columns = {
+        "name": Org.name,
+        "region": Org.region,
+        "created_at": Org.created_at,
+        "users": func.coalesce(users.c.users, 0),
+        "consents": func.coalesce(OrgCounter.consents, 0),
+        "api_logs": func.coalesce(OrgCounter.audit_events, 0),
+        "data_rights": func.coalesce(OrgCounter.dsars, 0),
+    }
+    sort_column = columns[sort].desc() if order == "desc" else columns[sort].asc()
+
+    stmt = (
+        select(Org.id, *(column.label(key) for key, column in columns.items()), func.count().over().label("total"))
+        .outerjoin(users, users.c.org_id == Org.id)
+        .outerjoin(OrgCounter, OrgCounter.org_id == Org.id)
+        .order_by(sort_column, Org.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    rows = db.execute(stmt).mappings().all()
+
+    if rows:
+        total = rows[0]["total"]
+    else:
+        total = db.query(func.count(Org.id)).scalar() if offset else 0
+    response.headers["X-Total-Count"] = str(total)
+
+    return [
+        {
+            "id": str(row["id"]),
+            "name": row["name"],
+            "region": row["region"] or "N/A",
+            "users": row["users"],
+            "consents": int(row["consents"]),
+            "api_logs": int(row["api_logs"]),
+            "data_rights": int(row["data_rights"]),
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        }
+        for row in rows
+    ]
+
+
+def _scoped_org_id(current_user, org_id: UUID | None, db: Session) -> UUID | None:
+    """Org a query is limited to: any (or none) for superadmins, else the user's own org."""
+    if current_user.is_superadmin:
+        return org_id
+    org_user = get_user_org_membership(current_user, db)
+    if not org_user:
+        raise HTTPException(status_code=403, detail="User not part of any organization")
+    if org_id and org_id != org_user.org_id:
+        raise HTTPException(status_code=403, detail="User is not a member of this organization")
+    return org_user.org_id
+
+
+@router.get("/timeseries/{metric}")
+def get_timeseries(
+    metric: str,
+    granularity: str = Query("day", description="Bucket size: hour or day"),
+    since: datetime | None = Query(None, description="Start of the range (default: 30 days ago)"),
+    until: datetime | None = Query(None, description="End of the range (default: now)"),
+    dimension: str | None = Query(None, description="Only this action / purpose / request type / status"),
+    org_id: UUID | None = Query(None, description="Organization ID (optional for superadmins)"),
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Event counts per bucket from the hourly/daily rollups, scoped to user's organization.
+
+    Metrics: audit (by action), consents and consents_revoked (by purpose),
+    dsars (by request type) and dsar_status (net status changes by status).
+    Buckets are UTC; the newest minutes appear once the rollup job has run.
+    """
+    if metric not in TIMESERIES_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric '{metric}'. Must be one of: {', '.join(TIMESERIES_METRICS)}")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+
+    org_id = _scoped_org_id(current_user, org_id, db)
+    hide_sensitive = not current_user.is_superadmin and not can_view_sensitive(current_user, db)
 
-    orgs = db.query(Org).all()
-    result = []
+    until = as_utc(until) if until else datetime.now(UTC)
+    since = as_utc(since) if since else until - timedelta(days=30)
+    points = timeseries(db, metric, granularity, since, until, org_id, dimension)
+    if metric == "audit" and hide_sensitive:
+        points = [p for p in points if classify_action(p["dimension"]) == NORMAL]
+    return {"metric": metric, "granularity": granularity, "since": since.isoformat(), "until": until.isoformat(), "points": points}
 
-    for org in orgs:
-        user_count = db.query(OrgUser).filter(OrgUser.org_id == org.id).count()
-        consent_count = db.query(Consent).filter(Consent.org_id == org.id).count()
-        api_logs = db.query(AuditLog).filter(AuditLog.org_id == org.id).count()
-        rights = db.query(DataRightRequest).filter(DataRightRequest.org_id == org.id).count()
 
-        result.append({
-            "id": str(org.id),
-            "name": org.name,
-            "region": org.region if hasattr(org, "region") else "N/A",
-            "users": user_count,
-            "consents": consent_count,
-            "api_logs": api_logs,
-            "data_rights": rights,
-            "created_at": org.created_at.isoformat() if hasattr(org, "created_at") else None,
-        })
+@router.get("/consents/timeseries")
+def get_consent_timeseries(
+    granularity: str = Query("day", description="Bucket size: hour, day or week"),
+    since: datetime | None = Query(None, description="Start of the range (default: 30 days ago)"),
+    until: datetime | None = Query(None, description="End of the range (default: now)"),
+    purpose: str | None = Query(None, description="Only this purpose"),
+    org_id: UUID | None = Query(None, description="Organization ID (optional for superadmins)"),
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Consents granted, revoked, net change and active per bucket, by purpose.
 
-    return result
+    Served from the hourly/daily rollups (weeks are summed from days, starting
+    Monday UTC); ``total`` sums all purposes.
+    """
+    if granularity not in CONSENT_GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour', 'day' or 'week'")
+    org_id = _scoped_org_id(current_user, org_id, db)
+
+    until = as_utc(until) if until else datetime.now(UTC)
+    since = as_utc(since) if since else until - timedelta(days=30)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    try:
+        result = consent_timeseries(db, granularity, since, until, org_id, purpose)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"granularity": granularity, "until": until.isoformat(), **result}
+
+
+@router.get("/consents/unique-subjects")
+def get_unique_subjects(
+    since: date | None = Query(None, description="First UTC day (default: 30 days ago)"),
+    until: date | None = Query(None, description="Day after the last one counted (default: tomorrow)"),
+    granularity: str = Query("total", description="total, month or day"),
+    purpose: str | None = Query(None, description="Only this purpose"),
+    mode: str = Query("auto", description=f"approximate, exact, or auto (exact up to {EXACT_AUTO_DAYS} days)"),
+    org_id: UUID | None = Query(None, description="Organization ID (required for superadmins)"),
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Distinct consenting subjects per purpose, for the range or per month / day.
+
+    Approximate counts merge daily HyperLogLog sketches; ``standard_error`` is
+    their relative standard error (about 95% of counts are within twice it).
+    """
+    if granularity not in SUBJECT_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(SUBJECT_GRANULARITIES)}")
+    if mode not in ("approximate", "exact", "auto"):
+        raise HTTPException(status_code=400, detail="mode must be 'approximate', 'exact' or 'auto'")
+    org_id = _scoped_org_id(current_user, org_id, db)
+    if not org_id:
+        raise HTTPException(status_code=400, detail="org_id is required")
+
+    until = until or datetime.now(UTC).date() + timedelta(days=1)
+    since = since or until - timedelta(days=31)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    exact = mode == "exact" or (mode == "auto" and (until - since).days <= EXACT_AUTO_DAYS)
+    try:
+        result = unique_subjects(db, org_id, since, until, granularity, purpose, exact)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"since": since.isoformat(), "until": until.isoformat(), "granularity": granularity, **result}
+
+
+@router.get("/consents/breakdown")
+def get_consent_breakdown(
+    org_id: UUID | None = Query(None, description="Organization ID (required for superadmins)"),
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Active / revoked consents per purpose and the most common user agents.
 
+    Read from materialized views refreshed in the background; ``freshness``
+    gives each view's last refresh, its age and how long the refresh took.
+    """
+    org_id = _scoped_org_id(current_user, org_id, db)
+    if not org_id:
+        raise HTTPException(status_code=400, detail="org_id is required")
+    return {"org_id": str(org_id), **consent_breakdown(db, org_id)}
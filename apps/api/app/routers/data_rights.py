@@ -1,13 +1,16 @@
 """Data Rights (DSAR) router."""
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Header, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.db import DataRightRequest, Org, OrgUser, User, get_db
-from app.deps import get_current_org, get_current_user, get_org_by_api_key, get_current_user_optional
+from app.deps import get_audit_context, get_current_org, get_current_user, get_org_by_api_key, get_current_user_optional
 from app.schemas import DataRightRequestBase, DataRightRequestOut, DataRightRequestStatusUpdate
-from app.services.audit_service import log_event
+from app.services.api_keys import org_for_api_key
+from app.services.audit_service import AuditContext, log_event
+from app.services.org_counters import bump_counters, touch_org
+from app.utils.conditional import check_not_modified
 
 router = APIRouter(prefix="/data-rights", tags=["Data Rights"])
 
@@ -17,6 +20,7 @@ def create_data_right_request(
     payload: DataRightRequestBase,
     org: Org = Depends(get_org_by_api_key),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Create a new Data Subject Access Request (DSAR). Requires X-API-Key header."""
     req = DataRightRequest(
@@ -27,14 +31,14 @@ def create_data_right_request(
         status="pending",
     )
     db.add(req)
+    bump_counters(db, org.id, dsars=1)
     db.commit()
     db.refresh(req)
 
     # Log audit action
-    # For API key auth, we use the org as the "actor" context
     log_event(
         db=db,
-        actor=org,  # Use org as actor context for API key auth
+        context=audit,
         action="submitted",
         entity_type="data_right_request",
         entity_id=req.id,
@@ -47,6 +51,8 @@ def create_data_right_request(
 
 @router.get("", response_model=list[DataRightRequestOut])
 def list_data_rights(
+    request: Request,
+    response: Response,
     x_api_key: str | None = Header(None, alias="X-API-Key"),
     org_id: UUID | None = Query(None, description="Organization ID (optional for superadmins with JWT)"),
     current_user: User | None = Depends(get_current_user_optional),
@@ -62,12 +68,13 @@ def list_data_rights(
     
     # API key authentication (for API integrations)
     if x_api_key:
-        org = db.query(Org).filter(Org.api_key == x_api_key).first()
+        org = org_for_api_key(db, x_api_key)
         if not org:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid API key",
             )
+        check_not_modified(request, response, db, org.id)
         return (
             db.query(DataRightRequest)
             .filter(DataRightRequest.org_id == org.id)
@@ -86,6 +93,7 @@ def list_data_rights(
     query = db.query(DataRightRequest).order_by(DataRightRequest.created_at.desc())
     
     # Superadmins can view all requests
+    scope_org_id = org_id
     if current_user.is_superadmin:
         if org_id:
             # Superadmin can filter by specific org if requested
@@ -110,7 +118,9 @@ def list_data_rights(
         else:
             # Auto-scope to user's org
             query = query.filter(DataRightRequest.org_id == org_user.org_id)
+        scope_org_id = org_user.org_id
     
+    check_not_modified(request, response, db, scope_org_id)
     return query.limit(100).all()
 
 
@@ -120,6 +130,7 @@ def update_data_right_status(
     payload: DataRightRequestStatusUpdate,
     org: Org = Depends(get_org_by_api_key),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Update the status of a Data Rights request. Requires X-API-Key header."""
     req = db.query(DataRightRequest).filter(
@@ -135,14 +146,14 @@ def update_data_right_status(
     old_status = req.status
     req.status = payload.status
     req.processed_by = None  # API key auth, no user email
+    touch_org(db, org.id)
     db.commit()
     db.refresh(req)
 
     # Log audit action
-    # For API key auth, we use the org as the "actor" context
     log_event(
         db=db,
-        actor=org,  # Use org as actor context for API key auth
+        context=audit,
         action=f"marked_{payload.status}",
         entity_type="data_right_request",
         entity_id=req.id,
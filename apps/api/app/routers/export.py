@@ -4,54 +4,30 @@ from datetime import datetime
 from io import StringIO
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, Response, status
-from fastapi.responses import HTMLResponse
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from app.db import Consent, Org, get_db
-from app.deps import get_current_org, require_role
+from app.config import settings
+from app.db import Org, User, get_db
+from app.deps import get_current_org, get_current_user, require_role
+from app.services.export_service import ArchivedExport, ExportSnapshot, build_export_query
+from app.services.org_counters import get_counters
 
 router = APIRouter(prefix="/consents", tags=["Export"])
 
+CSV_HEADER = [
+    "ID", "Subject ID", "Purpose", "Text", "Version Hash",
+    "IP", "User Agent", "Accepted At", "Revoked At"
+]
 
-@router.get("/export.csv")
-def export_csv(
-    org_id: UUID = Query(...),
-    subject_id: str | None = Query(None),
-    purpose: str | None = Query(None),
-    q: str | None = Query(None),
-    current_org: Org = Depends(get_current_org),
-    _membership = Depends(require_role("viewer")),
-    db: Session = Depends(get_db),
-):
-    """Export consents as CSV."""
-    query = db.query(Consent).filter(Consent.org_id == current_org.id)
-
-    if subject_id:
-        query = query.filter(Consent.subject_id == subject_id)
-    if purpose:
-        query = query.filter(Consent.purpose == purpose)
-    if q:
-        query = query.filter(
-            or_(
-                Consent.subject_id.ilike(f"%{q}%"),
-                Consent.purpose.ilike(f"%{q}%"),
-                Consent.text.ilike(f"%{q}%"),
-            )
-        )
-
-    consents = query.order_by(Consent.accepted_at.desc()).all()
-
-    # Generate CSV
+
+def _csv_chunk(rows) -> str:
+    """Render a chunk of consent rows as CSV lines."""
     output = StringIO()
     writer = csv.writer(output)
-    writer.writerow([
-        "ID", "Subject ID", "Purpose", "Text", "Version Hash",
-        "IP", "User Agent", "Accepted At", "Revoked At"
-    ])
-
-    for consent in consents:
+    for consent in rows:
         writer.writerow([
             str(consent.id),
             consent.subject_id,
@@ -63,59 +39,126 @@ def export_csv(
             consent.accepted_at.isoformat() if consent.accepted_at else "",
             consent.revoked_at.isoformat() if consent.revoked_at else "",
         ])
+    return output.getvalue()
+
+
+def _html_chunk(rows) -> str:
+    """Render a chunk of consent rows as HTML table rows."""
+    return "".join(
+        f"""
+            <tr>
+                <td>{consent.subject_id}</td>
+                <td>{consent.purpose}</td>
+                <td>{(consent.text or "")[:100]}...</td>
+                <td>{consent.accepted_at.isoformat() if consent.accepted_at else ""}</td>
+                <td>{consent.revoked_at.isoformat() if consent.revoked_at else ""}</td>
+            </tr>
+"""
+        for consent in rows
+    )
+
+
+def _snapshot_headers(snapshot: ExportSnapshot, as_of: datetime | None) -> dict[str, str]:
+    """Headers stamping an export with the point in time it reflects."""
+    return {"X-Export-Snapshot-At": (as_of or snapshot.snapshot_at).isoformat()}
+
 
-    return Response(
-        content=output.getvalue(),
+def _allowed_slices(slices: int, user: User, db: Session, org_id: UUID) -> int:
+    """Parallel slicing is reserved for superadmins and orgs large enough to need it."""
+    if slices <= 1 or user.is_superadmin:
+        return slices
+    if get_counters(db, org_id)["consents"] >= settings.export_parallel_min_consents:
+        return slices
+    return 1
+
+
+@router.get("/export.csv")
+def export_csv(
+    org_id: UUID = Query(...),
+    subject_id: str | None = Query(None),
+    purpose: str | None = Query(None),
+    q: str | None = Query(None),
+    as_of: datetime | None = Query(None, description="Regenerate the export as of a previous snapshot timestamp"),
+    slices: int = Query(1, ge=1, le=32, description="Read the accepted_at range in up to N parallel slices"),
+    current_org: Org = Depends(get_current_org),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    _membership = Depends(require_role("viewer")),
+):
+    """
+    Export consents as CSV.
+
+    Rows are streamed in chunks from a single REPEATABLE READ snapshot. The
+    snapshot timestamp is returned in the X-Export-Snapshot-At header and can be
+    passed back as ``as_of`` to regenerate the same document.
+
+    Large exports can pass ``slices`` to read the accepted_at range concurrently
+    on separate connections sharing the same exported snapshot. It only takes
+    effect for superadmins and orgs with at least
+    ``EXPORT_PARALLEL_MIN_CONSENTS`` consents; otherwise one connection is used. Archived
+    (revoked) consents are merged in, so regenerated documents stay complete.
+    """
+    org_id = current_org.id
+    slices = _allowed_slices(slices, current_user, db, org_id)
+    stmt = build_export_query(org_id, subject_id, purpose, q, as_of)
+    snapshot = ExportSnapshot()
+
+    def generate():
+        output = StringIO()
+        csv.writer(output).writerow(CSV_HEADER)
+        yield output.getvalue()
+        archived = ArchivedExport(org_id, subject_id, purpose, q, as_of)
+        yield from snapshot.iter_rendered(stmt, _csv_chunk, slices, archived)
+
+    return StreamingResponse(
+        generate(),
         media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=consents.csv"},
+        headers={
+            "Content-Disposition": "attachment; filename=consents.csv",
+            **_snapshot_headers(snapshot, as_of),
+        },
+        # Releases the snapshot if the client leaves before streaming starts
+        background=BackgroundTask(snapshot.close),
     )
 
 
-@router.get("/export.html", response_class=HTMLResponse)
+@router.get("/export.html")
 def export_html(
     org_id: UUID = Query(...),
     subject_id: str | None = Query(None),
     purpose: str | None = Query(None),
     q: str | None = Query(None),
+    as_of: datetime | None = Query(None, description="Regenerate the export as of a previous snapshot timestamp"),
+    slices: int = Query(1, ge=1, le=32, description="Read the accepted_at range in up to N parallel slices"),
     current_org: Org = Depends(get_current_org),
-    _membership = Depends(require_role("viewer")),
+    current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    _membership = Depends(require_role("viewer")),
 ):
-    """Export consents as print-friendly HTML."""
-    query = db.query(Consent).filter(Consent.org_id == current_org.id)
-
-    if subject_id:
-        query = query.filter(Consent.subject_id == subject_id)
-    if purpose:
-        query = query.filter(Consent.purpose == purpose)
-    if q:
-        query = query.filter(
-            or_(
-                Consent.subject_id.ilike(f"%{q}%"),
-                Consent.purpose.ilike(f"%{q}%"),
-                Consent.text.ilike(f"%{q}%"),
-            )
-        )
-
-    consents = query.order_by(Consent.accepted_at.desc()).all()
-
-    html = """<!DOCTYPE html>
+    """Export consents as print-friendly HTML, streamed from a single snapshot."""
+    org_id = current_org.id
+    slices = _allowed_slices(slices, current_user, db, org_id)
+    stmt = build_export_query(org_id, subject_id, purpose, q, as_of)
+    snapshot = ExportSnapshot()
+
+    head = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <title>Consent Records - {org_name}</title>
     <style>
-        body { font-family: Arial, sans-serif; margin: 20px; }
-        table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
-        th { background-color: #f2f2f2; }
-        tr:nth-child(even) { background-color: #f9f9f9; }
-        @media print { body { margin: 0; } }
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+        th {{ background-color: #f2f2f2; }}
+        tr:nth-child(even) {{ background-color: #f9f9f9; }}
+        @media print {{ body {{ margin: 0; }} }}
     </style>
 </head>
 <body>
     <h1>Consent Records - {org_name}</h1>
     <p>Generated: {timestamp}</p>
+    <p>Snapshot: {snapshot_at}</p>
     <table>
         <thead>
             <tr>
@@ -130,25 +173,23 @@ def export_html(
 """.format(
         org_name=current_org.name,
         timestamp=datetime.now().isoformat(),
+        snapshot_at=(as_of or snapshot.snapshot_at).isoformat(),
     )
 
-    for consent in consents:
-        html += f"""
-            <tr>
-                <td>{consent.subject_id}</td>
-                <td>{consent.purpose}</td>
-                <td>{consent.text[:100]}...</td>
-                <td>{consent.accepted_at.isoformat() if consent.accepted_at else ""}</td>
-                <td>{consent.revoked_at.isoformat() if consent.revoked_at else ""}</td>
-            </tr>
-"""
-
-    html += """
+    def generate():
+        yield head
+        archived = ArchivedExport(org_id, subject_id, purpose, q, as_of)
+        yield from snapshot.iter_rendered(stmt, _html_chunk, slices, archived)
+        yield """
         </tbody>
     </table>
 </body>
 </html>
 """
 
-    return HTMLResponse(content=html)
-
+    return StreamingResponse(
+        generate(),
+        media_type="text/html",
+        headers=_snapshot_headers(snapshot, as_of),
+        background=BackgroundTask(snapshot.close),
+    )
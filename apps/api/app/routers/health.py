@@ -1,9 +1,12 @@
 """Health check router."""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.db import get_db
+from app.deps import get_current_user
+from app.services.metrics import metrics
+from app.services.scheduler import scheduler
 
 router = APIRouter()
 
@@ -24,3 +27,19 @@ def health_check(db: Session = Depends(get_db)):
         "version": "0.1.0",
         "database": db_status,
     }
+
+
+@router.get("/metrics")
+def get_metrics(current_user=Depends(get_current_user)):
+    """In-process metrics for this worker (counters, gauges, timings), superadmin only."""
+    if not current_user.is_superadmin:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return metrics.snapshot()
+
+
+@router.get("/jobs")
+def get_jobs(current_user=Depends(get_current_user)):
+    """Background jobs as seen by this worker (only the leader runs them), superadmin only."""
+    if not current_user.is_superadmin:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return {"leader": scheduler.is_leader, "jobs": scheduler.status()}
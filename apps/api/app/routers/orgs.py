@@ -1,14 +1,18 @@
 """Organization router."""
-import secrets
+from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
-from app.db import Org, OrgMember, OrgUser, User, get_db, Consent, AuditLog, DataRightRequest
-from app.deps import get_current_user, require_role
-from app.schemas import OrgCreate, OrgDetailOut, OrgOut, OrgUserCreate
-from app.services.audit_service import log_event
+from app.db import ApiKey, Org, OrgMember, OrgUser, User, get_db
+from app.deps import get_audit_context, get_current_user, require_role
+from app.schemas import ApiKeyCreate, ApiKeyCreated, ApiKeyOut, OrgCreate, OrgDetailOut, OrgOut, OrgUserCreate
+from app.services.api_keys import api_key_cache, create_api_key, revoke_api_key, rotate_api_key
+from app.services.audit_service import AuditContext, log_event
+from app.services.org_counters import get_counters
+from app.services.response_cache import dashboard_cache
 
 router = APIRouter(prefix="/orgs", tags=["Organizations"])
 
@@ -59,12 +63,13 @@ def create_org(
     org_data: OrgCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
-    """Create organization with auto-generated API key."""
-    api_key = secrets.token_hex(16)
-    org = Org(name=org_data.name, region=org_data.region, api_key=api_key)
+    """Create organization with auto-generated API key (returned only in this response)."""
+    org = Org(name=org_data.name, region=org_data.region)
     db.add(org)
     db.flush()  # Get org.id
+    _, api_key = create_api_key(db, org.id, name="default")
     
     # Only add creator as admin member if they are NOT a superadmin
     if not current_user.is_superadmin:
@@ -80,7 +85,7 @@ def create_org(
     # Log audit action
     log_event(
         db=db,
-        actor=current_user,
+        context=audit,
         action="created",
         entity_type="org",
         entity_id=org.id,
@@ -88,7 +93,7 @@ def create_org(
         metadata={"name": org.name, "region": org.region},
     )
 
-    return org
+    return OrgOut(id=org.id, name=org.name, region=org.region, api_key=api_key, created_at=org.created_at)
 
 
 @router.get("/{org_id}")
@@ -98,7 +103,15 @@ def get_org(
     db: Session = Depends(get_db),
 ):
     """Get organization details with users."""
-    if current_user.is_superadmin:
+    return dashboard_cache.get_or_compute(
+        ("org", org_id, current_user.is_superadmin),
+        org_id,
+        lambda: _load_org(org_id, current_user.is_superadmin, db),
+    )
+
+
+def _load_org(org_id: UUID, is_superadmin: bool, db: Session):
+    if is_superadmin:
         org = db.query(Org).filter(Org.id == org_id).first()
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found")
@@ -110,6 +123,8 @@ def get_org(
             .all()
         )
 
+        totals = get_counters(db, org.id)
+
         return {
             "id": str(org.id),
             "name": org.name,
@@ -118,9 +133,9 @@ def get_org(
             if hasattr(org, "created_at")
             else None,
             "users": [{"email": user.email, "role": org_user.role} for org_user, user in users],
-            "consents": db.query(Consent).filter(Consent.org_id == org.id).count(),
-            "api_logs": db.query(AuditLog).filter(AuditLog.org_id == org.id).count(),
-            "data_rights": db.query(DataRightRequest).filter(DataRightRequest.org_id == org.id).count(),
+            "consents": totals["consents"],
+            "api_logs": totals["audit_events"],
+            "data_rights": totals["dsars"],
         }
 
     org = db.query(Org).filter(Org.id == org_id).first()
@@ -128,12 +143,13 @@ def get_org(
         raise HTTPException(status_code=404, detail="Organization not found")
 
     members = db.query(OrgMember).filter(OrgMember.org_id == org_id).all()
+    prefixes = [api_key.prefix for api_key in _active_api_keys(db, org_id)]
 
     return OrgDetailOut(
         id=org.id,
         name=org.name,
         region=org.region,
-        api_key=org.api_key,
+        api_key_prefixes=prefixes,
         created_at=org.created_at,
         users=members,
     )
@@ -161,8 +177,7 @@ def get_org_details(
         .all()
     )
 
-    consents = db.query(Consent).filter(Consent.org_id == org_id).count()
-    dsars = db.query(DataRightRequest).filter(DataRightRequest.org_id == org_id).count()
+    totals = get_counters(db, org_id)
 
     return {
         "id": str(org.id),
@@ -172,8 +187,8 @@ def get_org_details(
         if hasattr(org, "created_at") and getattr(org, "created_at", None)
         else None,
         "users": [{"email": user.email, "role": org_user.role} for org_user, user in users],
-        "consent_count": consents,
-        "dsar_count": dsars,
+        "consent_count": totals["consents"],
+        "dsar_count": totals["dsars"],
     }
 
 
@@ -182,6 +197,7 @@ def delete_org(
     org_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Delete organization (cascades to users)."""
     org = db.query(Org).filter(Org.id == org_id).first()
@@ -191,7 +207,7 @@ def delete_org(
     # Log audit action before deletion
     log_event(
         db=db,
-        actor=current_user,
+        context=audit,
         action="deleted",
         entity_type="org",
         entity_id=org_id,
@@ -211,6 +227,7 @@ def add_user_to_org(
     current_user: User = Depends(get_current_user),
     _membership: OrgUser = Depends(require_role("admin")),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Add user to organization with role (admin only)."""
     org = db.query(Org).filter(Org.id == org_id).first()
@@ -244,7 +261,7 @@ def add_user_to_org(
 
     log_event(
         db=db,
-        actor=current_user,
+        context=audit,
         action="added_user",
         entity_type="org_user",
         entity_id=membership.id,
@@ -258,3 +275,100 @@ def add_user_to_org(
         "user_id": str(user_data.user_id),
         "role": user_data.role,
     }
+
+
+def _active_api_keys(db: Session, org_id: UUID) -> list[ApiKey]:
+    return (
+        db.query(ApiKey)
+        .filter(
+            ApiKey.org_id == org_id,
+            ApiKey.revoked_at.is_(None),
+            or_(ApiKey.expires_at.is_(None), ApiKey.expires_at > datetime.now(UTC)),
+        )
+        .order_by(ApiKey.created_at)
+        .all()
+    )
+
+
+def _check_path_org(membership, org_id: UUID):
+    """require_role checks the X-Org-ID / ?org_id org; it must be the one in the path."""
+    if membership.org_id != org_id:
+        raise HTTPException(status_code=403, detail="Organization in X-Org-ID does not match the path")
+
+
+@router.get("/{org_id}/api-keys", response_model=list[ApiKeyOut])
+def list_api_keys(
+    org_id: UUID = Path(...),
+    include_inactive: bool = False,
+    membership: OrgUser = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    """List the organization's API keys (prefixes and dates only, admin only)."""
+    _check_path_org(membership, org_id)
+    if not include_inactive:
+        return _active_api_keys(db, org_id)
+    return db.query(ApiKey).filter(ApiKey.org_id == org_id).order_by(ApiKey.created_at).all()
+
+
+@router.post("/{org_id}/api-keys", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+def create_org_api_key(
+    org_id: UUID = Path(...),
+    key_data: ApiKeyCreate = ApiKeyCreate(),
+    membership: OrgUser = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
+):
+    """
+    Issue a new API key (admin only). The key is only shown in this response.
+
+    For zero-downtime rotation the org's other active keys keep working for
+    ``expire_existing_after_hours`` (default 24); ``null`` leaves them active.
+    """
+    _check_path_org(membership, org_id)
+    if key_data.expire_existing_after_hours is None:
+        api_key, key = create_api_key(db, org_id, key_data.name)
+    else:
+        grace = timedelta(hours=key_data.expire_existing_after_hours)
+        api_key, key = rotate_api_key(db, org_id, grace, key_data.name)
+    db.commit()
+    db.refresh(api_key)
+    api_key_cache.forget_org(org_id)
+
+    log_event(
+        db=db,
+        context=audit,
+        action="api_key_created",
+        entity_type="api_key",
+        entity_id=api_key.id,
+        org_id=org_id,
+        metadata={"prefix": api_key.prefix, "expire_existing_after_hours": key_data.expire_existing_after_hours},
+    )
+    return ApiKeyCreated(**ApiKeyOut.model_validate(api_key).model_dump(), api_key=key)
+
+
+@router.delete("/{org_id}/api-keys/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_org_api_key(
+    org_id: UUID = Path(...),
+    key_id: UUID = Path(...),
+    membership: OrgUser = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
+):
+    """Revoke an API key immediately (admin only)."""
+    _check_path_org(membership, org_id)
+    api_key = revoke_api_key(db, org_id, key_id)
+    if not api_key:
+        raise HTTPException(status_code=404, detail="API key not found")
+    db.commit()
+    api_key_cache.forget_org(org_id)
+
+    log_event(
+        db=db,
+        context=audit,
+        action="api_key_revoked",
+        entity_type="api_key",
+        entity_id=api_key.id,
+        org_id=org_id,
+        metadata={"prefix": api_key.prefix},
+    )
+    return None
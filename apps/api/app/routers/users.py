@@ -5,8 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 from sqlalchemy.orm import Session
 
 from app.db import Org, OrgMember, get_db
+from app.deps import get_audit_context
 from app.schemas import OrgMemberCreate, OrgMemberOut
-from app.services.audit_service import log_event
+from app.services.audit_service import AuditContext, log_event
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -15,6 +16,7 @@ router = APIRouter(prefix="/users", tags=["Users"])
 def create_user(
     user_data: OrgMemberCreate,
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Create user linked to organization."""
     # Verify org exists
@@ -48,10 +50,9 @@ def create_user(
     db.refresh(user)
 
     # Log audit action
-    # For API key auth, we use the org as the "actor" context
     log_event(
         db=db,
-        actor=org,  # Use org as actor context for API key auth
+        context=audit,
         action="created",
         entity_type="org_member",
         entity_id=user.id,
@@ -88,6 +89,7 @@ def list_users(
 def delete_user(
     user_id: UUID = Path(...),
     db: Session = Depends(get_db),
+    audit: AuditContext = Depends(get_audit_context),
 ):
     """Remove user."""
     user = db.query(OrgMember).filter(OrgMember.id == user_id).first()
@@ -98,11 +100,9 @@ def delete_user(
         )
 
     # Log audit action before deletion
-    # For API key auth, we use the org as the "actor" context
-    org = db.query(Org).filter(Org.id == user.org_id).first()
     log_event(
         db=db,
-        actor=org if org else user,  # Use org as actor context for API key auth
+        context=audit,
         action="deleted",
         entity_type="org_member",
         entity_id=user_id,
@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Any, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 # Auth schemas
@@ -23,6 +23,13 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
 
 
+class StreamTicketOut(BaseModel):
+    """Short-lived ticket for opening the audit stream."""
+
+    ticket: str
+    expires_in: int
+
+
 # Org schemas
 class OrgCreate(BaseModel):
     """Organization creation schema."""
@@ -37,7 +44,7 @@ class OrgOut(BaseModel):
     id: UUID
     name: str
     region: str
-    api_key: str
+    api_key: Optional[str] = None  # Only returned when the org is created
     created_at: datetime
 
     class Config:
@@ -50,7 +57,7 @@ class OrgDetailOut(BaseModel):
     id: UUID
     name: str
     region: str
-    api_key: str
+    api_key_prefixes: list[str] = []  # Active keys; the keys themselves are only shown once
     created_at: datetime
     users: list["OrgMemberOut"]
 
@@ -65,6 +72,34 @@ class OrgUserCreate(BaseModel):
     role: str  # 'admin', 'editor', 'viewer'
 
 
+class ApiKeyCreate(BaseModel):
+    """New API key schema (rotation)."""
+
+    name: Optional[str] = Field(None, max_length=100)
+    # Existing active keys expire after this many hours (0 revokes them now, None keeps them)
+    expire_existing_after_hours: Optional[int] = Field(24, ge=0)
+
+
+class ApiKeyOut(BaseModel):
+    """API key metadata (never the key itself)."""
+
+    id: UUID
+    prefix: str
+    name: Optional[str] = None
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ApiKeyCreated(ApiKeyOut):
+    """Newly created API key; ``api_key`` is shown only in this response."""
+
+    api_key: str
+
+
 # OrgMember schemas
 class OrgMemberCreate(BaseModel):
     """Organization member creation schema."""
@@ -1,5 +1,6 @@
 """Security utilities for password hashing and JWT tokens."""
 import hashlib
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -7,13 +8,21 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.config import settings
+from app.security.token_cache import token_cache
+from app.services.metrics import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Bounds for the calibrated bcrypt cost; each step doubles the hash time
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
 JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 30
 # Extended expiration for better UX (7 days)
 JWT_ACCESS_TOKEN_EXPIRE_DAYS = 7
+# Purpose claim of the tickets that only open an audit stream (see create_stream_ticket)
+STREAM_TICKET_PURPOSE = "audit_stream"
 
 
 def hash_password(password: str) -> str:
@@ -30,6 +39,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash is weaker than the current policy (rehash it on the next login)."""
+    return pwd_context.needs_update(hashed_password)
+
+
+def load_password_policy(policy: str):
+    """Replace the hashing policy with one from ``pwd_context.to_string()`` (used by pool workers)."""
+    pwd_context.load(policy)
+
+
+def choose_bcrypt_rounds(base_ms: float, target_ms: float) -> int:
+    """Highest cost whose hash takes at most ``target_ms``, given the time at ``BCRYPT_MIN_ROUNDS``."""
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - BCRYPT_MIN_ROUNDS) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def calibrate_password_hashing(samples: int = 3) -> int:
+    """
+    Pick the bcrypt cost for new hashes on this machine.
+
+    Times a few hashes at ``BCRYPT_MIN_ROUNDS`` and extrapolates to the cost
+    closest to (not above) PASSWORD_HASH_TARGET_MS, unless PASSWORD_HASH_ROUNDS
+    pins it. The calibrated cost only applies to new hashes: whether a stored
+    hash is rehashed on login is decided by the pinned PASSWORD_HASH_MIN_ROUNDS,
+    so workers that calibrate differently never rehash each other's hashes.
+    """
+    floor = settings.password_hash_min_rounds
+    rounds = settings.password_hash_rounds
+    if rounds is None:
+        handler = pwd_context.handler("bcrypt").using(rounds=BCRYPT_MIN_ROUNDS)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            handler.hash("calibration")
+            timings.append(time.perf_counter() - start)
+        base_ms = min(timings) * 1000
+        rounds = choose_bcrypt_rounds(base_ms, settings.password_hash_target_ms)
+        estimate = f"~{base_ms * 2 ** (rounds - BCRYPT_MIN_ROUNDS):.0f} ms per hash"
+    else:
+        estimate = "pinned"
+    rounds = max(rounds, floor)
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=floor)
+    metrics.gauge("password.bcrypt_rounds", rounds)
+    print(f"✅ bcrypt cost {rounds} for new hashes, rehash below {floor} ({estimate})")
+    return rounds
+
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -45,10 +103,33 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
     return encoded_jwt
 
 
+def create_stream_ticket(user_id: Any, session_expires_at: int) -> str:
+    """
+    Create a short-lived ticket that can only open an audit stream.
+
+    EventSource cannot send headers, so the ticket travels in the query
+    string instead of the access token; ``session_expires_at`` (the access
+    token's ``exp``) bounds how long the opened stream may stay up.
+    """
+    return create_access_token(
+        {"sub": str(user_id), "purpose": STREAM_TICKET_PURPOSE, "session_exp": session_expires_at},
+        expires_delta=timedelta(seconds=settings.audit_stream_ticket_seconds),
+    )
+
+
+def _decode_token(token: str) -> dict[str, Any]:
+    """Decode and verify a JWT, reusing the result for tokens seen before (see token_cache)."""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, settings.jwt_key, algorithms=[JWT_ALGORITHM])
+        token_cache.put(token, payload)
+    return payload
+
+
 def decode_token_safely(token: str) -> dict[str, Any] | None:
     """Safely decode a JWT token, returning None if invalid or expired."""
     try:
-        payload = jwt.decode(token, settings.jwt_key, algorithms=[JWT_ALGORITHM])
+        payload = _decode_token(token)
         return payload
     except jwt.ExpiredSignatureError:
         # Token expired - return None instead of raising
@@ -61,7 +142,7 @@ def decode_token_safely(token: str) -> dict[str, Any] | None:
 def verify_token(token: str) -> dict[str, Any]:
     """Verify and decode a JWT token. Raises exception on error."""
     try:
-        payload = jwt.decode(token, settings.jwt_key, algorithms=[JWT_ALGORITHM])
+        payload = _decode_token(token)
         return payload
     except jwt.ExpiredSignatureError:
         raise ValueError("JWT token has expired")
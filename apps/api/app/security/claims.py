@@ -0,0 +1,108 @@
+"""Role claims in access tokens.
+
+With ``JWT_ROLE_CLAIMS`` enabled, login puts the user's memberships (org id
+and role), superadmin flag and ``membership_version`` in the token. Requests
+carrying such a token are authorized from the claims alone: the user is a
+``TokenUser`` instead of a ``users`` row, and membership lookups in
+``security.roles`` and ``deps`` read the claims instead of ``org_users``.
+
+The only database access left is the version check. ``users.membership_version``
+is bumped by triggers whenever the user's memberships, roles, superadmin flag
+or email change; a token whose version no longer matches falls back to the
+database path, so revoked access stops working. Versions are cached per
+worker for ``MEMBERSHIP_VERSION_CACHE_SECONDS``, which bounds how long a
+revoked membership can still be used.
+"""
+import time
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import OrgUser, User
+from app.services.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+# Cached versions per worker (least recently used are dropped beyond this)
+MEMBERSHIP_CACHE_MAX_ENTRIES = 10000
+
+# Distinguishes "not cached" from a cached None (user deleted)
+_MISSING = object()
+
+
+def role_claims(user: User, memberships: list[OrgUser], membership_version: int) -> dict[str, Any]:
+    """Claims for a token authorizing ``user`` with these memberships (read after ``membership_version``)."""
+    return {
+        "is_superadmin": bool(user.is_superadmin),
+        "orgs": [[str(m.org_id), m.role] for m in memberships],
+        "mv": membership_version,
+    }
+
+
+class TokenMembership:
+    """Membership taken from token claims, standing in for an ``OrgUser`` row."""
+
+    def __init__(self, org_id: UUID, user_id: UUID, role: str):
+        self.org_id = org_id
+        self.user_id = user_id
+        self.role = role
+
+
+class TokenUser:
+    """Authenticated user taken from token claims, standing in for a ``User`` row."""
+
+    def __init__(self, id: UUID, email: str | None, is_superadmin: bool, memberships: list[TokenMembership]):
+        self.id = id
+        self.email = email
+        self.is_superadmin = is_superadmin
+        self.memberships = memberships
+
+    @classmethod
+    def from_claims(cls, user_id: UUID, payload: dict) -> "TokenUser":
+        memberships = [TokenMembership(UUID(org_id), user_id, role) for org_id, role in payload.get("orgs", [])]
+        return cls(user_id, payload.get("email"), bool(payload.get("is_superadmin")), memberships)
+
+    def membership(self, org_id: UUID | None = None) -> TokenMembership | None:
+        """Membership in ``org_id``, or the first one when no org is given."""
+        for membership in self.memberships:
+            if org_id is None or membership.org_id == org_id:
+                return membership
+        return None
+
+
+class MembershipVersions:
+    """Per-worker TTL cache of ``users.membership_version``."""
+
+    def __init__(self):
+        self._entries = TTLCache(MEMBERSHIP_CACHE_MAX_ENTRIES)
+
+    def get(self, db: Session, user_id: UUID) -> int | None:
+        """Current version for a user, or None if the user no longer exists."""
+        version = self._entries.get(user_id, _MISSING)
+        if version is not _MISSING:
+            metrics.incr("auth.membership_version.hits")
+            return version
+        metrics.incr("auth.membership_version.misses")
+        version = db.execute(select(User.membership_version).where(User.id == user_id)).scalar()
+        self._entries.set(user_id, version, time.monotonic() + settings.membership_version_cache_seconds)
+        return version
+
+    def clear(self):
+        self._entries.clear()
+
+
+membership_versions = MembershipVersions()
+
+
+def user_from_claims(db: Session, user_id: UUID, payload: dict) -> TokenUser | None:
+    """
+    The token's user built from its role claims, or None when the token has
+    none or they are outdated (callers then load the user from the database).
+    """
+    if "mv" not in payload:
+        return None
+    if membership_versions.get(db, user_id) != payload["mv"]:
+        return None
+    return TokenUser.from_claims(user_id, payload)
@@ -0,0 +1,134 @@
+"""Process pool for password hashing and verification.
+
+A bcrypt check costs ~250 ms of CPU. Run inline, every login holds one of the
+worker's threadpool slots for that long, so a burst of logins starves every
+other sync endpoint. Instead, hashes run in a small pool of processes, and
+callers await the result without occupying a thread. The number of queued
+and running operations is capped; past the cap callers get
+``PasswordPoolFull`` immediately (the login route answers 429) rather than
+waiting behind a queue that only grows.
+
+With ``PASSWORD_POOL_WORKERS=0`` hashes run in the threadpool as before, but
+still under the cap. Scripts keep calling ``hash_password`` directly.
+
+Workers load the hashing policy (the calibrated bcrypt cost) as it is when
+the pool starts. Hash time is recorded as ``password.<function>`` and time
+including the queue wait as ``password.<function>.total``.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.security import hash_password, load_password_policy, pwd_context, verify_password
+from app.services.metrics import metrics
+
+
+def _timed(func: Callable, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordPoolFull(Exception):
+    """Too many password operations are queued; retry later."""
+
+
+class PasswordPool:
+    """Bounded process pool for ``hash_password`` / ``verify_password``."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the API process runs threads (scheduler, listeners)
+        return ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_password_policy,
+            initargs=(pwd_context.to_string(),),
+        )
+
+    def start(self):
+        """Start the worker processes (idempotent; no-op with zero workers)."""
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                self._executor = self._new_executor()
+
+    def stop(self):
+        """Stop the worker processes, cancelling queued operations."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.incr("password_pool.rejected")
+                raise PasswordPoolFull(f"{self._pending} password operations already queued")
+            self._pending += 1
+            metrics.gauge("password_pool.pending", self._pending)
+
+    def _release(self, _future: Future | None = None):
+        with self._lock:
+            self._pending -= 1
+            metrics.gauge("password_pool.pending", self._pending)
+
+    def _submit(self, func: Callable, *args) -> Future | None:
+        with self._lock:
+            executor = self._executor
+        if executor is None:
+            return None
+        try:
+            return executor.submit(func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool once
+            print("⚠️  Password pool broken, restarting it")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = self._new_executor()
+                executor = self._executor
+            return executor.submit(func, *args)
+
+    async def run(self, func: Callable, *args):
+        """Run ``func(*args)`` in the pool; raises PasswordPoolFull when saturated."""
+        self._reserve()
+        start = time.perf_counter()
+        try:
+            future = self._submit(_timed, func, *args)
+        except BaseException:
+            self._release()
+            raise
+        if future is None:
+            try:
+                result, seconds = await run_in_threadpool(_timed, func, *args)
+            finally:
+                self._release()
+        else:
+            # Released when the work finishes, even if the caller stops waiting
+            future.add_done_callback(self._release)
+            result, seconds = await asyncio.wrap_future(future)
+        name = getattr(func, "__name__", "call")
+        metrics.observe(f"password.{name}", seconds)
+        metrics.observe(f"password.{name}.total", time.perf_counter() - start)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, password, hashed_password)
+
+
+password_pool = PasswordPool(settings.password_pool_workers, settings.password_pool_max_pending)
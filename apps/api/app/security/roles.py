@@ -1,7 +1,10 @@
 """Role-based access control helpers."""
+from uuid import UUID
+
 from sqlalchemy.orm import Session
 
 from app.db import OrgUser, User
+from app.security.claims import TokenMembership, TokenUser
 from app.security.permissions import can_role_write, can_role_view_sensitive
 
 
@@ -21,15 +24,24 @@ def get_user_org_id(user: User, db: Session) -> str | None:
     return str(org_user.org_id)
 
 
-def get_user_org_membership(user: User, db: Session) -> OrgUser | None:
+def get_user_org_membership(
+    user: User | TokenUser, db: Session, org_id: UUID | None = None
+) -> OrgUser | TokenMembership | None:
     """
-    Get the user's OrgUser membership record.
+    Get the user's OrgUser membership record (in ``org_id`` if given).
     Returns None if user has no org memberships.
+    Users authenticated by role claims are answered from the token.
     """
     if user.is_superadmin:
         return None
-    
-    return db.query(OrgUser).filter(OrgUser.user_id == user.id).first()
+
+    if isinstance(user, TokenUser):
+        return user.membership(org_id)
+
+    query = db.query(OrgUser).filter(OrgUser.user_id == user.id)
+    if org_id is not None:
+        query = query.filter(OrgUser.org_id == org_id)
+    return query.first()
 
 
 def can_write(user: User, db: Session) -> bool:
@@ -0,0 +1,49 @@
+"""Cache of verified access tokens.
+
+The dashboard sends the same token with every request for its whole 7-day
+lifetime, and each request would otherwise redo the HMAC check, JSON parse
+and claim validation. Verified payloads are kept in a bounded per-worker LRU
+keyed by the SHA-256 of the token (the token itself is not kept) until the
+token's ``exp``. Tokens that fail verification are never cached.
+"""
+import hashlib
+import time
+from typing import Any
+
+from app.config import settings
+from app.services.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+
+class VerifiedTokenCache:
+    """LRU of token digest -> payload, each kept until the token's ``exp``."""
+
+    def __init__(self, max_entries: int):
+        self._entries = TTLCache(max_entries, clock=time.time)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        """Cached payload of a still-valid token, or None."""
+        if self._entries.max_entries <= 0:
+            return None
+        payload = self._entries.get(self._key(token))
+        if payload is None:
+            metrics.incr("auth.token_cache.misses")
+            return None
+        metrics.incr("auth.token_cache.hits")
+        return dict(payload)
+
+    def put(self, token: str, payload: dict[str, Any]):
+        """Cache a verified payload until its ``exp`` (tokens without one are not cached)."""
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            self._entries.set(self._key(token), dict(payload), exp)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(settings.token_cache_max_entries)
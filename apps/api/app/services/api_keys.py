@@ -0,0 +1,134 @@
+"""Hashed ingestion API keys.
+
+Keys are shown once, when created, and stored as their first
+``API_KEY_PREFIX_LENGTH`` characters plus an HMAC-SHA256 of the whole key
+(keyed by ``API_KEY_SECRET``). A request's key is looked up by its indexed
+prefix and the candidates' hashes are compared in constant time, so no
+plaintext key is stored and comparisons leak nothing through timing.
+
+Verified keys are cached per worker by their hash for
+``API_KEY_CACHE_SECONDS``. Revoking or rotating keys clears the org from this
+worker's cache; other workers stop accepting a revoked key once their entry
+expires.
+
+An org can hold several active keys: ``rotate_api_key`` issues a new one and
+lets the current ones expire after a grace period, so clients can switch over
+without downtime.
+"""
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import ApiKey, Org
+from app.services.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+API_KEY_PREFIX_LENGTH = 12
+
+# Verified keys cached per worker (least recently used are dropped beyond this)
+API_KEY_CACHE_MAX_ENTRIES = 10000
+
+
+def generate_api_key() -> str:
+    return secrets.token_hex(24)
+
+
+def api_key_prefix(key: str) -> str:
+    return key[:API_KEY_PREFIX_LENGTH]
+
+
+def hash_api_key(key: str) -> str:
+    """Keyed hash stored for (and compared against) an API key."""
+    return hmac.new(settings.api_key_hmac_key.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
+class ApiKeyCache:
+    """Per-worker TTL cache of key hash -> org id, never past the key's own expiry."""
+
+    def __init__(self):
+        self._entries = TTLCache(API_KEY_CACHE_MAX_ENTRIES)
+
+    def get(self, key_hash: str) -> UUID | None:
+        return self._entries.get(key_hash)
+
+    def put(self, key_hash: str, org_id: UUID, expires_at: datetime | None):
+        ttl = settings.api_key_cache_seconds
+        if expires_at:
+            ttl = min(ttl, (expires_at - datetime.now(UTC)).total_seconds())
+        self._entries.set(key_hash, org_id, time.monotonic() + ttl)
+
+    def forget_org(self, org_id: UUID):
+        """Drop every cached key of an org (after its keys were revoked or rotated)."""
+        self._entries.discard(lambda key_hash, cached_org_id: cached_org_id == org_id)
+
+    def clear(self):
+        self._entries.clear()
+
+
+api_key_cache = ApiKeyCache()
+
+
+def verify_api_key(db: Session, key: str | None) -> UUID | None:
+    """Org id an API key belongs to, or None if it is unknown, expired or revoked."""
+    if not key:
+        return None
+    key_hash = hash_api_key(key)
+    org_id = api_key_cache.get(key_hash)
+    if org_id is not None:
+        metrics.incr("api_keys.cache.hits")
+        return org_id
+    metrics.incr("api_keys.cache.misses")
+
+    now = datetime.now(UTC)
+    candidates = db.execute(
+        select(ApiKey.org_id, ApiKey.key_hash, ApiKey.expires_at).where(
+            ApiKey.prefix == api_key_prefix(key),
+            ApiKey.revoked_at.is_(None),
+            or_(ApiKey.expires_at.is_(None), ApiKey.expires_at > now),
+        )
+    ).all()
+    for candidate_org_id, candidate_hash, expires_at in candidates:
+        if hmac.compare_digest(candidate_hash, key_hash):
+            api_key_cache.put(key_hash, candidate_org_id, expires_at)
+            return candidate_org_id
+    return None
+
+
+def org_for_api_key(db: Session, key: str | None) -> Org | None:
+    """Organization owning an active API key, or None."""
+    org_id = verify_api_key(db, key)
+    return db.get(Org, org_id) if org_id else None
+
+
+def create_api_key(db: Session, org_id: UUID, name: str | None = None) -> tuple[ApiKey, str]:
+    """Add a key to an org; returns the row and the plaintext key (not stored anywhere)."""
+    key = generate_api_key()
+    api_key = ApiKey(org_id=org_id, prefix=api_key_prefix(key), key_hash=hash_api_key(key), name=name)
+    db.add(api_key)
+    return api_key, key
+
+
+def rotate_api_key(db: Session, org_id: UUID, grace: timedelta, name: str | None = None) -> tuple[ApiKey, str]:
+    """Issue a new key and let the org's other active keys expire after ``grace``."""
+    expires_at = datetime.now(UTC) + grace
+    db.query(ApiKey).filter(
+        ApiKey.org_id == org_id,
+        ApiKey.revoked_at.is_(None),
+        or_(ApiKey.expires_at.is_(None), ApiKey.expires_at > expires_at),
+    ).update({ApiKey.expires_at: expires_at}, synchronize_session=False)
+    return create_api_key(db, org_id, name)
+
+
+def revoke_api_key(db: Session, org_id: UUID, key_id: UUID) -> ApiKey | None:
+    """Revoke one of an org's keys immediately; None if the org has no such key."""
+    api_key = db.query(ApiKey).filter(ApiKey.id == key_id, ApiKey.org_id == org_id).first()
+    if api_key and api_key.revoked_at is None:
+        api_key.revoked_at = datetime.now(UTC)
+    return api_key
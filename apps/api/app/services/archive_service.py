@@ -0,0 +1,461 @@
+"""Cold archive for old audit logs and revoked consents.
+
+Rows older than ``ARCHIVE_AFTER_DAYS`` are moved out of Postgres into one
+compressed, columnar file per org, kind and month::
+
+    {ARCHIVE_DIR}/audit_logs/{org_id}/2024-03.cva
+    {ARCHIVE_DIR}/consents/{org_id}/2024-03.cva
+    {ARCHIVE_DIR}/manifest.json
+
+File layout: ``CVA1`` magic, a 4-byte big-endian header length, a JSON header
+(row count, time range and the offset/length of every column block), then one
+zlib-compressed JSON array per column. Rows are stored newest first.
+
+Readers memory-map the file and only decompress the blocks they need: the
+timestamp column is decoded first to locate matching rows, and the remaining
+columns are only decoded when the file has matches.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterator
+from uuid import UUID
+
+from sqlalchemy import func, select, text, tuple_
+
+from app.config import settings
+from app.db import AuditLog, Consent, engine
+from app.services.response_cache import dashboard_cache
+
+MAGIC = b"CVA1"
+HEADER_LEN = struct.Struct(">I")
+
+# Column codecs per archived kind; the first column listed is the time column
+ARCHIVE_KINDS: dict[str, dict] = {
+    "audit_logs": {
+        "table": AuditLog.__table__,
+        "time_column": "created_at",
+        "columns": {
+            "created_at": "datetime",
+            "id": "uuid",
+            "org_id": "uuid",
+            "user_email": "str",
+            "action": "str",
+            "entity_type": "str",
+            "entity_id": "uuid",
+            "metadata_json": "json",
+            "chain_seq": "int",
+            "prev_hash": "str",
+            "row_hash": "str",
+            "sensitivity": "str",
+        },
+    },
+    "consents": {
+        "table": Consent.__table__,
+        "time_column": "accepted_at",
+        "columns": {
+            "accepted_at": "datetime",
+            "id": "uuid",
+            "org_id": "uuid",
+            "subject_id": "str",
+            "subject_email": "str",
+            "purpose": "str",
+            "text": "str",
+            "version_hash": "str",
+            "ip": "str",
+            "user_agent": "str",
+            "revoked_at": "datetime",
+            "metadata_json": "json",
+        },
+    },
+}
+
+
+def _encode(value, codec: str):
+    if value is None:
+        return None
+    if codec == "datetime":
+        return value.astimezone(UTC).isoformat()
+    if codec in ("uuid", "str"):
+        return str(value)
+    return value
+
+
+def _decode(value, codec: str):
+    if value is None:
+        return None
+    if codec == "datetime":
+        return datetime.fromisoformat(value)
+    if codec == "uuid":
+        return UUID(value)
+    return value
+
+
+def write_archive_file(path: Path, kind: str, org_id: UUID, month: str, rows: list[dict]):
+    """Write rows as a columnar archive file (atomically, fsynced)."""
+    spec = ARCHIVE_KINDS[kind]
+    time_column = spec["time_column"]
+    rows = sorted(rows, key=lambda row: (row[time_column], str(row["id"])), reverse=True)
+
+    blocks, columns, offset = [], {}, 0
+    for name, codec in spec["columns"].items():
+        values = [_encode(row.get(name), codec) for row in rows]
+        block = zlib.compress(json.dumps(values, separators=(",", ":"), default=str).encode(), 6)
+        columns[name] = {"offset": offset, "length": len(block)}
+        blocks.append(block)
+        offset += len(block)
+
+    header = json.dumps({
+        "kind": kind,
+        "org_id": str(org_id),
+        "month": month,
+        "rows": len(rows),
+        "min_ts": _encode(rows[-1][time_column], "datetime") if rows else None,
+        "max_ts": _encode(rows[0][time_column], "datetime") if rows else None,
+        "columns": columns,
+    }).encode()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + HEADER_LEN.pack(len(header)) + header)
+            for block in blocks:
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ArchiveFile:
+    """Memory-mapped archive file that decodes column blocks on demand."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        if self._mm[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"Not an archive file: {path}")
+        (length,) = HEADER_LEN.unpack(self._mm[4:8])
+        self.header = json.loads(self._mm[8:8 + length])
+        self._data_start = 8 + length
+        self.spec = ARCHIVE_KINDS[self.header["kind"]]
+
+    def column(self, name: str) -> list:
+        """Decode a single column by range-reading its compressed block."""
+        codec = self.spec["columns"][name]
+        block = self.header["columns"].get(name)
+        if block is None:
+            return [None] * self.header["rows"]
+        start = self._data_start + block["offset"]
+        with memoryview(self._mm)[start:start + block["length"]] as view:
+            values = json.loads(zlib.decompress(view))
+        return [_decode(value, codec) for value in values]
+
+    def rows(self, indexes: list[int] | None = None) -> list[dict]:
+        """Materialize rows (all of them, or only ``indexes``) from their columns."""
+        names = list(self.spec["columns"])
+        data = {name: self.column(name) for name in names}
+        indexes = range(self.header["rows"]) if indexes is None else indexes
+        return [{name: data[name][i] for name in names} for i in indexes]
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ArchiveStore:
+    """Archive directory with its manifest of files per org, kind and month."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+
+    @contextmanager
+    def locked(self):
+        """Exclusive lock serializing archive writers across processes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {"version": 1, "files": []}
+        return json.loads(self.manifest_path.read_text())
+
+    def _save_manifest(self, manifest: dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def entries(self, kind: str, org_id: UUID | None = None) -> list[dict]:
+        """Manifest entries for a kind, optionally restricted to one org."""
+        return [
+            entry for entry in self.manifest()["files"]
+            if entry["kind"] == kind and (org_id is None or entry["org_id"] == str(org_id))
+        ]
+
+    def archived_until(self, kind: str, org_id: UUID | None = None) -> datetime | None:
+        """Newest archived timestamp for a kind (and org), or None if nothing is archived."""
+        stamps = [entry["max_ts"] for entry in self.entries(kind, org_id) if entry["max_ts"]]
+        return datetime.fromisoformat(max(stamps)) if stamps else None
+
+    def bounds(self, kind: str, org_id: UUID | None = None) -> tuple[datetime | None, datetime | None]:
+        """Oldest and newest archived timestamps for a kind (and org), read from the manifest."""
+        entries = [entry for entry in self.entries(kind, org_id) if entry["rows"]]
+        if not entries:
+            return None, None
+        return (
+            datetime.fromisoformat(min(entry["min_ts"] for entry in entries)),
+            datetime.fromisoformat(max(entry["max_ts"] for entry in entries)),
+        )
+
+    def append(self, kind: str, org_id: UUID, month: str, rows: list[dict]):
+        """Add rows to the org's month file, merging with rows archived earlier (by id)."""
+        relative = Path(kind) / str(org_id) / f"{month}.cva"
+        path = self.root / relative
+        with self.locked():
+            merged = {}
+            if path.exists():
+                with ArchiveFile(path) as existing:
+                    merged = {row["id"]: row for row in existing.rows()}
+            merged.update({row["id"]: row for row in rows})
+            write_archive_file(path, kind, org_id, month, list(merged.values()))
+
+            with ArchiveFile(path) as written:
+                header = written.header
+            manifest = self.manifest()
+            manifest["files"] = [entry for entry in manifest["files"] if entry["path"] != str(relative)]
+            manifest["files"].append({
+                "kind": kind,
+                "org_id": str(org_id),
+                "month": month,
+                "path": str(relative),
+                "rows": header["rows"],
+                "min_ts": header["min_ts"],
+                "max_ts": header["max_ts"],
+                "updated_at": datetime.now(UTC).isoformat(),
+            })
+            self._save_manifest(manifest)
+
+    def query(
+        self,
+        kind: str,
+        org_id: UUID | None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        match: Callable[[dict], bool] | None = None,
+        before: tuple[datetime, UUID] | None = None,
+        limit: int | None = 100,
+    ) -> list[dict]:
+        """
+        Read archived rows newest first within ``[since, until)``.
+
+        Files outside the range are skipped using the manifest; within a file
+        only the time column is decoded until matching rows are found.
+        ``before`` is a keyset position (time, id) rows must sort below;
+        ``limit=None`` returns every match.
+        """
+        time_column = ARCHIVE_KINDS[kind]["time_column"]
+        entries = sorted(self.entries(kind, org_id), key=lambda entry: entry["max_ts"] or "", reverse=True)
+
+        results: list[dict] = []
+        for entry in entries:
+            if not self._overlaps(entry, since, until):
+                continue
+            if before and datetime.fromisoformat(entry["min_ts"]) > before[0]:
+                continue
+            # Files are visited newest first but their ranges may overlap, so
+            # stop only once a full page is older than everything left.
+            full = limit is not None and len(results) >= limit
+            if full and datetime.fromisoformat(entry["max_ts"]) < results[-1][time_column]:
+                break
+
+            results.extend(self._read_entry(entry, time_column, since, until, match, before))
+            results.sort(key=lambda row: (row[time_column], row["id"]), reverse=True)
+            if limit is not None:
+                del results[limit:]
+        return results
+
+    def iter_rows(
+        self,
+        kind: str,
+        org_id: UUID | None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        match: Callable[[dict], bool] | None = None,
+    ) -> Iterator[dict]:
+        """
+        Yield archived rows newest first within ``[since, until)`` without loading them all.
+
+        A file is only decoded once the stream reaches its ``max_ts``, so just
+        the files overlapping the current position are held in memory.
+        """
+        time_column = ARCHIVE_KINDS[kind]["time_column"]
+        order = lambda row: (row[time_column], row["id"])
+        pending = deque(sorted(
+            (entry for entry in self.entries(kind, org_id) if self._overlaps(entry, since, until)),
+            key=lambda entry: entry["max_ts"],
+            reverse=True,
+        ))
+        heads: list[list] = []  # [current row, rest of its file]
+        while True:
+            newest = max(heads, key=lambda head: order(head[0]), default=None)
+            if pending and (newest is None or datetime.fromisoformat(pending[0]["max_ts"]) >= newest[0][time_column]):
+                rows = iter(self._read_entry(pending.popleft(), time_column, since, until, match))
+                if (row := next(rows, None)) is not None:
+                    heads.append([row, rows])
+                continue
+            if newest is None:
+                return
+            yield newest[0]
+            if (row := next(newest[1], None)) is None:
+                heads.remove(newest)
+            else:
+                newest[0] = row
+
+    @staticmethod
+    def _overlaps(entry: dict, since: datetime | None, until: datetime | None) -> bool:
+        """Whether a manifest entry has rows that may fall within ``[since, until)``."""
+        if not entry["rows"]:
+            return False
+        if since and datetime.fromisoformat(entry["max_ts"]) < since:
+            return False
+        return not (until and datetime.fromisoformat(entry["min_ts"]) >= until)
+
+    def _read_entry(
+        self,
+        entry: dict,
+        time_column: str,
+        since: datetime | None,
+        until: datetime | None,
+        match: Callable[[dict], bool] | None,
+        before: tuple[datetime, UUID] | None = None,
+    ) -> list[dict]:
+        """Matching rows of one archive file, newest first; only the time column is decoded up front."""
+        with ArchiveFile(self.root / entry["path"]) as archive:
+            times = archive.column(time_column)
+            candidates = [
+                i for i, ts in enumerate(times)
+                if (not since or ts >= since) and (not until or ts < until) and (not before or ts <= before[0])
+            ]
+            if not candidates:
+                return []
+            rows = [
+                row for row in archive.rows(candidates)
+                if not (before and (row[time_column], row["id"]) >= before) and not (match and not match(row))
+            ]
+        return sorted(rows, key=lambda row: (row[time_column], row["id"]), reverse=True)
+
+    def find(self, kind: str, org_id: UUID, row_id: UUID) -> dict | None:
+        """The archived row with this id, or None; only id columns are decoded until it is found."""
+        for entry in self.entries(kind, org_id):
+            if not entry["rows"]:
+                continue
+            with ArchiveFile(self.root / entry["path"]) as archive:
+                ids = archive.column("id")
+                if row_id in ids:
+                    return archive.rows([ids.index(row_id)])[0]
+        return None
+
+
+archive_store = ArchiveStore(settings.archive_dir)
+
+
+def _archive_table(kind: str, where, guard=None) -> int:
+    """Move matching rows of ``kind`` into the archive, one (org, month) at a time."""
+    spec = ARCHIVE_KINDS[kind]
+    table = spec["table"]
+    time_col = table.c[spec["time_column"]]
+    month_expr = func.date_trunc("month", func.timezone("UTC", time_col))
+    moved = 0
+
+    with engine.connect() as conn:
+        groups = conn.execute(
+            select(table.c.org_id, month_expr.label("month")).where(where).group_by(table.c.org_id, month_expr)
+        ).all()
+
+    for org_id, month in groups:
+        month_start = datetime(month.year, month.month, 1, tzinfo=UTC)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        conditions = [where, table.c.org_id == org_id, time_col >= month_start, time_col < month_end]
+        if guard is not None:
+            conditions.append(guard(org_id))
+        with engine.begin() as conn:
+            # Rows move without changing org counts, but the org's version is
+            # bumped so ETags and cached dashboard views stop matching. Holding
+            # the counter row keeps a concurrent reconcile from counting them twice.
+            conn.execute(
+                text("UPDATE org_counters SET version = version + 1, updated_at = now() WHERE org_id = :org_id"),
+                {"org_id": org_id},
+            )
+            dashboard_cache.invalidate_on_commit(conn, [org_id])
+            rows = [dict(row) for row in conn.execute(select(table).where(*conditions)).mappings()]
+            if rows:
+                # The file is fsynced before the rows are deleted; if the delete
+                # fails, the next run merges the same rows again by id.
+                archive_store.append(kind, org_id, month_start.strftime("%Y-%m"), rows)
+                keys = [(row["id"], row[spec["time_column"]]) for row in rows]
+                for i in range(0, len(keys), 1000):
+                    conn.execute(
+                        table.delete().where(tuple_(table.c.id, time_col).in_(keys[i:i + 1000]))
+                    )
+                moved += len(rows)
+        dashboard_cache.invalidate_committed()
+    return moved
+
+
+def run_archive(older_than_days: int | None = None) -> dict:
+    """
+    Archive audit logs and revoked consents older than the configured age.
+
+    Audit rows are only archived up to each org's last verified chain
+    checkpoint, so incremental verification never needs archived rows.
+    """
+    older_than_days = settings.archive_after_days if older_than_days is None else older_than_days
+    if older_than_days is None:
+        return {"audit_logs": 0, "consents": 0}
+    cutoff = datetime.now(UTC) - timedelta(days=older_than_days)
+
+    def checkpointed(org_id):
+        last_checkpoint = text(
+            "COALESCE((SELECT max(chain_seq) FROM audit_checkpoints WHERE org_id = :org_id), 0)"
+        ).bindparams(org_id=org_id)
+        return (AuditLog.chain_seq.is_(None)) | (AuditLog.chain_seq <= last_checkpoint)
+
+    return {
+        "audit_logs": _archive_table("audit_logs", AuditLog.created_at < cutoff, checkpointed),
+        "consents": _archive_table(
+            "consents",
+            (Consent.revoked_at.isnot(None)) & (Consent.revoked_at < cutoff) & (Consent.accepted_at < cutoff),
+        ),
+    }
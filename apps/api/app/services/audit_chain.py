@@ -0,0 +1,206 @@
+"""Per-organization hash chain over audit logs.
+
+Every audit row stores ``row_hash = sha256(prev_hash + canonical row content)``
+together with its position (``chain_seq``) in its org's chain. The head of
+each chain lives in ``audit_chain_heads`` and is locked with ``FOR UPDATE``
+while rows are appended, so writers for the same org are ordered while writers
+for different orgs never wait on each other.
+
+Verification is incremental: an HMAC-signed checkpoint records the last
+verified (seq, hash) of a chain, and later verifications only re-hash rows
+appended after it.
+"""
+import hashlib
+import hmac
+import json
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.db import AuditChainHead, AuditCheckpoint, AuditLog, engine
+
+GENESIS_HASH = "0" * 64
+
+# Rows are timestamped when the event happens but chained when written, so
+# chain order and created_at order can disagree by up to the buffering delay.
+CHAIN_CLOCK_SKEW = timedelta(days=1)
+
+VERIFY_CHUNK_SIZE = 1000
+
+
+def _canonical(row: dict) -> str:
+    """Canonical JSON for the hashed fields of an audit row."""
+    created_at = row["created_at"].astimezone(UTC).isoformat()
+    entity_id = row.get("entity_id")
+    payload = {
+        "org_id": str(row["org_id"]),
+        "seq": row["chain_seq"],
+        "user_email": row.get("user_email"),
+        "action": row["action"],
+        "entity_type": row["entity_type"],
+        "entity_id": str(entity_id) if entity_id else None,
+        # Round-trip through JSON so the hash matches what JSONB hands back
+        "metadata": json.loads(json.dumps(row.get("metadata_json") or {}, default=str)),
+        "created_at": created_at,
+    }
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def compute_row_hash(row: dict, prev_hash: str) -> str:
+    """Hash of an audit row chained onto ``prev_hash``."""
+    return hashlib.sha256((prev_hash + _canonical(row)).encode()).hexdigest()
+
+
+def assign_chain(conn: Connection, rows: list[dict]):
+    """
+    Append rows to their orgs' chains, setting chain_seq, prev_hash and row_hash.
+
+    Must run in the same transaction that inserts the rows. Heads are locked in
+    org id order so concurrent multi-org batches cannot deadlock.
+    """
+    by_org: dict[UUID, list[dict]] = {}
+    for row in rows:
+        by_org.setdefault(row["org_id"], []).append(row)
+
+    for org_id in sorted(by_org, key=str):
+        conn.execute(
+            text(
+                "INSERT INTO audit_chain_heads (org_id, last_seq, last_hash) "
+                "VALUES (:org_id, 0, :genesis) ON CONFLICT (org_id) DO NOTHING"
+            ),
+            {"org_id": org_id, "genesis": GENESIS_HASH},
+        )
+        seq, prev_hash = conn.execute(
+            text("SELECT last_seq, last_hash FROM audit_chain_heads WHERE org_id = :org_id FOR UPDATE"),
+            {"org_id": org_id},
+        ).one()
+        for row in by_org[org_id]:
+            seq += 1
+            row["chain_seq"] = seq
+            row["prev_hash"] = prev_hash
+            row["row_hash"] = prev_hash = compute_row_hash(row, prev_hash)
+        conn.execute(
+            text(
+                "UPDATE audit_chain_heads SET last_seq = :seq, last_hash = :hash, updated_at = now() "
+                "WHERE org_id = :org_id"
+            ),
+            {"org_id": org_id, "seq": seq, "hash": prev_hash},
+        )
+
+
+def sign_checkpoint(org_id: UUID, chain_seq: int, row_hash: str) -> str:
+    """HMAC signature binding a checkpoint to its org and chain position."""
+    message = f"{org_id}:{chain_seq}:{row_hash}".encode()
+    return hmac.new(settings.audit_checkpoint_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_chain_rows(rows, start_seq: int, start_hash: str) -> tuple[int, str, str | None]:
+    """
+    Re-hash consecutive chain rows starting after (start_seq, start_hash).
+
+    Returns (last_seq, last_hash, error); error is None when the chain holds.
+    """
+    seq, prev_hash = start_seq, start_hash
+    for row in rows:
+        if row["chain_seq"] != seq + 1:
+            return seq, prev_hash, f"Missing audit rows after chain position {seq}"
+        if row["prev_hash"] != prev_hash:
+            return seq, prev_hash, f"Broken link at chain position {row['chain_seq']}"
+        if compute_row_hash(row, prev_hash) != row["row_hash"]:
+            return seq, prev_hash, f"Tampered audit row at chain position {row['chain_seq']}"
+        seq, prev_hash = row["chain_seq"], row["row_hash"]
+    return seq, prev_hash, None
+
+
+def verify_org_chain(org_id: UUID) -> dict:
+    """
+    Verify an org's chain from its last checkpoint to the current head.
+
+    On success a new signed checkpoint is recorded at the head, so the next
+    verification only has to re-hash rows written after this one.
+    """
+    with engine.begin() as conn:
+        checkpoint = conn.execute(
+            select(AuditCheckpoint)
+            .where(AuditCheckpoint.org_id == org_id)
+            .order_by(AuditCheckpoint.chain_seq.desc())
+            .limit(1)
+        ).first()
+        head = conn.execute(select(AuditChainHead).where(AuditChainHead.org_id == org_id)).first()
+
+        start_seq, start_hash, since = 0, GENESIS_HASH, None
+        if checkpoint:
+            expected = sign_checkpoint(org_id, checkpoint.chain_seq, checkpoint.row_hash)
+            if not hmac.compare_digest(expected, checkpoint.signature):
+                return _result(org_id, False, 0, checkpoint.chain_seq, checkpoint.chain_seq,
+                               "Checkpoint signature mismatch")
+            start_seq, start_hash = checkpoint.chain_seq, checkpoint.row_hash
+            since = checkpoint.row_created_at - CHAIN_CLOCK_SKEW
+
+        if not head or head.last_seq == start_seq:
+            return _result(org_id, True, 0, start_seq, start_seq, None)
+
+        stmt = (
+            select(AuditLog.__table__)
+            .where(AuditLog.org_id == org_id, AuditLog.chain_seq > start_seq, AuditLog.chain_seq <= head.last_seq)
+            .order_by(AuditLog.chain_seq)
+        )
+        if since:
+            # Lets the planner skip monthly partitions older than the checkpoint
+            stmt = stmt.where(AuditLog.created_at >= since)
+
+        result = conn.execute(stmt.execution_options(yield_per=VERIFY_CHUNK_SIZE)).mappings()
+        last_seq, last_hash, error = verify_chain_rows(result, start_seq, start_hash)
+        result.close()
+        checked = last_seq - start_seq
+
+        if error is None and (last_seq, last_hash) != (head.last_seq, head.last_hash):
+            error = f"Chain ends at position {last_seq} but head is at {head.last_seq}"
+        if error:
+            return _result(org_id, False, checked, start_seq, last_seq, error)
+
+        last_created_at = conn.execute(
+            select(AuditLog.created_at).where(AuditLog.org_id == org_id, AuditLog.chain_seq == last_seq)
+        ).scalar_one()
+        conn.execute(
+            AuditCheckpoint.__table__.insert().values(
+                org_id=org_id,
+                chain_seq=last_seq,
+                row_hash=last_hash,
+                row_created_at=last_created_at,
+                signature=sign_checkpoint(org_id, last_seq, last_hash),
+            )
+        )
+    return _result(org_id, True, checked, start_seq, last_seq, None)
+
+
+def _result(org_id, verified, checked, from_seq, to_seq, error) -> dict:
+    return {
+        "org_id": str(org_id),
+        "verified": verified,
+        "checked_rows": checked,
+        "from_seq": from_seq,
+        "to_seq": to_seq,
+        "error": error,
+        "verified_at": datetime.now(UTC).isoformat(),
+    }
+
+
+def checkpoint_audit_chains() -> list[dict]:
+    """Verify and checkpoint every chain whose head moved past its last checkpoint."""
+    with engine.connect() as conn:
+        org_ids = conn.execute(
+            text(
+                "SELECT h.org_id FROM audit_chain_heads h "
+                "WHERE h.last_seq > COALESCE("
+                "  (SELECT max(c.chain_seq) FROM audit_checkpoints c WHERE c.org_id = h.org_id), 0)"
+            )
+        ).scalars().all()
+    results = [verify_org_chain(org_id) for org_id in org_ids]
+    for result in results:
+        if not result["verified"]:
+            print(f"⚠️  Audit chain verification failed for org {result['org_id']}: {result['error']}")
+    return results
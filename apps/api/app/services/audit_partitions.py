@@ -0,0 +1,202 @@
+"""Monthly partition maintenance and retention for audit_logs.
+
+``audit_logs`` is range-partitioned by ``created_at`` with one partition per
+calendar month (``audit_logs_y2025m11``). There is deliberately no DEFAULT
+partition: it would stop the planner from using an ordered append for the
+``ORDER BY created_at DESC LIMIT n`` queries of the audit and dashboard
+routers. Partitions are created a few months ahead instead, and the
+``audit_partitions.covered_until`` gauge (epoch seconds) records how far ahead
+they reach so an alert can fire long before inserts would start failing.
+
+Retention never deletes row by row at partition granularity: partitions older
+than the longest retention in force are detached and moved to the
+``audit_archive`` schema. Orgs with a shorter retention than the partition
+cutoff have their remaining expired rows purged in small batches.
+
+Both steps keep the hash chains verifiable: only rows at or below their org's
+last signed checkpoint are removed, since verification resumes from that
+checkpoint. Rows written since are kept until a later run, after the
+``checkpoint_audit_chains`` job has covered them.
+"""
+import re
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.db import engine
+from app.services.metrics import metrics
+from app.services.org_counters import apply_counter_deltas
+from app.services.response_cache import dashboard_cache
+
+ARCHIVE_SCHEMA = "audit_archive"
+PURGE_BATCH_SIZE = 5000
+
+_PARTITION_RE = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+# Rows of ``audit_logs`` (aliased ``l``) that verification no longer reads
+CHECKPOINTED = (
+    "(l.chain_seq IS NULL OR l.chain_seq <= COALESCE("
+    "  (SELECT max(c.chain_seq) FROM audit_checkpoints c WHERE c.org_id = l.org_id), 0))"
+)
+
+
+def month_start(value: date | datetime) -> date:
+    """First day of the month containing ``value``."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Shift a first-of-month date by a number of months."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding ``month``."""
+    return f"audit_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def list_audit_partitions(conn: Connection) -> dict[date, str]:
+    """Map month -> partition name for partitions currently attached to audit_logs."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'audit_logs'::regclass"
+    )).scalars()
+    partitions = {}
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def month_bound(month: date) -> datetime:
+    """UTC instant at which ``month`` starts (partition bounds are UTC months)."""
+    return datetime(month.year, month.month, 1, tzinfo=UTC)
+
+
+def create_partition_sql(month: date, table: str = "audit_logs") -> str:
+    """DDL creating the monthly partition for ``month``."""
+    lower, upper = month_bound(month), month_bound(add_months(month, 1))
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+def covered_until(partitions: dict[date, str], current: date) -> date:
+    """First month from ``current`` on without a partition, i.e. where inserts would start failing."""
+    month = current
+    while month in partitions:
+        month = add_months(month, 1)
+    return month
+
+
+def ensure_audit_partitions(months_ahead: int | None = None) -> list[str]:
+    """
+    Create partitions for the current month and ``months_ahead`` months after it.
+
+    Warns when fewer than ``AUDIT_PARTITION_MIN_MONTHS_AHEAD`` future months
+    are covered afterwards.
+    """
+    months_ahead = settings.audit_partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(datetime.now(UTC))
+    created = []
+    with engine.begin() as conn:
+        existing = list_audit_partitions(conn)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                conn.execute(text(create_partition_sql(month)))
+                existing[month] = partition_name(month)
+                created.append(existing[month])
+    end = covered_until(existing, current)
+    metrics.gauge("audit_partitions.covered_until", month_bound(end).timestamp())
+    buffer = (end.year - current.year) * 12 + end.month - current.month - 1
+    if buffer < settings.audit_partition_min_months_ahead:
+        print(f"⚠️  audit_logs partitions only cover {buffer} month(s) ahead (until {end.isoformat()})")
+    return created
+
+
+def effective_retention_months(org_retention: int | None) -> int | None:
+    """Retention for one org: its own override, else the global policy (None = keep forever)."""
+    return org_retention if org_retention is not None else settings.audit_retention_months
+
+
+def detach_expired_audit_partitions() -> list[str]:
+    """
+    Detach partitions older than every org's retention and archive them.
+
+    A monthly partition holds rows of all orgs, so it can only leave the hot
+    table once the longest retention in force has expired for it.
+    """
+    with engine.begin() as conn:
+        overrides = conn.execute(text("SELECT audit_retention_months FROM orgs")).scalars().all()
+        retentions = [effective_retention_months(value) for value in overrides] or [settings.audit_retention_months]
+        if any(value is None for value in retentions):
+            return []
+
+        cutoff = add_months(month_start(datetime.now(UTC)), -max(retentions))
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        detached = []
+        for month, name in sorted(list_audit_partitions(conn).items()):
+            if add_months(month, 1) > cutoff:
+                break
+            if conn.execute(text(f"SELECT 1 FROM {name} l WHERE NOT {CHECKPOINTED} LIMIT 1")).first():
+                print(f"⚠️  Keeping {name} attached: it has audit rows past their chain's last checkpoint")
+                break
+            removed = conn.execute(text(f"SELECT org_id, count(*) FROM {name} GROUP BY org_id")).all()
+            apply_counter_deltas(conn, {org_id: {"audit_events": -count} for org_id, count in removed})
+            conn.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            detached.append(name)
+    dashboard_cache.invalidate_committed()
+    return detached
+
+
+def purge_org_expired_audit_logs() -> int:
+    """
+    Delete rows of orgs whose retention is shorter than the partition cutoff.
+
+    Deletes run in small batches, each in its own transaction, and only touch
+    partitions older than the org's cutoff and rows covered by a checkpoint.
+    """
+    now = datetime.now(UTC)
+    deleted = 0
+    with engine.connect() as conn:
+        orgs = conn.execute(text("SELECT id, audit_retention_months FROM orgs")).all()
+
+    for org_id, org_retention in orgs:
+        retention = effective_retention_months(org_retention)
+        if retention is None:
+            continue
+        cutoff = month_bound(add_months(month_start(now), -retention))
+        while True:
+            with engine.begin() as conn:
+                count = conn.execute(
+                    text(
+                        "DELETE FROM audit_logs WHERE (id, created_at) IN ("
+                        "  SELECT id, created_at FROM audit_logs l"
+                        f"  WHERE org_id = :org_id AND created_at < :cutoff AND {CHECKPOINTED}"
+                        "  LIMIT :batch"
+                        ")"
+                    ),
+                    {"org_id": org_id, "cutoff": cutoff, "batch": PURGE_BATCH_SIZE},
+                ).rowcount
+                apply_counter_deltas(conn, {org_id: {"audit_events": -count}})
+            dashboard_cache.invalidate_committed()
+            deleted += count
+            if count < PURGE_BATCH_SIZE:
+                break
+    return deleted
+
+
+def apply_audit_retention() -> dict:
+    """Run the full retention policy: archive whole partitions, then purge per-org leftovers."""
+    return {
+        "detached": detach_expired_audit_partitions(),
+        "purged_rows": purge_org_expired_audit_logs(),
+    }
@@ -0,0 +1,44 @@
+"""Sensitivity classification of audit actions.
+
+Each audit row is classified once, when it is written, and the result is
+stored in ``audit_logs.sensitivity``. Viewer listings then filter on
+``sensitivity = 'normal'``, which a partial index serves as a plain range
+scan, instead of pattern-matching every action name.
+
+The registry is configured with ``AUDIT_SENSITIVE_ACTIONS`` (exact action
+names) and ``AUDIT_SENSITIVE_KEYWORDS`` (substrings, ``export`` by default).
+Rows written before a registry change keep their stored classification until
+``reclassify_audit_sensitivity`` is run (scripts/reclassify_audit_sensitivity.py).
+"""
+from functools import lru_cache
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+
+NORMAL = "normal"
+SENSITIVE = "sensitive"
+
+
+@lru_cache(maxsize=1024)
+def classify_action(action: str) -> str:
+    """Sensitivity of an audit action according to the configured registry."""
+    name = action.lower()
+    if name in settings.audit_sensitive_actions_set:
+        return SENSITIVE
+    if any(keyword in name for keyword in settings.audit_sensitive_keywords_list):
+        return SENSITIVE
+    return NORMAL
+
+
+def reclassify_audit_sensitivity(conn: Connection) -> int:
+    """Re-apply the registry to stored rows, one distinct action at a time."""
+    updated = 0
+    actions = conn.execute(text("SELECT DISTINCT action FROM audit_logs")).scalars().all()
+    for action in actions:
+        updated += conn.execute(
+            text("UPDATE audit_logs SET sensitivity = :sensitivity WHERE action = :action AND sensitivity <> :sensitivity"),
+            {"action": action, "sensitivity": classify_action(action)},
+        ).rowcount
+    return updated
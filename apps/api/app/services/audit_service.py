@@ -1,14 +1,93 @@
 """Audit service for logging actions."""
+import uuid
+from datetime import UTC, datetime
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 
-from app.db import AuditLog, OrgUser
+from app.db import AuditLog
+from app.services.audit_chain import assign_chain
+from app.services.audit_sensitivity import classify_action
+from app.services.audit_sink import audit_sink
+from app.services.audit_stream import audit_broadcaster
+from app.services.org_counters import count_audit_rows
+
+
+def build_audit_row(
+    org_id: UUID,
+    user_email: str | None,
+    action: str,
+    entity_type: str,
+    entity_id: UUID | None = None,
+    metadata: dict | None = None,
+) -> dict:
+    """Build a complete audit_logs row, with id, timestamp and sensitivity assigned at event time."""
+    return {
+        "id": uuid.uuid4(),
+        "org_id": org_id,
+        "user_email": user_email,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "metadata_json": metadata or {},
+        "created_at": datetime.now(UTC),
+        "sensitivity": classify_action(action),
+    }
+
+
+class AuditContext:
+    """
+    Who performs an audited action, for which org, and from where.
+
+    Built once per request by the auth dependencies in ``app.deps`` (or with
+    ``AuditContext.system`` in scripts) and passed to ``log_event``, so
+    writing an audit event never needs to look anything up.
+    """
+
+    def __init__(
+        self,
+        actor_email: str | None = None,
+        org_id: UUID | None = None,
+        via: str = "anonymous",
+        ip: str | None = None,
+        user_agent: str | None = None,
+        request_id: str | None = None,
+    ):
+        self.actor_email = actor_email
+        self.org_id = org_id
+        self.via = via  # "api_key", "jwt", "script" or "anonymous"
+        self.ip = ip
+        self.user_agent = user_agent
+        self.request_id = request_id
+
+    @classmethod
+    def from_request(cls, request, **fields) -> "AuditContext":
+        """Context carrying the client address, user agent and X-Request-ID of a request."""
+        return cls(
+            ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            request_id=request.headers.get("x-request-id"),
+            **fields,
+        )
+
+    @classmethod
+    def system(cls, actor_email: str | None = None, org_id: UUID | None = None) -> "AuditContext":
+        """Context for scripts and background jobs."""
+        return cls(actor_email=actor_email, org_id=org_id, via="script")
+
+    def for_org(self, org_id: UUID) -> "AuditContext":
+        """Copy of this context scoped to another organization."""
+        return AuditContext(self.actor_email, org_id, self.via, self.ip, self.user_agent, self.request_id)
+
+    def request_metadata(self) -> dict:
+        """Request details recorded with each event."""
+        details = {"via": self.via, "ip": self.ip, "user_agent": self.user_agent, "request_id": self.request_id}
+        return {key: value for key, value in details.items() if value}
 
 
 def log_event(
     db: Session,
-    actor,
+    context: AuditContext,
     action: str,
     entity_type: str,
     entity_id: UUID | None = None,
@@ -16,75 +95,46 @@ def log_event(
     org_id: UUID | None = None,
 ):
     """
-    Centralized audit logger. Always attaches org_id if available.
-    
-    This function ensures that every audit event is properly scoped to an organization,
-    even when triggered by superadmins. It resolves org_id from:
-    1. Explicit org_id parameter (highest priority)
-    2. Actor's current org context (if actor has org_id attribute)
-    3. Actor's first org membership (if actor has org_memberships relationship)
-    
+    Centralized audit logger.
+
+    Every event is scoped to an organization: the explicit ``org_id`` when the
+    action targets a specific org (e.g. a superadmin managing it), otherwise
+    the org of the request context. Request details are stored under
+    ``metadata["request"]``.
+
     Args:
         db: Database session (must be provided, not created internally)
-        actor: The user or object performing the action (User instance, or object with email/org_id)
+        context: Audit context of the request (see ``app.deps.get_audit_context``)
         action: Action type (e.g., "created", "updated", "deleted", "added_user")
         entity_type: Type of entity (e.g., "consent", "org", "user", "org_user")
         entity_id: ID of the entity (optional)
         metadata: Additional metadata as dict (optional)
-        org_id: Explicit organization ID (optional, will be resolved from actor if not provided)
-    
+        org_id: Explicit organization ID (optional, defaults to the context's org)
+
     Raises:
-        ValueError: If org_id cannot be resolved and is required
+        ValueError: If neither org_id nor the context provides an organization
     """
-    # Determine org context
-    resolved_org_id = org_id
-    
-    # If actor is an Org object, use its id directly
-    if not resolved_org_id and hasattr(actor, "__class__"):
-        from app.db import Org
-        if isinstance(actor, Org):
-            resolved_org_id = actor.id
-    
-    if not resolved_org_id:
-        # Prefer actor's current org if available
-        resolved_org_id = getattr(actor, "org_id", None)
-        
-        # If not available, try to get from actor's org_memberships
-        if not resolved_org_id and hasattr(actor, "org_memberships"):
-            memberships = actor.org_memberships
-            if memberships:
-                resolved_org_id = memberships[0].org_id  # fallback to first org
-    
-    # If still no org_id, try querying OrgUser relationship
-    if not resolved_org_id and hasattr(actor, "id"):
-        org_user = db.query(OrgUser).filter(OrgUser.user_id == actor.id).first()
-        if org_user:
-            resolved_org_id = org_user.org_id
-    
+    resolved_org_id = org_id or context.org_id
     if not resolved_org_id:
         raise ValueError(
             f"Audit event missing org_id for action={action}, entity_type={entity_type}. "
-            "org_id must be provided explicitly or resolvable from actor."
+            "org_id must be provided explicitly or by the audit context."
         )
-    
-    # Extract user email from actor
-    user_email = None
-    if hasattr(actor, "email"):
-        user_email = actor.email
-    elif isinstance(actor, str):
-        user_email = actor  # Allow passing email as string
-    
-    event = AuditLog(
-        org_id=resolved_org_id,
-        user_email=user_email,
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        metadata_json=metadata or {},
-    )
-    
-    db.add(event)
+
+    metadata = {**(metadata or {}), "request": context.request_metadata()}
+    row = build_audit_row(resolved_org_id, context.actor_email, action, entity_type, entity_id, metadata)
+
+    # Buffered COPY writer when running inside the API, direct write otherwise
+    if audit_sink.running:
+        audit_sink.submit(row)
+        return
+
+    assign_chain(db.connection(), [row])
+    count_audit_rows(db.connection(), [row])
+    db.add(AuditLog(**row))
+    audit_broadcaster.notify(db.connection(), [row])
     db.commit()
+    audit_broadcaster.publish([row])
 
 
 def log_action(
@@ -98,7 +148,7 @@ def log_action(
     """
     Legacy log_action function for backward compatibility.
     
-    DEPRECATED: Use log_event() instead, which properly resolves org_id from actor.
+    DEPRECATED: Use log_event() with an AuditContext instead.
     This function is kept for backward compatibility but will raise ValueError
     if org_id is not provided (since org_id is now required).
     
@@ -115,21 +165,22 @@ def log_action(
     if not org_id:
         raise ValueError(
             f"org_id is required for audit logging. Action: {action}, Entity: {entity_type}. "
-            "Please use log_event() with an actor object instead."
+            "Please use log_event() with an AuditContext instead."
         )
     
+    row = build_audit_row(org_id, user_email, action, entity_type, entity_id, metadata)
+    if audit_sink.running:
+        audit_sink.submit(row)
+        return
+
     db = SessionLocal()
     try:
-        log = AuditLog(
-            org_id=org_id,
-            user_email=user_email,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            metadata_json=metadata or {},
-        )
-        db.add(log)
+        assign_chain(db.connection(), [row])
+        count_audit_rows(db.connection(), [row])
+        db.add(AuditLog(**row))
+        audit_broadcaster.notify(db.connection(), [row])
         db.commit()
+        audit_broadcaster.publish([row])
     except Exception as e:
         # Log error but don't fail the request
         print(f"⚠️  Failed to log audit action: {e}")
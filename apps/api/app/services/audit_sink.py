@@ -0,0 +1,262 @@
+"""Buffered audit log writer.
+
+High-volume tenants produce several audit rows per consent. Instead of one
+INSERT and commit per event, the sink accumulates rows in memory and a
+background thread flushes them with ``COPY audit_logs FROM STDIN`` whenever a
+batch fills up or the flush interval elapses.
+
+The sink is opt-in (``AUDIT_SINK_ENABLED``) and only active once started by the
+application lifespan; scripts and other callers fall back to direct writes.
+
+Rows the database rejects, and rows still buffered when a shutdown gives up
+waiting for the database, are appended to a dead-letter file
+(``AUDIT_SINK_DEAD_LETTER_PATH``, one JSON row per line) and can be written
+again with ``scripts/replay_audit_dead_letters.py``.
+
+Crash-loss window: buffered rows only live in memory. If the process dies
+without a shutdown (SIGKILL, OOM kill, power loss) the rows submitted since
+the last flush are lost, i.e. up to ``AUDIT_SINK_FLUSH_INTERVAL_MS`` or
+``AUDIT_SINK_BATCH_SIZE`` rows of events, and up to ``AUDIT_SINK_MAX_QUEUE``
+rows while the database falls behind. Deployments that cannot accept this
+leave the sink disabled.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.db import AuditLog, engine
+from app.services.audit_chain import assign_chain
+from app.services.audit_stream import audit_broadcaster
+from app.services.org_counters import count_audit_rows
+from app.services.metrics import metrics
+from app.services.response_cache import dashboard_cache
+
+AUDIT_COPY_COLUMNS = (
+    "id",
+    "org_id",
+    "user_email",
+    "action",
+    "entity_type",
+    "entity_id",
+    "metadata_json",
+    "created_at",
+    "chain_seq",
+    "prev_hash",
+    "row_hash",
+    "sensitivity",
+)
+
+AUDIT_COPY_SQL = f"COPY audit_logs ({', '.join(AUDIT_COPY_COLUMNS)}) FROM STDIN"
+
+# Event fields kept in the dead-letter file; the chain is assigned again on replay
+DEAD_LETTER_COLUMNS = tuple(
+    column for column in AUDIT_COPY_COLUMNS if column not in ("chain_seq", "prev_hash", "row_hash")
+)
+
+_dead_letter_lock = threading.Lock()
+
+
+class AuditSink:
+    """Accumulates audit rows and flushes them in batches on a background thread."""
+
+    def __init__(self):
+        self._pending: list[dict] = []
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self.batch_size = settings.audit_sink_batch_size
+        self.flush_interval = settings.audit_sink_flush_interval_ms / 1000
+        self.max_pending = settings.audit_sink_max_queue
+
+    @property
+    def running(self) -> bool:
+        """Whether events submitted now will be buffered."""
+        return self._thread is not None and self._thread.is_alive() and not self._stopping
+
+    def start(self):
+        """Start the flusher thread."""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the flusher thread after draining everything still buffered.
+
+        Rows still buffered after ``timeout`` (e.g. while the database is
+        unreachable) are moved to the dead-letter file rather than dropped.
+        """
+        if not self._thread:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+        with self._cond:
+            leftover, self._pending = self._pending, []
+            metrics.gauge("audit_sink.queue_depth", 0)
+        if leftover:
+            print(f"⚠️  Audit sink stopped with {len(leftover)} rows unflushed, moving them to the dead-letter file")
+            dead_letter_rows(leftover)
+
+    def submit(self, row: dict):
+        """
+        Queue an audit row for the next batch.
+
+        When the buffer is full the caller flushes a batch itself, which slows
+        producers down instead of growing the buffer without bound.
+        """
+        with self._cond:
+            self._pending.append(row)
+            depth = len(self._pending)
+            metrics.gauge("audit_sink.queue_depth", depth)
+            if depth >= self.batch_size:
+                self._cond.notify()
+        if depth >= self.max_pending:
+            metrics.incr("audit_sink.backpressure")
+            self.flush()
+
+    def flush(self):
+        """Write out one batch of buffered rows."""
+        with self._cond:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            metrics.gauge("audit_sink.queue_depth", len(self._pending))
+        if batch:
+            self._write_batch(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Wait for a full batch, but never longer than the flush interval
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._pending:
+                    if self._stopping:
+                        return
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Audit sink flush failed: {e}")
+
+    def _write_batch(self, batch: list[dict]):
+        start = time.perf_counter()
+        try:
+            copy_rows(batch)
+        except Exception as e:
+            # Isolate rows the database rejects (e.g. an org deleted meanwhile)
+            # so one bad event cannot block the rest of the batch.
+            print(f"⚠️  Audit COPY failed for {len(batch)} rows, retrying row by row: {e}")
+            metrics.incr("audit_sink.copy_errors")
+            rejected = []
+            for row in batch:
+                try:
+                    insert_rows([row])
+                except Exception:
+                    rejected.append(row)
+            if rejected:
+                dead_letter_rows(rejected)
+        finally:
+            metrics.observe("audit_sink.flush_latency", time.perf_counter() - start)
+            metrics.incr("audit_sink.flushed_rows", len(batch))
+
+
+def dead_letter_rows(rows: list[dict]):
+    """Append rows to the dead-letter file (fsynced); counts them as dropped if even that fails."""
+    path = Path(settings.audit_sink_dead_letter_path)
+    try:
+        with _dead_letter_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a") as f:
+                for row in rows:
+                    f.write(json.dumps({column: row.get(column) for column in DEAD_LETTER_COLUMNS}, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        metrics.incr("audit_sink.dead_lettered", len(rows))
+    except Exception as e:
+        metrics.incr("audit_sink.dropped", len(rows))
+        print(f"❌ Dropped {len(rows)} audit events, dead-letter file {path} not writable: {e}")
+
+
+def _load_dead_letter(line: str) -> dict:
+    row = json.loads(line)
+    for column in ("id", "org_id", "entity_id"):
+        row[column] = UUID(row[column]) if row[column] else None
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+def replay_dead_letters() -> tuple[int, int]:
+    """
+    Write dead-lettered rows again, one at a time; return (written, still failing).
+
+    Rows that fail again are kept in the file for the next attempt.
+    """
+    path = Path(settings.audit_sink_dead_letter_path)
+    with _dead_letter_lock:
+        if not path.exists():
+            return 0, 0
+        lines = [line for line in path.read_text().splitlines() if line.strip()]
+        failed = []
+        for line in lines:
+            try:
+                insert_rows([_load_dead_letter(line)])
+            except Exception as e:
+                print(f"⚠️  Could not replay audit event: {e}")
+                failed.append(line)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text("".join(f"{line}\n" for line in failed))
+        os.replace(tmp_path, path)
+    return len(lines) - len(failed), len(failed)
+
+
+def _copy_value(value):
+    if isinstance(value, dict):
+        return json.dumps(value, default=str)
+    return value
+
+
+def copy_rows(rows: list[dict]):
+    """Chain and write audit rows with COPY (psycopg 3), or a multi-row INSERT on other drivers."""
+    with engine.begin() as conn:
+        assign_chain(conn, rows)
+        count_audit_rows(conn, rows)
+        if engine.dialect.driver != "psycopg":
+            conn.execute(insert(AuditLog), rows)
+        else:
+            raw = conn.connection.driver_connection
+            with raw.cursor() as cursor, cursor.copy(AUDIT_COPY_SQL) as copy:
+                for row in rows:
+                    copy.write_row([_copy_value(row[column]) for column in AUDIT_COPY_COLUMNS])
+        audit_broadcaster.notify(conn, rows)
+    dashboard_cache.invalidate_committed()
+    audit_broadcaster.publish(rows)
+
+
+def insert_rows(rows: list[dict]):
+    """Chain and write audit rows with a single multi-row INSERT."""
+    with engine.begin() as conn:
+        assign_chain(conn, rows)
+        count_audit_rows(conn, rows)
+        conn.execute(insert(AuditLog), rows)
+        audit_broadcaster.notify(conn, rows)
+    dashboard_cache.invalidate_committed()
+    audit_broadcaster.publish(rows)
+
+
+audit_sink = AuditSink()
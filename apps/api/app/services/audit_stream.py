@@ -0,0 +1,165 @@
+"""Live fan-out of committed audit events to SSE subscribers.
+
+Every audit writer hands its rows to the broadcaster once they are committed,
+and the broadcaster pushes them onto the queue of each subscribed
+``/audit/stream`` connection whose org and sensitivity scope matches. Dashboards
+tail the log without polling ``audit_logs``.
+
+With several API workers, ``AUDIT_STREAM_NOTIFY`` switches delivery to Postgres
+``NOTIFY``: writers notify inside their transaction (so events go out exactly
+on commit) and every worker runs one ``LISTEN`` thread feeding its local
+subscribers.
+"""
+import asyncio
+import json
+import threading
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.db import engine
+from app.services.audit_sensitivity import NORMAL
+from app.services.metrics import metrics
+from app.utils.pagination import encode_cursor
+
+NOTIFY_CHANNEL = "audit_events"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7800
+
+
+def event_payload(row: dict) -> dict:
+    """JSON-ready stream event for an audit row, shaped like /audit/logs entries."""
+    entity_id = row.get("entity_id")
+    return {
+        "id": str(row["id"]),
+        "org_id": str(row["org_id"]),
+        "cursor": encode_cursor(row["created_at"], row["id"]),
+        "timestamp": row["created_at"].isoformat(),
+        "event_type": row["action"],
+        "actor": row.get("user_email"),
+        "entity_type": row["entity_type"],
+        "entity_id": str(entity_id) if entity_id else None,
+        "sensitivity": row.get("sensitivity") or NORMAL,
+        "details": row.get("metadata_json"),
+    }
+
+
+class Subscription:
+    """Queue of events for one stream connection."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, org_id: UUID | None, include_sensitive: bool):
+        self.loop = loop
+        self.org_id = str(org_id) if org_id else None
+        self.include_sensitive = include_sensitive
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.audit_stream_queue_size)
+        self.lagged = False
+
+    def wants(self, event: dict) -> bool:
+        if self.org_id and event["org_id"] != self.org_id:
+            return False
+        return self.include_sensitive or event["sensitivity"] == NORMAL
+
+    def offer(self, event: dict):
+        """Enqueue on the subscriber's loop; a full queue marks the subscriber as lagged."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+            metrics.incr("audit_stream.dropped")
+
+
+class AuditBroadcaster:
+    """Fans committed audit events out to subscribers of this worker."""
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    @property
+    def use_notify(self) -> bool:
+        return settings.audit_stream_notify
+
+    def subscribe(self, org_id: UUID | None, include_sensitive: bool) -> Subscription:
+        """Register a subscriber on the running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), org_id, include_sensitive)
+        with self._lock:
+            self._subscribers.add(subscription)
+            metrics.gauge("audit_stream.subscribers", len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            metrics.gauge("audit_stream.subscribers", len(self._subscribers))
+
+    def dispatch(self, events: list[dict]):
+        """Deliver events to matching local subscribers (thread-safe)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            for event in events:
+                if subscription.wants(event):
+                    subscription.loop.call_soon_threadsafe(subscription.offer, event)
+        metrics.incr("audit_stream.events", len(events))
+
+    def notify(self, conn: Connection, rows: list[dict]):
+        """Queue NOTIFYs for rows inside the writing transaction (NOTIFY mode only)."""
+        if not self.use_notify or not rows:
+            return
+        payloads = []
+        for row in rows:
+            payload = json.dumps(event_payload(row), default=str)
+            if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+                event = event_payload(row)
+                event["details"], event["truncated"] = None, True
+                payload = json.dumps(event, default=str)
+            payloads.append(payload)
+        conn.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": NOTIFY_CHANNEL, "payloads": payloads},
+        )
+
+    def publish(self, rows: list[dict]):
+        """Hand committed rows to local subscribers (in-process mode only)."""
+        if self.use_notify or not rows or not self._subscribers:
+            return
+        self.dispatch([event_payload(row) for row in rows])
+
+    def start(self):
+        """Start the LISTEN thread when cross-worker delivery is enabled."""
+        if not self.use_notify or self._listener:
+            return
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="audit-stream-listen", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        if not self._listener:
+            return
+        self._stopping.set()
+        self._listener.join(5)
+        self._listener = None
+
+    def _listen(self):
+        import psycopg
+
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stopping.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    while not self._stopping.is_set():
+                        events = [json.loads(n.payload) for n in conn.notifies(timeout=1.0)]
+                        if events:
+                            self.dispatch(events)
+            except Exception as e:
+                print(f"⚠️  Audit stream listener error, reconnecting: {e}")
+                self._stopping.wait(5)
+
+
+audit_broadcaster = AuditBroadcaster()
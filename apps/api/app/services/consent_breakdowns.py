@@ -0,0 +1,122 @@
+"""Per-org consent breakdowns served from materialized views.
+
+``consent_purpose_totals`` holds active and revoked consents per org and
+purpose, ``consent_user_agents`` the 25 most common user agents per org. Both are
+defined in migration ``d9b4f0c3e812`` and refreshed with ``REFRESH
+MATERIALIZED VIEW CONCURRENTLY`` by the ``refresh_consent_breakdowns`` job, so
+readers are never blocked. Each refresh records its time, duration and row
+count in ``matview_refreshes``, which is what freshness is reported from.
+
+The views cover consents in the hot table: revoked consents moved to the cold
+archive no longer count as revoked here (active consents are never archived).
+"""
+import time
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import column, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import MatviewRefresh, engine
+from app.services.metrics import metrics
+
+# Refreshed in this order; each needs a unique index for CONCURRENTLY
+MATERIALIZED_VIEWS = ("consent_purpose_totals", "consent_user_agents")
+
+purpose_totals = table(
+    "consent_purpose_totals",
+    column("org_id"), column("purpose"), column("active"), column("revoked"), column("last_accepted_at"),
+)
+user_agents = table("consent_user_agents", column("org_id"), column("user_agent"), column("consents"), column("rank"))
+
+RECORD_REFRESH_SQL = text(
+    "INSERT INTO matview_refreshes (name, refreshed_at, duration_ms, row_count) "
+    "VALUES (:name, now(), :duration_ms, :row_count) "
+    "ON CONFLICT (name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at, "
+    "duration_ms = EXCLUDED.duration_ms, row_count = EXCLUDED.row_count"
+)
+
+
+def refresh_view(conn: Connection, name: str) -> dict:
+    """
+    Refresh one view inside the caller's transaction and record the refresh.
+
+    A view that was never populated cannot be refreshed concurrently, so its
+    first refresh is a plain one.
+    """
+    if name not in MATERIALIZED_VIEWS:
+        raise ValueError(f"Unknown materialized view {name!r}")
+    populated = conn.execute(
+        text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :name"), {"name": name}
+    ).scalar()
+    if populated is None:
+        raise ValueError(f"Materialized view {name} does not exist (run the migrations)")
+
+    start = time.perf_counter()
+    conn.execute(text(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if populated else ''}{name}"))
+    duration = time.perf_counter() - start
+    row_count = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    conn.execute(RECORD_REFRESH_SQL, {"name": name, "duration_ms": round(duration * 1000), "row_count": row_count})
+
+    metrics.observe(f"matviews.{name}.refresh", duration)
+    metrics.gauge(f"matviews.{name}.rows", row_count)
+    return {"concurrent": bool(populated), "duration_ms": round(duration * 1000, 1), "rows": row_count}
+
+
+def refresh_consent_breakdowns() -> dict[str, dict]:
+    """Refresh every breakdown view, each in its own transaction."""
+    results = {}
+    for name in MATERIALIZED_VIEWS:
+        with engine.begin() as conn:
+            results[name] = refresh_view(conn, name)
+    return results
+
+
+def view_freshness(db: Session) -> dict[str, dict]:
+    """When each view was last refreshed, how long ago, and what the refresh cost."""
+    now = datetime.now(UTC)
+    refreshes = {
+        row.name: row
+        for row in db.query(MatviewRefresh).filter(MatviewRefresh.name.in_(MATERIALIZED_VIEWS))
+    }
+    freshness = {}
+    for name in MATERIALIZED_VIEWS:
+        row = refreshes.get(name)
+        freshness[name] = {
+            "refreshed_at": row.refreshed_at.isoformat() if row else None,
+            "age_seconds": round((now - row.refreshed_at).total_seconds()) if row else None,
+            "refresh_ms": row.duration_ms if row else None,
+            "rows": row.row_count if row else None,
+        }
+    return freshness
+
+
+def consent_breakdown(db: Session, org_id: UUID) -> dict:
+    """Purpose totals and top user agents for one org, with the views' freshness."""
+    purposes = db.execute(
+        select(purpose_totals)
+        .where(purpose_totals.c.org_id == org_id)
+        .order_by(purpose_totals.c.active.desc(), purpose_totals.c.purpose)
+    ).mappings()
+    agents = db.execute(
+        select(user_agents.c.user_agent, user_agents.c.consents)
+        .where(user_agents.c.org_id == org_id)
+        .order_by(user_agents.c.rank)
+    ).all()
+    return {
+        "purposes": [
+            {
+                "purpose": row["purpose"],
+                "active": row["active"],
+                "revoked": row["revoked"],
+                "total": row["active"] + row["revoked"],
+                "last_accepted_at": row["last_accepted_at"].isoformat() if row["last_accepted_at"] else None,
+            }
+            for row in purposes
+        ],
+        "user_agents": [
+            {"user_agent": user_agent or None, "consents": consents} for user_agent, consents in agents
+        ],
+        "freshness": view_freshness(db),
+    }
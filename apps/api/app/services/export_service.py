@@ -0,0 +1,348 @@
+"""Consent export service.
+
+Exports are read in chunks from a single connection held inside a
+REPEATABLE READ, read-only transaction, so every chunk sees the same snapshot
+of the consents table no matter how long the export takes to stream.
+
+Large exports can be split into ``accepted_at`` slices read concurrently on
+separate connections. Each worker imports the coordinator's exported snapshot
+(``pg_export_snapshot``), so the parallel parts stay exactly as consistent as a
+single-cursor export. Slices are disjoint and read newest first, so writing the
+sorted parts back in slice order yields the global ``accepted_at desc`` order.
+Slice readers draw from a process-wide budget (``export_slice_connections``)
+kept below the pool size; an export gets as many slices as are free right now
+and falls back to the single cursor when none are.
+
+Revoked consents moved to the cold archive are merged back into every export
+in the same order, so an export regenerated with ``as_of`` after the archive
+job ran still reproduces the stamped document. Archived rows are filtered in
+Python with the same criteria; a row archived while an export runs can appear
+both in the snapshot and in the archive and is written once.
+"""
+import heapq
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import chain
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator
+from uuid import UUID
+
+from sqlalchemy import case, func, or_, select, text
+from sqlalchemy.engine import Connection, Row
+
+from app.config import settings
+from app.db import Consent, engine
+from app.services.archive_service import archive_store
+
+EXPORT_CHUNK_SIZE = 1000
+
+# Rendered parts above this size spill from memory to a temporary file
+EXPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+EXPORT_READ_BYTES = 64 * 1024
+
+_SNAPSHOT_ID_RE = re.compile(r"^[0-9A-Fa-f-]+$")
+
+# Shared by every export so concurrent parallel exports cannot drain the pool
+# that serves ordinary requests.
+_slice_slots = threading.BoundedSemaphore(settings.export_slice_connections)
+
+EXPORT_COLUMNS = (
+    Consent.id,
+    Consent.subject_id,
+    Consent.purpose,
+    Consent.text,
+    Consent.version_hash,
+    Consent.ip,
+    Consent.user_agent,
+    Consent.accepted_at,
+)
+
+
+def build_export_query(
+    org_id: UUID,
+    subject_id: str | None = None,
+    purpose: str | None = None,
+    q: str | None = None,
+    as_of: datetime | None = None,
+):
+    """
+    Build the consent export statement for an organization.
+
+    When ``as_of`` is given, the export is reconstructed as it looked at that
+    instant: consents accepted later are excluded and revocations that happened
+    later are hidden. Passing the ``snapshot_at`` stamp of a previous export
+    regenerates the same proof document.
+    """
+    revoked_at = Consent.revoked_at
+    if as_of:
+        revoked_at = case((Consent.revoked_at <= as_of, Consent.revoked_at), else_=None)
+
+    stmt = select(*EXPORT_COLUMNS, revoked_at.label("revoked_at")).where(Consent.org_id == org_id)
+
+    if subject_id:
+        stmt = stmt.where(Consent.subject_id == subject_id)
+    if purpose:
+        stmt = stmt.where(Consent.purpose == purpose)
+    if q:
+        stmt = stmt.where(
+            or_(
+                Consent.subject_id.ilike(f"%{q}%"),
+                Consent.purpose.ilike(f"%{q}%"),
+                Consent.text.ilike(f"%{q}%"),
+            )
+        )
+    if as_of:
+        stmt = stmt.where(Consent.accepted_at <= as_of)
+
+    return stmt.order_by(Consent.accepted_at.desc(), Consent.id.desc())
+
+
+class ArchivedExport:
+    """
+    Archived consents matching ``build_export_query``'s filters, shaped like its rows.
+
+    Rows are read lazily from the archive, one month file at a time, so an
+    export never holds the org's whole archived history in memory.
+    """
+
+    def __init__(
+        self,
+        org_id: UUID,
+        subject_id: str | None = None,
+        purpose: str | None = None,
+        q: str | None = None,
+        as_of: datetime | None = None,
+    ):
+        self.org_id = org_id
+        self.subject_id = subject_id
+        self.purpose = purpose
+        self.needle = q.lower() if q else None
+        self.as_of = as_of
+
+    def _match(self, row: dict) -> bool:
+        return (
+            (not self.subject_id or row["subject_id"] == self.subject_id)
+            and (not self.purpose or row["purpose"] == self.purpose)
+            and (not self.as_of or row["accepted_at"] <= self.as_of)
+            and (not self.needle or any(
+                self.needle in (row[field] or "").lower() for field in ("subject_id", "purpose", "text")
+            ))
+        )
+
+    def bounds(self) -> tuple[datetime | None, datetime | None]:
+        """Oldest and newest archived ``accepted_at`` for the org (not narrowed by the filters)."""
+        lower, upper = archive_store.bounds("consents", self.org_id)
+        if upper and self.as_of:
+            upper = min(upper, self.as_of)
+        return lower, upper
+
+    def rows(self, since: datetime | None = None, until: datetime | None = None) -> Iterator[SimpleNamespace]:
+        """Matching rows with ``accepted_at`` in ``[since, until)``, newest first."""
+        names = [column.key for column in EXPORT_COLUMNS]
+        for row in archive_store.iter_rows("consents", self.org_id, since, until, match=self._match):
+            revoked_at = row["revoked_at"]
+            yield SimpleNamespace(
+                **{name: row[name] for name in names},
+                revoked_at=revoked_at if not self.as_of or (revoked_at and revoked_at <= self.as_of) else None,
+            )
+
+
+def _export_order(row) -> tuple:
+    return row.accepted_at, row.id
+
+
+def _merge_archived(chunks: Iterable[list], archived: Iterable, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    """
+    Merge newest-first archived rows into a stream of newest-first chunks.
+
+    A row archived while the export ran is read from both sides; the copies
+    sort next to each other, so only the first one is kept.
+    """
+    archived = iter(archived)
+    first = next(archived, None)
+    if first is None:
+        yield from chunks
+        return
+    hot = (row for rows in chunks for row in rows)
+    merged = heapq.merge(hot, chain([first], archived), key=_export_order, reverse=True)
+    previous = None
+    chunk = []
+    for row in merged:
+        key = _export_order(row)
+        if key == previous:
+            continue
+        previous = key
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _open_read_only() -> Connection:
+    """Open a connection configured for read-only REPEATABLE READ transactions."""
+    return engine.connect().execution_options(
+        isolation_level="REPEATABLE READ",
+        postgresql_readonly=True,
+    )
+
+
+def _acquire_slices(wanted: int) -> int:
+    """Take up to ``wanted`` slice reader slots without waiting; return how many were granted."""
+    granted = 0
+    while granted < wanted and _slice_slots.acquire(blocking=False):
+        granted += 1
+    return granted
+
+
+def _release_slices(granted: int):
+    for _ in range(granted):
+        _slice_slots.release()
+
+
+def split_range(lower: datetime, upper: datetime, slices: int) -> list[tuple[datetime, datetime]]:
+    """
+    Split ``[lower, upper]`` into contiguous ranges, newest first.
+
+    Each range is ``(start, end)``; the first one includes ``upper`` and the rest
+    exclude their ``end`` so that no row falls into two slices.
+    """
+    if slices <= 1 or lower >= upper:
+        return [(lower, upper)]
+    step = (upper - lower) / slices
+    bounds = [upper - step * i for i in range(slices)] + [lower]
+    return [(bounds[i + 1], bounds[i]) for i in range(slices)]
+
+
+class ExportSnapshot:
+    """
+    A read-only REPEATABLE READ transaction pinned for the lifetime of an export.
+
+    The snapshot is taken eagerly on construction so ``snapshot_at`` can be sent
+    in the response headers before the first chunk is streamed. The connection
+    is released once the rows have been consumed, or by ``close()``, which the
+    export responses also run as a background task in case streaming never
+    starts.
+    """
+
+    def __init__(self):
+        self.conn: Connection = _open_read_only()
+        self.snapshot_id: str | None = None
+        try:
+            self.conn.begin()
+            # The first statement of the transaction fixes its snapshot.
+            self.snapshot_at: datetime = self.conn.execute(
+                text("SELECT transaction_timestamp()")
+            ).scalar_one()
+        except Exception:
+            self.conn.close()
+            raise
+
+    def iter_chunks(self, stmt, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list[Row]]:
+        """Stream result rows in chunks through a server-side cursor, then release the connection."""
+        try:
+            result = self.conn.execute(stmt.execution_options(yield_per=chunk_size))
+            for partition in result.partitions():
+                yield partition
+        finally:
+            self.close()
+
+    def iter_rendered(
+        self,
+        stmt,
+        render: Callable[[list[Row]], str],
+        slices: int = 1,
+        archived: ArchivedExport | None = None,
+    ) -> Iterator[str]:
+        """
+        Render the export chunk by chunk, merging in ``archived`` rows.
+
+        With ``slices`` > 1 the ``accepted_at`` range is read concurrently on
+        separate connections and the sorted parts are concatenated in order.
+        The slice count is clamped to the reader slots free at that moment.
+        """
+        granted = _acquire_slices(min(slices, settings.export_max_parallel_slices)) if slices > 1 else 0
+        if granted <= 1:
+            _release_slices(granted)
+            archived_rows = archived.rows() if archived else ()
+            for rows in _merge_archived(self.iter_chunks(stmt), archived_rows):
+                yield render(rows)
+            return
+        try:
+            yield from self._iter_parallel(stmt, render, granted, archived)
+        finally:
+            _release_slices(granted)
+
+    def _iter_parallel(self, stmt, render, slices: int, archived: ArchivedExport | None) -> Iterator[str]:
+        """Read ``accepted_at`` slices on a thread pool and stream the parts in order."""
+        try:
+            self.snapshot_id = self.conn.execute(text("SELECT pg_export_snapshot()")).scalar_one()
+            scope = stmt.order_by(None).subquery()
+            lower, upper = self.conn.execute(
+                select(func.min(scope.c.accepted_at), func.max(scope.c.accepted_at))
+            ).one()
+            if archived:
+                archived_lower, archived_upper = archived.bounds()
+                if archived_lower is not None:
+                    lower = min(lower or archived_lower, archived_lower)
+                    upper = max(upper or archived_upper, archived_upper)
+            if lower is None:
+                return
+
+            ranges = split_range(lower, upper, slices)
+            cancelled = threading.Event()
+            pool = ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="export")
+            parts = [
+                pool.submit(self._read_slice, stmt, start, end, i == 0, render, archived, cancelled)
+                for i, (start, end) in enumerate(ranges)
+            ]
+            try:
+                for part in parts:
+                    spool = part.result()
+                    spool.seek(0)
+                    while chunk := spool.read(EXPORT_READ_BYTES):
+                        yield chunk
+            finally:
+                # Stop the remaining workers early if the client went away
+                cancelled.set()
+                pool.shutdown(wait=True, cancel_futures=True)
+                for part in parts:
+                    if not part.cancelled() and part.exception() is None:
+                        part.result().close()
+        finally:
+            self.close()
+
+    def _read_slice(self, stmt, start, end, include_end, render, archived, cancelled):
+        """Read one ``accepted_at`` slice under the exported snapshot into a spooled file."""
+        if not _SNAPSHOT_ID_RE.match(self.snapshot_id or ""):
+            raise ValueError(f"Invalid export snapshot id: {self.snapshot_id!r}")
+
+        upper = Consent.accepted_at <= end if include_end else Consent.accepted_at < end
+        slice_stmt = stmt.where(Consent.accepted_at >= start, upper)
+        # The newest slice is open-ended: nothing is newer than the overall upper bound
+        slice_archived = archived.rows(start, None if include_end else end) if archived else ()
+        spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES, mode="w+", encoding="utf-8")
+        try:
+            with _open_read_only() as conn:
+                with conn.begin():
+                    # Must be the first statement of the transaction; utility
+                    # statements cannot take bound parameters.
+                    conn.execute(text(f"SET TRANSACTION SNAPSHOT '{self.snapshot_id}'"))
+                    result = conn.execute(slice_stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+                    for rows in _merge_archived(result.partitions(), slice_archived):
+                        if cancelled.is_set():
+                            break
+                        spool.write(render(rows))
+        except Exception:
+            spool.close()
+            raise
+        return spool
+
+    def close(self):
+        """Roll back the read-only transaction and return the connection to the pool."""
+        if not self.conn.closed:
+            self.conn.close()
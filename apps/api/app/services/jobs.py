@@ -0,0 +1,56 @@
+"""Background jobs and their schedules (run by ``app.services.scheduler``)."""
+from app.config import settings
+from app.services.archive_service import run_archive
+from app.services.audit_chain import checkpoint_audit_chains
+from app.services.audit_partitions import apply_audit_retention, ensure_audit_partitions
+from app.services.consent_breakdowns import refresh_consent_breakdowns
+from app.services.org_counters import reconcile_org_counters
+from app.services.rollups import refresh_rollups
+from app.services.scheduler import CronTrigger, IntervalTrigger, scheduler
+from app.services.subject_sketches import refresh_subject_sketches
+
+
+def register_jobs():
+    """Register every job with the scheduler (idempotent)."""
+    if scheduler.jobs:
+        return
+    scheduler.add_job(
+        "refresh_rollups", refresh_rollups,
+        IntervalTrigger(settings.rollup_interval_seconds, jitter=5),
+        "Advance hourly/daily rollups to now minus ROLLUP_LAG_SECONDS",
+    )
+    scheduler.add_job(
+        "refresh_subject_sketches", refresh_subject_sketches,
+        IntervalTrigger(settings.rollup_interval_seconds, jitter=5),
+        "Fold newly accepted consents into the daily subject sketches",
+    )
+    scheduler.add_job(
+        "reconcile_org_counters", reconcile_org_counters,
+        IntervalTrigger(settings.org_counter_reconcile_seconds, jitter=60),
+        "Recount per-org counters and correct drift",
+    )
+    scheduler.add_job(
+        "refresh_consent_breakdowns", refresh_consent_breakdowns,
+        IntervalTrigger(settings.consent_breakdown_refresh_seconds, jitter=30),
+        "Refresh the consent purpose / user agent materialized views concurrently",
+    )
+    scheduler.add_job(
+        "checkpoint_audit_chains", checkpoint_audit_chains,
+        IntervalTrigger(settings.audit_checkpoint_interval_seconds, jitter=60),
+        "Verify and checkpoint audit hash chains that moved",
+    )
+    scheduler.add_job(
+        "ensure_audit_partitions", ensure_audit_partitions,
+        CronTrigger("10 0 * * *", jitter=300),
+        "Create upcoming monthly audit_logs partitions",
+    )
+    scheduler.add_job(
+        "audit_retention", apply_audit_retention,
+        CronTrigger("30 2 * * *", jitter=600),
+        "Detach expired audit partitions and purge per-org leftovers",
+    )
+    scheduler.add_job(
+        "archive_cold_data", run_archive,
+        CronTrigger("30 3 * * *", jitter=600),
+        "Move old audit logs and revoked consents to the cold archive (needs ARCHIVE_AFTER_DAYS)",
+    )
@@ -0,0 +1,83 @@
+"""In-process metrics registry.
+
+Counters, gauges and timing summaries are kept per worker process and exposed
+as JSON on ``GET /metrics``.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Number of recent samples kept per timing for percentile estimates
+TIMING_SAMPLES = 1024
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, dict] = {}
+
+    def incr(self, name: str, value: int = 1):
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        """Set a gauge to its current value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        """Record a duration sample."""
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = {"count": 0, "total": 0.0, "max": 0.0, "samples": deque(maxlen=TIMING_SAMPLES)}
+                self._timings[name] = timing
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+            timing["samples"].append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block and record it under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable view of all metrics (timings in milliseconds)."""
+        with self._lock:
+            timings = {}
+            for name, timing in self._timings.items():
+                samples = sorted(timing["samples"])
+                timings[name] = {
+                    "count": timing["count"],
+                    "avg_ms": round(timing["total"] / timing["count"] * 1000, 3),
+                    "max_ms": round(timing["max"] * 1000, 3),
+                    "p50_ms": round(_percentile(samples, 0.50) * 1000, 3),
+                    "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of pre-sorted samples."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+metrics = Metrics()
@@ -0,0 +1,165 @@
+"""Per-organization counters for dashboard summaries.
+
+``org_counters`` holds one row per org with the current number of consents,
+revoked consents, DSARs and audit events, so summaries are a primary-key
+lookup instead of ``COUNT(*)`` scans. Writers apply deltas in the same
+transaction as the rows they count: consent and DSAR routes bump their
+counter directly, audit writers add one delta per org for a whole batch.
+
+Counters cover everything an org still holds, hot rows and the cold archive
+alike, so archiving leaves them unchanged while retention (purge, partition
+detach) subtracts what it removes. Anything that bypasses these paths, such
+as manual SQL, is corrected by ``reconcile_org_counters``.
+"""
+from collections import Counter
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import AuditLog, Consent, DataRightRequest, OrgCounter, engine
+from app.services.archive_service import archive_store
+from app.services.response_cache import dashboard_cache
+
+COUNTER_COLUMNS = ("consents", "consents_revoked", "dsars", "audit_events")
+
+UPSERT_SQL = text(
+    "INSERT INTO org_counters (org_id, consents, consents_revoked, dsars, audit_events, version, updated_at) "
+    "VALUES (:org_id, :consents, :consents_revoked, :dsars, :audit_events, 1, now()) "
+    "ON CONFLICT (org_id) DO UPDATE SET "
+    "consents = org_counters.consents + EXCLUDED.consents, "
+    "consents_revoked = org_counters.consents_revoked + EXCLUDED.consents_revoked, "
+    "dsars = org_counters.dsars + EXCLUDED.dsars, "
+    "audit_events = org_counters.audit_events + EXCLUDED.audit_events, "
+    "version = org_counters.version + 1, updated_at = now()"
+)
+
+
+def apply_counter_deltas(conn: Connection, deltas: dict[UUID, dict[str, int]]):
+    """Add deltas to org counters inside the caller's transaction (rows locked in org id order)."""
+    params = [
+        {"org_id": org_id, **{column: delta.get(column, 0) for column in COUNTER_COLUMNS}}
+        for org_id, delta in sorted(deltas.items(), key=lambda item: str(item[0]))
+        if any(delta.values())
+    ]
+    if params:
+        conn.execute(UPSERT_SQL, params)
+        dashboard_cache.invalidate_on_commit(conn, [row["org_id"] for row in params])
+
+
+def bump_counters(db: Session, org_id: UUID, **deltas: int):
+    """Apply deltas for one org in the session's current transaction (commit is up to the caller)."""
+    apply_counter_deltas(db.connection(), {org_id: deltas})
+
+
+def count_audit_rows(conn: Connection, rows: list[dict]):
+    """Count a batch of audit rows, one counter update per org."""
+    per_org = Counter(row["org_id"] for row in rows)
+    apply_counter_deltas(conn, {org_id: {"audit_events": n} for org_id, n in per_org.items()})
+
+
+def touch_org(db: Session, org_id: UUID):
+    """Bump an org's version for a change that moves no counter (e.g. a DSAR status update)."""
+    conn = db.connection()
+    conn.execute(UPSERT_SQL, {"org_id": org_id, **dict.fromkeys(COUNTER_COLUMNS, 0)})
+    dashboard_cache.invalidate_on_commit(conn, [org_id])
+
+
+def change_version(db: Session, org_id: UUID | None) -> tuple[str, datetime | None]:
+    """
+    Version token and last change time of an org's data, or of all orgs for None.
+
+    The token changes whenever a counter row is written, so it identifies the
+    current state of the org's consents, DSARs and audit log.
+    """
+    if org_id:
+        row = db.execute(
+            select(OrgCounter.version, OrgCounter.updated_at).where(OrgCounter.org_id == org_id)
+        ).first()
+        return (str(row.version), row.updated_at) if row else ("0", None)
+    count, total, updated_at = db.execute(
+        select(func.count(), func.coalesce(func.sum(OrgCounter.version), 0), func.max(OrgCounter.updated_at))
+    ).one()
+    return f"{count}.{total}", updated_at
+
+
+def get_counters(db: Session, org_id: UUID) -> dict[str, int]:
+    """Counters of one org (zeros if it has none yet)."""
+    row = db.get(OrgCounter, org_id)
+    return {column: getattr(row, column) if row else 0 for column in COUNTER_COLUMNS}
+
+
+def total_counters(db: Session) -> dict[str, int]:
+    """Counters summed over all orgs."""
+    row = db.execute(select(*(func.coalesce(func.sum(getattr(OrgCounter, c)), 0) for c in COUNTER_COLUMNS))).one()
+    return {column: int(value) for column, value in zip(COUNTER_COLUMNS, row)}
+
+
+def _exact_counts(conn: Connection, org_id: UUID) -> dict[str, int]:
+    def count(stmt):
+        return conn.execute(stmt).scalar_one()
+
+    def archived(kind):
+        return sum(entry["rows"] for entry in archive_store.entries(kind, org_id))
+
+    # Only revoked consents are archived
+    archived_consents = archived("consents")
+    return {
+        "consents": archived_consents + count(
+            select(func.count()).select_from(Consent).where(Consent.org_id == org_id)
+        ),
+        "consents_revoked": archived_consents + count(
+            select(func.count()).select_from(Consent).where(Consent.org_id == org_id, Consent.revoked_at.isnot(None))
+        ),
+        "dsars": count(select(func.count()).select_from(DataRightRequest).where(DataRightRequest.org_id == org_id)),
+        "audit_events": archived("audit_logs") + count(
+            select(func.count()).select_from(AuditLog).where(AuditLog.org_id == org_id)
+        ),
+    }
+
+
+def reconcile_org_counters(org_ids: list[UUID] | None = None) -> dict[str, dict]:
+    """
+    Recount orgs and correct counters that drifted.
+
+    Each org is recounted while its counter row is locked, so writers for
+    that org wait briefly instead of racing the recount. Returns the
+    corrections made, keyed by org id.
+    """
+    with engine.connect() as conn:
+        if org_ids is None:
+            org_ids = conn.execute(text("SELECT id FROM orgs")).scalars().all()
+
+    corrections = {}
+    for org_id in org_ids:
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO org_counters (org_id) VALUES (:org_id) ON CONFLICT DO NOTHING"),
+                {"org_id": org_id},
+            )
+            stored = conn.execute(
+                text(
+                    "SELECT consents, consents_revoked, dsars, audit_events FROM org_counters "
+                    "WHERE org_id = :org_id FOR UPDATE"
+                ),
+                {"org_id": org_id},
+            ).mappings().one()
+            exact = _exact_counts(conn, org_id)
+            drift = {column: exact[column] - stored[column] for column in COUNTER_COLUMNS if exact[column] != stored[column]}
+            if drift:
+                conn.execute(
+                    text(
+                        "UPDATE org_counters SET consents = :consents, consents_revoked = :consents_revoked, "
+                        "dsars = :dsars, audit_events = :audit_events, version = version + 1, updated_at = now() "
+                        "WHERE org_id = :org_id"
+                    ),
+                    {"org_id": org_id, **exact},
+                )
+                dashboard_cache.invalidate_on_commit(conn, [org_id])
+                corrections[str(org_id)] = drift
+        dashboard_cache.invalidate_committed()
+    if corrections:
+        print(f"⚠️  Corrected org counter drift for {len(corrections)} orgs")
+    return corrections
@@ -0,0 +1,209 @@
+"""Short-lived cache for dashboard responses.
+
+Dashboard views (``/dashboard/summary``, ``/dashboard/recent``, ``/orgs/{id}``)
+are loaded by many users of the same org and recomputed on every request.
+Responses are cached per (endpoint, org, role class, params) for
+``DASHBOARD_CACHE_TTL_SECONDS``, and concurrent misses for the same key wait
+for a single computation instead of all hitting the database.
+
+Writes invalidate rather than wait for the TTL: every consent, DSAR and audit
+write goes through the org counters, which mark the org as changed on the
+writing connection. When that transaction commits, the org's generation is
+bumped and its cached entries stop matching. The engine's commit event fires
+just before the database commit, so a read racing it could still store old
+data under the new generation; the generation is therefore bumped again once
+the commit has completed, from ``after_commit`` for ORM sessions and by an
+explicit ``invalidate_committed()`` after ``engine.begin()`` blocks. Views
+spanning all orgs (superadmin) use a global generation that every org write
+bumps too.
+
+With ``DASHBOARD_CACHE_NOTIFY`` the changed org ids are also sent with
+Postgres ``NOTIFY`` in the same transaction, and every worker runs a
+``LISTEN`` thread that applies them to its own cache.
+"""
+import threading
+import time
+from typing import Any, Callable
+from uuid import UUID
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.services.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+NOTIFY_CHANNEL = "dashboard_cache"
+
+# Generation scope of views that span all orgs
+GLOBAL_SCOPE = "*"
+
+# Connection.info key holding org ids changed by the current transaction
+PENDING_KEY = "dashboard_cache_pending"
+
+
+class _Flight:
+    """One in-progress computation that concurrent misses wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class ResponseCache:
+    """Per-worker TTL cache with single-flight misses and per-org generations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = TTLCache(settings.dashboard_cache_max_entries)  # key -> (generation, value)
+        self._generations: dict[str, int] = {}
+        self._inflight: dict[tuple, _Flight] = {}
+        self._listener: threading.Thread | None = None
+        self._stopping = threading.Event()
+        # Org ids whose commit is in progress on each thread
+        self._committing = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.dashboard_cache_ttl_seconds > 0
+
+    @staticmethod
+    def _scope(org_id: UUID | None) -> str:
+        return str(org_id) if org_id else GLOBAL_SCOPE
+
+    def get_or_compute(self, key: tuple, org_id: UUID | None, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for ``key`` or compute it once.
+
+        ``org_id`` is the org whose writes invalidate the value (None for
+        views over all orgs). Callers waiting on another request's
+        computation get its result, or its exception.
+        """
+        if not self.enabled:
+            return compute()
+
+        scope = self._scope(org_id)
+        with self._lock:
+            generation = self._generations.get(scope, 0)
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation:
+                metrics.incr("dashboard_cache.hit")
+                return entry[1]
+            flight_key = (key, generation)
+            flight = self._inflight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[flight_key] = _Flight()
+
+        if not leader:
+            metrics.incr("dashboard_cache.coalesced")
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.value
+
+        metrics.incr("dashboard_cache.miss")
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            # Stored under the generation seen before computing, so a write
+            # that committed meanwhile leaves the entry already stale.
+            self._entries.set(key, (generation, flight.value), time.monotonic() + settings.dashboard_cache_ttl_seconds)
+            return flight.value
+        finally:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+            flight.done.set()
+
+    def invalidate(self, org_ids):
+        """Drop cached views of these orgs (and every view over all orgs)."""
+        with self._lock:
+            for scope in {*(self._scope(org_id) for org_id in org_ids), GLOBAL_SCOPE}:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+        metrics.incr("dashboard_cache.invalidations")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def invalidate_on_commit(self, conn: Connection, org_ids):
+        """Invalidate these orgs once the connection's transaction commits."""
+        org_ids = [str(org_id) for org_id in org_ids]
+        if not org_ids:
+            return
+        conn.info.setdefault(PENDING_KEY, set()).update(org_ids)
+        if settings.dashboard_cache_notify:
+            conn.execute(
+                text("SELECT pg_notify(:channel, org_id) FROM unnest(CAST(:org_ids AS text[])) AS org_id"),
+                {"channel": NOTIFY_CHANNEL, "org_ids": sorted(org_ids)},
+            )
+
+    def invalidate_committing(self, org_ids):
+        """Invalidate orgs as their commit starts, and again from ``invalidate_committed()``."""
+        self.invalidate(org_ids)
+        self._committing.__dict__.setdefault("org_ids", set()).update(org_ids)
+
+    def invalidate_committed(self):
+        """Invalidate orgs again once this thread's commit has completed."""
+        org_ids = self._committing.__dict__.pop("org_ids", None)
+        if org_ids:
+            self.invalidate(org_ids)
+
+    def start(self):
+        """Start the LISTEN thread when cross-worker invalidation is enabled."""
+        if not settings.dashboard_cache_notify or self._listener:
+            return
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="dashboard-cache-listen", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        if not self._listener:
+            return
+        self._stopping.set()
+        self._listener.join(5)
+        self._listener = None
+
+    def _listen(self):
+        import psycopg
+
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stopping.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    # Anything written while disconnected was missed
+                    self.clear()
+                    while not self._stopping.is_set():
+                        org_ids = {n.payload for n in conn.notifies(timeout=1.0)}
+                        if org_ids:
+                            self.invalidate(org_ids)
+            except Exception as e:
+                print(f"⚠️  Dashboard cache listener error, reconnecting: {e}")
+                self._stopping.wait(5)
+
+
+dashboard_cache = ResponseCache()
+
+
+@event.listens_for(engine, "commit")
+def _invalidate_committing(conn):
+    org_ids = conn.info.pop(PENDING_KEY, None)
+    if org_ids:
+        dashboard_cache.invalidate_committing(org_ids)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session):
+    dashboard_cache.invalidate_committed()
+
+
+@event.listens_for(engine, "rollback")
+def _discard_rolled_back(conn):
+    conn.info.pop(PENDING_KEY, None)
@@ -0,0 +1,295 @@
+"""Hourly and daily event rollups per org.
+
+Dashboard time series read ``rollup_hourly`` / ``rollup_daily`` instead of
+grouping ``audit_logs``, ``consents`` and ``data_right_requests`` on every
+request; all-time totals come from ``app.services.org_counters``. Each row
+counts the events of one metric and dimension in a bucket:
+
+=================  ==============  ==========================================
+metric             dimension       event
+=================  ==============  ==========================================
+audit              action          audit row written
+consents           purpose         consent recorded (accepted_at)
+consents_revoked   purpose         consent revoked (revoked_at)
+dsars              request_type    data rights request submitted
+dsar_status        status          +1 into / -1 out of a status (from audit)
+=================  ==============  ==========================================
+
+``refresh_rollups`` aggregates each source from its watermark up to
+``now() - lag`` and advances the watermark in the same transaction. Sources
+are read by event timestamp, which is assigned before the row commits (audit
+rows are stamped in Python and may wait in the sink's buffer), so the lag has
+to cover that delay: it is ``ROLLUP_LAG_SECONDS``, but never less than the
+sink flush interval plus a retry budget when the sink is enabled.
+
+A row that commits more than the lag after its timestamp (a stalled sink, a
+very long transaction) is already behind the watermark and is never counted in
+the rollups; org counters still count it. Rows deleted later (archive,
+retention) stay counted.
+"""
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import func, literal, select, text, union_all
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import Consent, RollupDaily, RollupHourly, RollupWatermark, engine
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+GRANULARITIES = {"hour": RollupHourly, "day": RollupDaily}
+
+# Time a sink batch may spend in a failed COPY and its row-by-row retry
+SINK_RETRY_BUDGET_SECONDS = 30
+
+# Each source yields (org_id, metric, dimension, ts, n) for rows in (:lower, :upper]
+ROLLUP_SOURCES = {
+    "audit_logs": """
+        SELECT a.org_id, e.metric, e.dimension, a.created_at AS ts, e.n
+        FROM audit_logs a
+        CROSS JOIN LATERAL (VALUES
+            ('audit', a.action, 1),
+            ('dsar_status', CASE
+                WHEN a.entity_type = 'data_right_request' AND a.action = 'submitted' THEN 'pending'
+                WHEN a.entity_type = 'data_right_request' AND a.action LIKE 'marked\\_%'
+                    THEN a.metadata_json ->> 'new_status'
+             END, 1),
+            ('dsar_status', CASE
+                WHEN a.entity_type = 'data_right_request' AND a.action LIKE 'marked\\_%'
+                    THEN a.metadata_json ->> 'old_status'
+             END, -1)
+        ) AS e(metric, dimension, n)
+        WHERE a.created_at > :lower AND a.created_at <= :upper AND e.dimension IS NOT NULL
+    """,
+    "consents": """
+        SELECT org_id, 'consents', purpose, accepted_at, 1 FROM consents
+        WHERE accepted_at > :lower AND accepted_at <= :upper
+    """,
+    "consent_revocations": """
+        SELECT org_id, 'consents_revoked', purpose, revoked_at, 1 FROM consents
+        WHERE revoked_at > :lower AND revoked_at <= :upper
+    """,
+    "data_right_requests": """
+        SELECT org_id, 'dsars', request_type, created_at, 1 FROM data_right_requests
+        WHERE created_at > :lower AND created_at <= :upper
+    """,
+}
+
+# Source scanned in one pass into both granularities; hourly deltas are
+# re-bucketed into UTC days rather than scanning the source twice.
+ROLLUP_SQL = """
+    WITH delta AS (
+        SELECT org_id, metric, dimension, date_trunc('hour', ts, 'UTC') AS bucket, sum(n) AS count
+        FROM ({source}) AS events (org_id, metric, dimension, ts, n)
+        GROUP BY 1, 2, 3, 4
+    ),
+    hourly AS (
+        INSERT INTO rollup_hourly AS r (org_id, metric, dimension, bucket, count)
+        SELECT org_id, metric, dimension, bucket, count FROM delta
+        ON CONFLICT (org_id, metric, dimension, bucket) DO UPDATE SET count = r.count + EXCLUDED.count
+        RETURNING 1
+    )
+    INSERT INTO rollup_daily AS r (org_id, metric, dimension, bucket, count)
+    SELECT org_id, metric, dimension, date_trunc('day', bucket, 'UTC'), sum(count) FROM delta
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (org_id, metric, dimension, bucket) DO UPDATE SET count = r.count + EXCLUDED.count
+"""
+
+def refresh_rollup_source(source: str, upper: datetime) -> bool:
+    """
+    Aggregate one source from its watermark up to ``upper``.
+
+    Returns False if another worker is refreshing the same source right now.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO rollup_watermarks (source, watermark) VALUES (:source, :epoch) ON CONFLICT DO NOTHING"),
+            {"source": source, "epoch": EPOCH},
+        )
+        lower = conn.execute(
+            text("SELECT watermark FROM rollup_watermarks WHERE source = :source FOR UPDATE SKIP LOCKED"),
+            {"source": source},
+        ).scalar()
+        if lower is None:
+            return False
+        if upper > lower:
+            conn.execute(text(ROLLUP_SQL.format(source=ROLLUP_SOURCES[source])), {"lower": lower, "upper": upper})
+            conn.execute(
+                text("UPDATE rollup_watermarks SET watermark = :upper, updated_at = now() WHERE source = :source"),
+                {"source": source, "upper": upper},
+            )
+    return True
+
+
+def rollup_lag() -> timedelta:
+    """How far behind now() the watermarks stop, covering rows stamped but not yet committed."""
+    lag = settings.rollup_lag_seconds
+    if settings.audit_sink_enabled:
+        lag = max(lag, settings.audit_sink_flush_interval_ms / 1000 + SINK_RETRY_BUDGET_SECONDS)
+    return timedelta(seconds=lag)
+
+
+def refresh_rollups() -> dict[str, bool]:
+    """Advance every rollup source to ``now() - rollup_lag()``."""
+    upper = datetime.now(UTC) - rollup_lag()
+    return {source: refresh_rollup_source(source, upper) for source in ROLLUP_SOURCES}
+
+
+def timeseries(
+    db: Session,
+    metric: str,
+    granularity: str,
+    since: datetime,
+    until: datetime,
+    org_id: UUID | None = None,
+    dimension: str | None = None,
+) -> list[dict]:
+    """Rollup counts per bucket and dimension in ``[since, until)``, oldest first."""
+    table = GRANULARITIES[granularity]
+    stmt = (
+        select(table.bucket, table.dimension, func.sum(table.count))
+        .where(table.metric == metric, table.bucket >= since, table.bucket < until)
+        .group_by(table.bucket, table.dimension)
+        .order_by(table.bucket, table.dimension)
+    )
+    if org_id:
+        stmt = stmt.where(table.org_id == org_id)
+    if dimension:
+        stmt = stmt.where(table.dimension == dimension)
+    return [
+        {"bucket": bucket.isoformat(), "dimension": dim, "count": int(count)}
+        for bucket, dim, count in db.execute(stmt)
+    ]
+
+
+CONSENT_GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}
+
+# Upper bound on buckets per series, so hourly ranges stay a sensible size
+MAX_CONSENT_BUCKETS = 2000
+
+
+def as_utc(ts: datetime) -> datetime:
+    """``ts`` as an aware UTC datetime; naive values are taken to be UTC already."""
+    return ts.astimezone(UTC) if ts.tzinfo else ts.replace(tzinfo=UTC)
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Start of the UTC bucket containing ``ts`` (weeks start on Monday, like Postgres)."""
+    ts = as_utc(ts)
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday()) if granularity == "week" else day
+
+
+def _consent_tail(granularity: str, org_id: UUID | None, purpose: str | None):
+    """Consent events past the rollup watermarks, bucketed like the rollups."""
+    parts = []
+    for source, metric, ts_col in (
+        ("consents", "consents", Consent.accepted_at),
+        ("consent_revocations", "consents_revoked", Consent.revoked_at),
+    ):
+        watermark = func.coalesce(
+            select(RollupWatermark.watermark).where(RollupWatermark.source == source).scalar_subquery(),
+            EPOCH,
+        )
+        bucket = func.date_trunc(granularity, ts_col, "UTC")
+        stmt = (
+            select(bucket.label("bucket"), Consent.purpose.label("dimension"), literal(metric).label("metric"), func.count())
+            .where(ts_col > watermark)
+            .group_by(bucket, Consent.purpose)
+        )
+        if org_id:
+            stmt = stmt.where(Consent.org_id == org_id)
+        if purpose:
+            stmt = stmt.where(Consent.purpose == purpose)
+        parts.append(stmt)
+    return union_all(*parts)
+
+
+def consent_timeseries(
+    db: Session,
+    granularity: str,
+    since: datetime,
+    until: datetime,
+    org_id: UUID | None = None,
+    purpose: str | None = None,
+) -> dict:
+    """
+    Consents granted and revoked per bucket and purpose in ``[since, until)``.
+
+    Hours come from the hourly rollups, days and weeks from the daily ones.
+    ``active`` is the number of consents granted and not yet revoked at the
+    end of each bucket, carried forward from everything before the range.
+    Events newer than the rollup watermarks are counted live, so the last
+    bucket is current.
+    """
+    since = bucket_start(since, granularity)
+    until = as_utc(until)
+    step = CONSENT_GRANULARITIES[granularity]
+    buckets = []
+    bucket = since
+    while bucket < until:
+        buckets.append(bucket)
+        bucket += step
+    if len(buckets) > MAX_CONSENT_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_CONSENT_BUCKETS} {granularity} buckets")
+
+    consent_metrics = ("consents", "consents_revoked")
+    table = RollupHourly if granularity == "hour" else RollupDaily
+    bucket_expr = func.date_trunc("week", table.bucket, "UTC") if granularity == "week" else table.bucket
+
+    def rollup_counts(model, bucket_col, *conditions):
+        stmt = (
+            select(bucket_col.label("bucket"), model.dimension, model.metric, func.sum(model.count))
+            .where(model.metric.in_(consent_metrics), *conditions)
+            .group_by(bucket_col, model.dimension, model.metric)
+        )
+        if org_id:
+            stmt = stmt.where(model.org_id == org_id)
+        if purpose:
+            stmt = stmt.where(model.dimension == purpose)
+        return stmt
+
+    # Everything before the range only contributes to the starting active count:
+    # whole days from the daily rollups, the rest of since's day from hourly.
+    since_day = bucket_start(since, "day")
+    rows = db.execute(union_all(
+        rollup_counts(table, bucket_expr, table.bucket >= since, table.bucket < until),
+        rollup_counts(RollupDaily, literal(EPOCH), RollupDaily.bucket < since_day),
+        rollup_counts(RollupHourly, literal(EPOCH), RollupHourly.bucket >= since_day, RollupHourly.bucket < since),
+        _consent_tail(granularity, org_id, purpose),
+    )).all()
+
+    baseline: dict[str, int] = defaultdict(int)
+    counts: dict[tuple, dict[str, int]] = defaultdict(lambda: {"consents": 0, "consents_revoked": 0})
+    for bucket, dimension, metric, count in rows:
+        sign = 1 if metric == "consents" else -1
+        if bucket < since:
+            baseline[dimension] += sign * int(count)
+        elif bucket < until:
+            counts[(bucket, dimension)][metric] += int(count)
+
+    purposes = sorted(set(baseline) | {dimension for _, dimension in counts})
+    series = []
+    total = [{"bucket": b.isoformat(), "granted": 0, "revoked": 0, "net": 0, "active": 0} for b in buckets]
+    for dimension in purposes:
+        active = baseline[dimension]
+        points = []
+        for i, bucket in enumerate(buckets):
+            bucket_counts = counts.get((bucket, dimension), {"consents": 0, "consents_revoked": 0})
+            granted, revoked = bucket_counts["consents"], bucket_counts["consents_revoked"]
+            active += granted - revoked
+            points.append({
+                "bucket": bucket.isoformat(),
+                "granted": granted,
+                "revoked": revoked,
+                "net": granted - revoked,
+                "active": active,
+            })
+            for key in ("granted", "revoked", "net", "active"):
+                total[i][key] += points[-1][key]
+        series.append({"purpose": dimension, "points": points})
+    return {"since": since.isoformat(), "series": series, "total": total}
@@ -0,0 +1,307 @@
+"""In-process scheduler for background jobs.
+
+Every API worker runs a scheduler thread, but only the leader runs jobs: the
+worker holding a Postgres session advisory lock on a dedicated connection,
+opened outside the SQLAlchemy pool so it never takes a pooled slot. If the
+leader dies, its connection drops, the lock is released and another worker
+takes over on its next attempt; a leader whose connection fails its periodic
+check steps down and competes again. Each run also takes a per-job advisory
+lock, so an on-demand run (``scripts/run_job.py``) never overlaps a scheduled
+one.
+
+Jobs have an interval or cron trigger (UTC) plus random jitter, never overlap
+themselves, and report run counts, failures and durations to the metrics
+registry as ``jobs.<name>.*``.
+"""
+import hashlib
+import random
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.db import engine
+from app.services.metrics import metrics
+
+LEADER_LOCK_NAME = "consentvault.scheduler"
+LEADER_RETRY_SECONDS = 15
+LEADER_CHECK_SECONDS = 30
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key for a name."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class IntervalTrigger:
+    """Run every ``seconds``, plus up to ``jitter`` seconds."""
+
+    def __init__(self, seconds: float, jitter: float = 0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds + random.uniform(0, self.jitter))
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+class CronTrigger:
+    """Five-field cron expression (minute hour day-of-month month day-of-week) in UTC, plus jitter."""
+
+    # Day of week 0-7, both 0 and 7 meaning Sunday
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+    def __init__(self, expression: str, jitter: float = 0):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.jitter = jitter
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high, name) for part, (name, low, high) in zip(parts, self.FIELDS)
+        )
+        # As in cron, a restricted day-of-month and day-of-week match if either does
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int, name: str) -> set[int]:
+        values = set()
+        for item in field.split(","):
+            spec, _, step = item.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = high
+            if not (low <= start <= end <= high):
+                raise ValueError(f"Cron {name} out of range: {item!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        if name == "weekday":
+            values = {value % 7 for value in values}
+        return values
+
+    def _day_matches(self, ts: datetime) -> bool:
+        day_ok = ts.day in self.days
+        weekday_ok = (ts.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_run(self, after: datetime) -> datetime:
+        ts = after.astimezone(UTC).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = ts + timedelta(days=366 * 5)
+        while ts < limit:
+            if ts.month not in self.months:
+                ts = (ts.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(ts):
+                ts = ts.replace(hour=0, minute=0) + timedelta(days=1)
+            elif ts.hour not in self.hours:
+                ts = ts.replace(minute=0) + timedelta(hours=1)
+            elif ts.minute not in self.minutes:
+                ts += timedelta(minutes=1)
+            else:
+                return ts + timedelta(seconds=random.uniform(0, self.jitter))
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def __str__(self):
+        return f"cron {self.expression}"
+
+
+class Job:
+    """A named callable with a trigger and its run state."""
+
+    def __init__(self, name: str, func: Callable, trigger: IntervalTrigger | CronTrigger, description: str = ""):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.description = description
+        self.next_run: datetime | None = None
+        self.running = False
+        self.last_started: datetime | None = None
+        self.last_duration: float | None = None
+        self.last_error: str | None = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "trigger": str(self.trigger),
+            "description": self.description,
+            "running": self.running,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_duration_seconds": self.last_duration,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """Leader-elected job runner; see the module docstring."""
+
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._leader_conn = None  # psycopg connection holding the leader lock
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_conn is not None
+
+    def add_job(self, name: str, func: Callable, trigger, description: str = "") -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already registered")
+        job = self.jobs[name] = Job(name, func, trigger, description)
+        return job
+
+    def run_job(self, name: str):
+        """
+        Run one job now in this thread, under its advisory lock.
+
+        Returns the job's result, or raises RuntimeError if the job is
+        already running elsewhere.
+        """
+        job = self.jobs[name]
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            key = advisory_key(f"consentvault.job.{name}")
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar():
+                metrics.incr(f"jobs.{name}.skipped")
+                raise RuntimeError(f"Job {name} is already running")
+            try:
+                return self._execute(job)
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+
+    def _execute(self, job: Job):
+        job.running = True
+        job.last_started = datetime.now(UTC)
+        start = time.perf_counter()
+        try:
+            result = job.func()
+            job.last_error = None
+            metrics.incr(f"jobs.{job.name}.runs")
+            return result
+        except Exception as e:
+            job.last_error = str(e)
+            metrics.incr(f"jobs.{job.name}.failures")
+            raise
+        finally:
+            job.last_duration = time.perf_counter() - start
+            job.running = False
+            metrics.observe(f"jobs.{job.name}", job.last_duration)
+
+    def _run_in_background(self, job: Job):
+        def target():
+            try:
+                self.run_job(job.name)
+            except Exception as e:
+                print(f"⚠️  Scheduled job {job.name} failed: {e}")
+            finally:
+                job.running = False
+
+        job.running = True
+        threading.Thread(target=target, name=f"job-{job.name}", daemon=True).start()
+
+    def _acquire_leadership(self) -> bool:
+        import psycopg
+
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg.connect(conninfo, autocommit=True, application_name="consentvault-scheduler")
+        try:
+            acquired = conn.execute(
+                "SELECT pg_try_advisory_lock(%s)", (advisory_key(LEADER_LOCK_NAME),)
+            ).fetchone()[0]
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._leader_conn = conn
+        metrics.gauge("scheduler.leader", 1)
+        print("✅ Scheduler leadership acquired")
+        return True
+
+    def _check_leadership(self) -> bool:
+        try:
+            self._leader_conn.execute("SELECT 1")
+            return True
+        except Exception as e:
+            print(f"⚠️  Scheduler lost its leader connection: {e}")
+            self._release_leadership()
+            return False
+
+    def _release_leadership(self):
+        conn, self._leader_conn = self._leader_conn, None
+        metrics.gauge("scheduler.leader", 0)
+        if conn is not None:
+            try:
+                conn.close()  # Session advisory locks end with the session
+            except Exception:
+                pass
+
+    def _loop(self):
+        next_check = 0.0
+        while not self._stopping.is_set():
+            try:
+                if not self.is_leader:
+                    if not self._acquire_leadership():
+                        self._stopping.wait(LEADER_RETRY_SECONDS)
+                        continue
+                    next_check = time.monotonic() + LEADER_CHECK_SECONDS
+                elif time.monotonic() >= next_check:
+                    if not self._check_leadership():
+                        continue
+                    next_check = time.monotonic() + LEADER_CHECK_SECONDS
+            except Exception as e:
+                print(f"⚠️  Scheduler could not reach the database: {e}")
+                self._stopping.wait(LEADER_RETRY_SECONDS)
+                continue
+
+            now = datetime.now(UTC)
+            for job in self.jobs.values():
+                if job.next_run is None:
+                    job.next_run = job.trigger.next_run(now)
+                elif job.next_run <= now:
+                    if job.running:
+                        metrics.incr(f"jobs.{job.name}.skipped")
+                    else:
+                        self._run_in_background(job)
+                    job.next_run = job.trigger.next_run(now)
+            wake = min((job.next_run for job in self.jobs.values()), default=now + timedelta(seconds=1))
+            self._stopping.wait(min(max((wake - datetime.now(UTC)).total_seconds(), 0.05), 1.0))
+
+    def start(self):
+        """Start the scheduler thread (idempotent)."""
+        with self._lock:
+            if self._thread:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop scheduling and give up leadership; running jobs finish in the background."""
+        with self._lock:
+            if not self._thread:
+                return
+            self._stopping.set()
+            self._thread.join(5)
+            self._thread = None
+            self._release_leadership()
+
+    def status(self) -> list[dict]:
+        return [job.status() for job in self.jobs.values()]
+
+
+scheduler = Scheduler()
@@ -0,0 +1,207 @@
+"""Distinct consenting subjects per org, purpose and period.
+
+``COUNT(DISTINCT subject)`` over months of consents is too expensive to run on
+demand, so consents are folded into a HyperLogLog sketch per org, purpose and
+UTC day (``subject_sketches``). Any range is answered by merging its daily
+sketches, which gives an approximate count with a relative standard error of
+``hll.STANDARD_ERROR``. Small ranges can be counted exactly instead.
+
+Sketches are updated in batches by ``refresh_subject_sketches``, which reads
+the consents accepted since its watermark (``rollup_watermarks``, lagging
+like the rollups) and rewrites each touched daily sketch once, so ingest
+never writes or locks a sketch row. Today's approximate counts therefore
+trail by up to one job interval plus the rollup lag. Adding a subject twice
+does not change a sketch, so overlapping runs and the backfill are harmless.
+
+A subject is the lower-cased ``subject_email`` (or legacy ``subject_id``).
+Sketches only grow: revoking or archiving a consent does not remove the
+subject from the days it consented on.
+"""
+from collections import defaultdict
+from datetime import UTC, date, datetime, time, timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import Consent, SubjectSketch, engine
+from app.services.archive_service import archive_store
+from app.services.rollups import rollup_lag
+from app.utils.hll import STANDARD_ERROR, HyperLogLog
+
+# Longest range the exact mode scans, and the longest counted exactly by default
+EXACT_MAX_DAYS = 92
+EXACT_AUTO_DAYS = 7
+
+SUBJECT_GRANULARITIES = ("total", "month", "day")
+
+SKETCH_WATERMARK = "subject_sketches"
+
+# Longest accepted_at range folded into sketches in one transaction
+SKETCH_STEP = timedelta(days=1)
+
+
+def subject_key(subject_email: str | None, subject_id: str | None = None) -> str | None:
+    """Normalized identity of a data subject, or None if the consent names none."""
+    subject = subject_email or subject_id
+    return subject.strip().lower() if subject else None
+
+
+def sketch_consents(conn: Connection, lower: datetime, upper: datetime) -> dict[tuple, HyperLogLog]:
+    """Sketches per (org, purpose, day) of the consents accepted in ``(lower, upper]``."""
+    sketches: dict[tuple, HyperLogLog] = defaultdict(HyperLogLog)
+    rows = conn.execute(
+        select(Consent.org_id, Consent.purpose, Consent.accepted_at, Consent.subject_email, Consent.subject_id)
+        .where(Consent.accepted_at > lower, Consent.accepted_at <= upper)
+        .execution_options(yield_per=5000)
+    )
+    for org_id, purpose, accepted_at, subject_email, subject_id in rows:
+        subject = subject_key(subject_email, subject_id)
+        if subject:
+            sketches[(org_id, purpose, accepted_at.astimezone(UTC).date())].add(subject)
+    return sketches
+
+
+def refresh_subject_sketches() -> int:
+    """
+    Fold consents accepted since the watermark into the daily sketches, one
+    step per transaction, up to ``now() - rollup_lag()``.
+
+    Returns the number of sketches updated (0 if another worker holds the watermark).
+    """
+    upper = datetime.now(UTC) - rollup_lag()
+    updated = 0
+    while True:
+        with engine.begin() as conn:
+            # Without a stored position, start just before the oldest consent
+            conn.execute(
+                text(
+                    "INSERT INTO rollup_watermarks (source, watermark) "
+                    "SELECT :source, coalesce(min(accepted_at) - interval '1 microsecond', :upper) FROM consents "
+                    "ON CONFLICT DO NOTHING"
+                ),
+                {"source": SKETCH_WATERMARK, "upper": upper},
+            )
+            lower = conn.execute(
+                text("SELECT watermark FROM rollup_watermarks WHERE source = :source FOR UPDATE SKIP LOCKED"),
+                {"source": SKETCH_WATERMARK},
+            ).scalar()
+            if lower is None or lower >= upper:
+                return updated
+            step_upper = min(upper, lower + SKETCH_STEP)
+            sketches = sketch_consents(conn, lower, step_upper)
+            for (org_id, purpose, day), sketch in sorted(sketches.items(), key=lambda item: str(item[0])):
+                merge_into_stored(conn, org_id, purpose, day, sketch)
+            conn.execute(
+                text("UPDATE rollup_watermarks SET watermark = :upper, updated_at = now() WHERE source = :source"),
+                {"source": SKETCH_WATERMARK, "upper": step_upper},
+            )
+            updated += len(sketches)
+
+
+def merge_into_stored(conn: Connection, org_id: UUID, purpose: str, day: date, sketch: HyperLogLog):
+    """Merge a whole sketch into the stored one (used by the backfill)."""
+    stored = conn.execute(
+        select(SubjectSketch.registers)
+        .where(SubjectSketch.org_id == org_id, SubjectSketch.purpose == purpose, SubjectSketch.day == day)
+        .with_for_update()
+    ).scalar()
+    if stored is None:
+        conn.execute(
+            SubjectSketch.__table__.insert(),
+            {"org_id": org_id, "purpose": purpose, "day": day, "registers": sketch.to_bytes()},
+        )
+        return
+    merged = HyperLogLog(stored)
+    merged.merge(sketch)
+    conn.execute(
+        SubjectSketch.__table__.update()
+        .where(SubjectSketch.org_id == org_id, SubjectSketch.purpose == purpose, SubjectSketch.day == day)
+        .values(registers=merged.to_bytes())
+    )
+
+
+def _period(day: date, granularity: str) -> str | None:
+    if granularity == "month":
+        return f"{day:%Y-%m}"
+    if granularity == "day":
+        return day.isoformat()
+    return None
+
+
+def approximate_subjects(
+    db: Session, org_id: UUID, since: date, until: date, granularity: str = "total", purpose: str | None = None
+) -> dict[tuple, int]:
+    """Estimated distinct subjects per (purpose, period) from the daily sketches in ``[since, until)``."""
+    stmt = select(SubjectSketch.purpose, SubjectSketch.day, SubjectSketch.registers).where(
+        SubjectSketch.org_id == org_id, SubjectSketch.day >= since, SubjectSketch.day < until
+    )
+    if purpose:
+        stmt = stmt.where(SubjectSketch.purpose == purpose)
+
+    merged: dict[tuple, HyperLogLog] = {}
+    for row_purpose, day, registers in db.execute(stmt.execution_options(yield_per=500)):
+        key = (row_purpose, _period(day, granularity))
+        if key in merged:
+            merged[key].merge(registers)
+        else:
+            merged[key] = HyperLogLog(registers)
+    return {key: sketch.count() for key, sketch in merged.items()}
+
+
+def exact_subjects(
+    db: Session, org_id: UUID, since: date, until: date, granularity: str = "total", purpose: str | None = None
+) -> dict[tuple, int]:
+    """Exact distinct subjects per (purpose, period) in ``[since, until)``, archived consents included."""
+    start = datetime.combine(since, time(), tzinfo=UTC)
+    end = datetime.combine(until, time(), tzinfo=UTC)
+    day = func.date(func.timezone("UTC", Consent.accepted_at))
+    stmt = (
+        select(Consent.purpose, day, Consent.subject_email, Consent.subject_id)
+        .distinct()
+        .where(Consent.org_id == org_id, Consent.accepted_at >= start, Consent.accepted_at < end)
+    )
+    if purpose:
+        stmt = stmt.where(Consent.purpose == purpose)
+
+    subjects: dict[tuple, set] = defaultdict(set)
+    for row_purpose, row_day, subject_email, subject_id in db.execute(stmt):
+        key = subject_key(subject_email, subject_id)
+        if key:
+            subjects[(row_purpose, _period(row_day, granularity))].add(key)
+
+    archived = archive_store.query(
+        "consents", org_id, since=start, until=end,
+        match=(lambda row: row["purpose"] == purpose) if purpose else None,
+        limit=None,
+    )
+    for row in archived:
+        key = subject_key(row.get("subject_email"), row.get("subject_id"))
+        if key:
+            row_day = row["accepted_at"].astimezone(UTC).date()
+            subjects[(row["purpose"], _period(row_day, granularity))].add(key)
+    return {key: len(values) for key, values in subjects.items()}
+
+
+def unique_subjects(
+    db: Session,
+    org_id: UUID,
+    since: date,
+    until: date,
+    granularity: str = "total",
+    purpose: str | None = None,
+    exact: bool = False,
+) -> dict:
+    """Distinct subjects per purpose (and period), exact or merged from sketches."""
+    if exact and until - since > timedelta(days=EXACT_MAX_DAYS):
+        raise ValueError(f"Exact counts are limited to {EXACT_MAX_DAYS} days")
+    counts = (exact_subjects if exact else approximate_subjects)(db, org_id, since, until, granularity, purpose)
+    return {
+        "mode": "exact" if exact else "approximate",
+        "standard_error": 0.0 if exact else round(STANDARD_ERROR, 5),
+        "results": [
+            {"purpose": row_purpose, "period": period, "unique_subjects": count}
+            for (row_purpose, period), count in sorted(counts.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        ],
+    }
@@ -1,8 +1,8 @@
 """Audit logging utility for tracking all major platform and org events.
 
 DEPRECATED: This function is kept for backward compatibility with legacy scripts.
-For new code, use app.services.audit_service.log_event() instead, which properly
-handles org_id resolution.
+For new code, use app.services.audit_service.log_event() with an AuditContext
+instead.
 
 System-level operations (like creating users or promoting to superadmin) that
 don't have an org context will skip audit logging, as they wouldn't be visible
@@ -11,7 +11,7 @@ to org admins anyway.
 from uuid import UUID
 
 from app.db import SessionLocal
-from app.services.audit_service import log_event
+from app.services.audit_service import AuditContext, log_event
 
 
 def record_audit(event_type: str, actor: str, details: dict | None = None):
@@ -41,16 +41,9 @@ def record_audit(event_type: str, actor: str, details: dict | None = None):
     
     db = SessionLocal()
     try:
-        # Create a simple actor object
-        class SimpleActor:
-            def __init__(self, email):
-                self.email = email
-        
-        actor_obj = SimpleActor(actor)
-        
         log_event(
             db=db,
-            actor=actor_obj,
+            context=AuditContext.system(actor),
             action=event_type,
             entity_type=details.get("entity_type", "platform"),
             entity_id=details.get("entity_id"),
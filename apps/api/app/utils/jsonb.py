@@ -0,0 +1,37 @@
+"""Python equivalents of PostgreSQL JSONB operators, for rows read outside Postgres."""
+
+
+def jsonb_contains(document, fragment) -> bool:
+    """
+    Whether ``document @> fragment`` would hold in PostgreSQL.
+
+    Objects contain objects whose keys they all contain, arrays contain arrays
+    whose every element they contain (in any order), and scalars must be equal.
+    As in Postgres, a top-level array also contains a bare primitive element.
+    """
+    if isinstance(document, list) and not isinstance(fragment, (dict, list)):
+        return any(_scalar_equal(item, fragment) for item in document)
+    return _contains(document, fragment)
+
+
+def _contains(document, fragment) -> bool:
+    if isinstance(fragment, dict):
+        return isinstance(document, dict) and all(
+            key in document and _contains(document[key], value) for key, value in fragment.items()
+        )
+    if isinstance(fragment, list):
+        return isinstance(document, list) and all(
+            any(_contains(item, wanted) for item in document) for wanted in fragment
+        )
+    return _scalar_equal(document, fragment)
+
+
+def _scalar_equal(a, b) -> bool:
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return False
+    # JSON numbers compare by value, but true is not 1
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a is b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    return type(a) is type(b) and a == b
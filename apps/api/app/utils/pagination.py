@@ -0,0 +1,26 @@
+"""Opaque keyset cursors for paginated list endpoints.
+
+A cursor encodes the ``(created_at, id)`` of the last row of a page. The next
+page is fetched with a row-value comparison against it, which a composite
+index on ``(..., created_at, id)`` serves as a plain range scan: deep pages
+cost the same as the first one.
+"""
+import base64
+from datetime import datetime
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode a ``(created_at, id)`` position as an opaque URL-safe token."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a token produced by ``encode_cursor``. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,53 @@
+"""Bounded, thread-safe TTL cache for per-worker lookups.
+
+Each entry carries its own deadline on the cache's clock (``time.monotonic``
+unless the caller's expiry times come from elsewhere, e.g. a token's ``exp``
+on ``time.time``). Expired entries are dropped when read, and the least
+recently used entries are evicted beyond ``max_entries``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """LRU of key -> value, each entry valid until its own deadline."""
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """The value cached under ``key``, or ``default`` if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        """Cache ``value`` until ``expires_at`` on the cache's clock."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate: Callable[[Hashable, Any], bool]):
+        """Drop every entry for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(key, value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,42 @@
+"""add audit log keyset pagination indexes
+
+Revision ID: 3f1c9a7d2b64
+Revises: a2af91b51128
+Create Date: 2026-10-19 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, Sequence[str], None] = 'a2af91b51128'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_audit_logs_org_created", ["org_id", "created_at", "id"]),
+    ("ix_audit_logs_org_action_created", ["org_id", "action", "created_at", "id"]),
+    ("ix_audit_logs_org_entity_created", ["org_id", "entity_type", "entity_id", "created_at", "id"]),
+    ("ix_audit_logs_org_user_created", ["org_id", "user_email", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """
+    Add composite (org_id, <filter>, created_at, id) indexes on audit_logs.
+
+    These serve the filtered keyset pagination of /audit and /audit/logs as
+    index range scans. Built concurrently so writers are not blocked.
+    """
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'audit_logs', columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Drop the keyset pagination indexes."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='audit_logs', postgresql_concurrently=True, if_exists=True)
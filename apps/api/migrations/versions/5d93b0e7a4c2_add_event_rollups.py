@@ -0,0 +1,54 @@
+"""add hourly and daily event rollups
+
+Revision ID: 5d93b0e7a4c2
+Revises: e1a7c3f95b20
+Create Date: 2026-10-19 14:26:38.104552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5d93b0e7a4c2'
+down_revision: Union[str, Sequence[str], None] = 'e1a7c3f95b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add rollup tables, their watermarks and the timestamp indexes the
+    incremental rollup job scans. The first job run backfills all history.
+    """
+    for table in ('rollup_hourly', 'rollup_daily'):
+        op.create_table(table,
+        sa.Column('org_id', sa.UUID(), nullable=False),
+        sa.Column('metric', sa.String(length=32), nullable=False),
+        sa.Column('dimension', sa.String(length=255), nullable=False),
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('org_id', 'metric', 'dimension', 'bucket')
+        )
+    op.create_table('rollup_watermarks',
+    sa.Column('source', sa.String(length=32), nullable=False),
+    sa.Column('watermark', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('source')
+    )
+    op.create_index('ix_consents_accepted_at', 'consents', ['accepted_at'], unique=False)
+    op.create_index('ix_consents_revoked_at', 'consents', ['revoked_at'], unique=False,
+                    postgresql_where=sa.text('revoked_at IS NOT NULL'))
+    op.create_index('ix_data_right_requests_created_at', 'data_right_requests', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the rollups."""
+    op.drop_index('ix_data_right_requests_created_at', table_name='data_right_requests')
+    op.drop_index('ix_consents_revoked_at', table_name='consents')
+    op.drop_index('ix_consents_accepted_at', table_name='consents')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('rollup_daily')
+    op.drop_table('rollup_hourly')
@@ -0,0 +1,105 @@
+"""partition audit_logs by month and add org audit retention
+
+Revision ID: 7b2e4d91c0a5
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-19 10:41:07.902516
+
+"""
+from datetime import UTC, date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4d91c0a5'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, org_id, user_email, action, entity_type, entity_id, metadata_json, created_at"
+
+INDEXES = [
+    ("ix_audit_logs_action", ["action"]),
+    ("ix_audit_logs_created_at", ["created_at"]),
+    ("ix_audit_logs_entity_type", ["entity_type"]),
+    ("ix_audit_logs_org_id", ["org_id"]),
+    ("ix_audit_logs_org_created", ["org_id", "created_at", "id"]),
+    ("ix_audit_logs_org_action_created", ["org_id", "action", "created_at", "id"]),
+    ("ix_audit_logs_org_entity_created", ["org_id", "entity_type", "entity_id", "created_at", "id"]),
+    ("ix_audit_logs_org_user_created", ["org_id", "user_email", "created_at", "id"]),
+]
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_table(name: str, partitioned: bool) -> None:
+    op.execute(f"""
+        CREATE TABLE {name} (
+            id UUID NOT NULL,
+            org_id UUID NOT NULL,
+            user_email VARCHAR(255),
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(100) NOT NULL,
+            entity_id UUID,
+            metadata_json JSONB,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT {name}_pkey PRIMARY KEY ({"id, created_at" if partitioned else "id"}),
+            CONSTRAINT {name}_org_id_fkey FOREIGN KEY (org_id) REFERENCES orgs (id)
+        ){" PARTITION BY RANGE (created_at)" if partitioned else ""}
+    """)
+
+
+def _swap_in(name: str) -> None:
+    """Replace audit_logs with table ``name`` and recreate its indexes."""
+    op.execute(f"INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs")
+    op.execute("DROP TABLE audit_logs")
+    op.execute(f"ALTER TABLE {name} RENAME TO audit_logs")
+    op.execute(f"ALTER TABLE audit_logs RENAME CONSTRAINT {name}_pkey TO audit_logs_pkey")
+    op.execute(f"ALTER TABLE audit_logs RENAME CONSTRAINT {name}_org_id_fkey TO audit_logs_org_id_fkey")
+    for index_name, columns in INDEXES:
+        op.create_index(index_name, 'audit_logs', columns, unique=False)
+
+
+def upgrade() -> None:
+    """
+    Rebuild audit_logs as a table range-partitioned by created_at month.
+
+    Partitions are created for every month holding existing rows up to a few
+    months ahead; the application creates later ones at startup. The primary
+    key becomes (id, created_at) since it must include the partition key.
+
+    Also adds orgs.audit_retention_months, a per-org override of the global
+    AUDIT_RETENTION_MONTHS policy.
+    """
+    op.add_column('orgs', sa.Column('audit_retention_months', sa.Integer(), nullable=True))
+
+    _create_table("audit_logs_partitioned", partitioned=True)
+
+    now = datetime.now(UTC)
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM audit_logs")).scalar() or now
+    oldest = oldest.astimezone(UTC)
+    month = date(oldest.year, oldest.month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF audit_logs_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+
+    _swap_in("audit_logs_partitioned")
+
+
+def downgrade() -> None:
+    """Rebuild audit_logs as a plain table (partitions are dropped with their parent)."""
+    _create_table("audit_logs_plain", partitioned=False)
+    _swap_in("audit_logs_plain")
+    op.drop_column('orgs', 'audit_retention_months')
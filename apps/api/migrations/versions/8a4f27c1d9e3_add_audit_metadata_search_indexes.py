@@ -0,0 +1,44 @@
+"""add audit log metadata search indexes
+
+Revision ID: 8a4f27c1d9e3
+Revises: 5d93b0e7a4c2
+Create Date: 2026-10-19 15:08:12.930471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f27c1d9e3'
+down_revision: Union[str, Sequence[str], None] = '5d93b0e7a4c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Index audit_logs.metadata_json for containment search (jsonb_path_ops GIN)
+    and for per-org data subject lookups (expression index on subject_email).
+    """
+    op.create_index(
+        'ix_audit_logs_metadata_path_ops',
+        'audit_logs',
+        ['metadata_json'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'metadata_json': 'jsonb_path_ops'},
+    )
+    op.create_index(
+        'ix_audit_logs_org_subject_email_created',
+        'audit_logs',
+        ['org_id', sa.text("(metadata_json ->> 'subject_email')"), 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Drop the metadata search indexes."""
+    op.drop_index('ix_audit_logs_org_subject_email_created', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_metadata_path_ops', table_name='audit_logs')
@@ -0,0 +1,32 @@
+"""seed subject sketch watermark
+
+Revision ID: a6d3f8c2e517
+Revises: f3a9d6b2c715
+Create Date: 2026-10-19 21:04:38.215734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3f8c2e517'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d6b2c715'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Start batched subject sketching from now: consents accepted before this
+    were already added to their sketches when they were written.
+    """
+    op.execute(
+        "INSERT INTO rollup_watermarks (source, watermark) VALUES ('subject_sketches', now()) "
+        "ON CONFLICT (source) DO NOTHING"
+    )
+
+
+def downgrade() -> None:
+    """Forget the subject sketch watermark."""
+    op.execute("DELETE FROM rollup_watermarks WHERE source = 'subject_sketches'")
@@ -0,0 +1,52 @@
+"""add org counters
+
+Revision ID: b3e6d2a9f174
+Revises: 8a4f27c1d9e3
+Create Date: 2026-10-19 15:41:27.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e6d2a9f174'
+down_revision: Union[str, Sequence[str], None] = '8a4f27c1d9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add per-org counters and backfill them from the current tables. Rows
+    already moved to the cold archive are added by the first reconcile run.
+    """
+    op.create_table('org_counters',
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('consents', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('consents_revoked', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('dsars', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('audit_events', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    op.execute("""
+        INSERT INTO org_counters (org_id, consents, consents_revoked, dsars, audit_events, version)
+        SELECT o.id,
+               coalesce(c.total, 0), coalesce(c.revoked, 0), coalesce(d.total, 0), coalesce(a.total, 0), 1
+        FROM orgs o
+        LEFT JOIN (
+            SELECT org_id, count(*) AS total, count(*) FILTER (WHERE revoked_at IS NOT NULL) AS revoked
+            FROM consents GROUP BY org_id
+        ) c ON c.org_id = o.id
+        LEFT JOIN (SELECT org_id, count(*) AS total FROM data_right_requests GROUP BY org_id) d ON d.org_id = o.id
+        LEFT JOIN (SELECT org_id, count(*) AS total FROM audit_logs GROUP BY org_id) a ON a.org_id = o.id
+    """)
+
+
+def downgrade() -> None:
+    """Drop the org counters."""
+    op.drop_table('org_counters')
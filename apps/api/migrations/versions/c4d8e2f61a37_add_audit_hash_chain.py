@@ -0,0 +1,62 @@
+"""add audit log hash chain and checkpoints
+
+Revision ID: c4d8e2f61a37
+Revises: 7b2e4d91c0a5
+Create Date: 2026-10-19 12:03:55.271840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2f61a37'
+down_revision: Union[str, Sequence[str], None] = '7b2e4d91c0a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add per-org hash chain columns to audit_logs, chain heads and checkpoints.
+
+    Existing rows keep NULL chain columns; each org's chain starts with the
+    first event written after this migration.
+    """
+    op.add_column('audit_logs', sa.Column('chain_seq', sa.BigInteger(), nullable=True))
+    op.add_column('audit_logs', sa.Column('prev_hash', sa.String(length=64), nullable=True))
+    op.add_column('audit_logs', sa.Column('row_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_audit_logs_org_chain_seq', 'audit_logs', ['org_id', 'chain_seq'], unique=False)
+
+    op.create_table('audit_chain_heads',
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.Column('last_hash', sa.String(length=64), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    op.create_table('audit_checkpoints',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('chain_seq', sa.BigInteger(), nullable=False),
+    sa.Column('row_hash', sa.String(length=64), nullable=False),
+    sa.Column('row_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('signature', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_checkpoints_org_seq', 'audit_checkpoints', ['org_id', 'chain_seq'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the hash chain."""
+    op.drop_index('ix_audit_checkpoints_org_seq', table_name='audit_checkpoints')
+    op.drop_table('audit_checkpoints')
+    op.drop_table('audit_chain_heads')
+    op.drop_index('ix_audit_logs_org_chain_seq', table_name='audit_logs')
+    op.drop_column('audit_logs', 'row_hash')
+    op.drop_column('audit_logs', 'prev_hash')
+    op.drop_column('audit_logs', 'chain_seq')
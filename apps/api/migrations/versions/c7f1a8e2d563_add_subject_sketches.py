@@ -0,0 +1,37 @@
+"""add subject sketches
+
+Revision ID: c7f1a8e2d563
+Revises: b3e6d2a9f174
+Create Date: 2026-10-19 16:22:05.613890
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f1a8e2d563'
+down_revision: Union[str, Sequence[str], None] = 'b3e6d2a9f174'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add daily HyperLogLog sketches of consenting subjects. Existing consents
+    are sketched by scripts/backfill_subject_sketches.py.
+    """
+    op.create_table('subject_sketches',
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('purpose', sa.String(length=255), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('registers', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id', 'purpose', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Drop the subject sketches."""
+    op.drop_table('subject_sketches')
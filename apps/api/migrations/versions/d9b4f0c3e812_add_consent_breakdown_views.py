@@ -0,0 +1,70 @@
+"""add consent breakdown views
+
+Revision ID: d9b4f0c3e812
+Revises: c7f1a8e2d563
+Create Date: 2026-10-19 17:48:31.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b4f0c3e812'
+down_revision: Union[str, Sequence[str], None] = 'c7f1a8e2d563'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add materialized views of consents per purpose and top user agents per
+    org, with the unique indexes REFRESH ... CONCURRENTLY needs, and the
+    table recording their refreshes.
+    """
+    op.create_table('matview_refreshes',
+    sa.Column('name', sa.String(length=63), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('row_count', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("""
+        CREATE MATERIALIZED VIEW consent_purpose_totals AS
+        SELECT org_id, purpose,
+               count(*) FILTER (WHERE revoked_at IS NULL) AS active,
+               count(*) FILTER (WHERE revoked_at IS NOT NULL) AS revoked,
+               max(accepted_at) AS last_accepted_at
+        FROM consents
+        GROUP BY org_id, purpose
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_consent_purpose_totals ON consent_purpose_totals (org_id, purpose)")
+
+    # User agents are truncated so they fit the unique index; NULL becomes ''
+    # because CONCURRENTLY needs every row to be unique on non-null keys.
+    op.execute("""
+        CREATE MATERIALIZED VIEW consent_user_agents AS
+        SELECT org_id, user_agent, consents, rank
+        FROM (
+            SELECT org_id, user_agent, count(*) AS consents,
+                   row_number() OVER (PARTITION BY org_id ORDER BY count(*) DESC, user_agent) AS rank
+            FROM (SELECT org_id, left(coalesce(user_agent, ''), 512) AS user_agent FROM consents) c
+            GROUP BY org_id, user_agent
+        ) ranked
+        WHERE rank <= 25
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_consent_user_agents ON consent_user_agents (org_id, user_agent)")
+
+    op.execute(
+        "INSERT INTO matview_refreshes (name, row_count) "
+        "SELECT 'consent_purpose_totals', count(*) FROM consent_purpose_totals "
+        "UNION ALL SELECT 'consent_user_agents', count(*) FROM consent_user_agents"
+    )
+
+
+def downgrade() -> None:
+    """Drop the consent breakdown views and their refresh records."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS consent_user_agents")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS consent_purpose_totals")
+    op.drop_table('matview_refreshes')
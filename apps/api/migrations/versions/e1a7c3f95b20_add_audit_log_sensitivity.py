@@ -0,0 +1,45 @@
+"""add audit log sensitivity classification
+
+Revision ID: e1a7c3f95b20
+Revises: c4d8e2f61a37
+Create Date: 2026-10-19 13:41:07.662915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c3f95b20'
+down_revision: Union[str, Sequence[str], None] = 'c4d8e2f61a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add audit_logs.sensitivity, backfill it from the action registry and add
+    the partial index serving viewer listings.
+
+    The constant default makes the column addition a catalog-only change; the
+    backfill then only rewrites rows whose action is classified as sensitive.
+    It applies the default registry as of this revision (actions containing
+    "export"); deployments with a custom registry run
+    scripts/reclassify_audit_sensitivity.py afterwards.
+    """
+    op.add_column('audit_logs', sa.Column('sensitivity', sa.String(length=16), server_default='normal', nullable=False))
+    op.execute("UPDATE audit_logs SET sensitivity = 'sensitive' WHERE lower(action) LIKE '%export%'")
+    op.create_index(
+        'ix_audit_logs_org_created_normal',
+        'audit_logs',
+        ['org_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("sensitivity = 'normal'"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the sensitivity classification."""
+    op.drop_index('ix_audit_logs_org_created_normal', table_name='audit_logs')
+    op.drop_column('audit_logs', 'sensitivity')
@@ -0,0 +1,70 @@
+"""add user membership version
+
+Revision ID: e5c2a7d1f904
+Revises: d9b4f0c3e812
+Create Date: 2026-10-19 18:36:12.508243
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c2a7d1f904'
+down_revision: Union[str, Sequence[str], None] = 'd9b4f0c3e812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add users.membership_version and the triggers that bump it, so tokens
+    carrying role claims are invalidated by any change to the user's
+    memberships, superadmin flag or email, from the API or from scripts.
+    """
+    op.add_column('users', sa.Column('membership_version', sa.BigInteger(), server_default='0', nullable=False))
+
+    op.execute("""
+        CREATE FUNCTION bump_membership_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE users SET membership_version = membership_version + 1 WHERE id = OLD.user_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR NEW.user_id IS DISTINCT FROM OLD.user_id THEN
+                UPDATE users SET membership_version = membership_version + 1 WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER org_users_membership_version
+        AFTER INSERT OR UPDATE OR DELETE ON org_users
+        FOR EACH ROW EXECUTE FUNCTION bump_membership_version()
+    """)
+
+    op.execute("""
+        CREATE FUNCTION bump_user_claims_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.membership_version := OLD.membership_version + 1;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER users_claims_version
+        BEFORE UPDATE OF is_superadmin, email ON users
+        FOR EACH ROW
+        WHEN (NEW.is_superadmin IS DISTINCT FROM OLD.is_superadmin OR NEW.email IS DISTINCT FROM OLD.email)
+        EXECUTE FUNCTION bump_user_claims_version()
+    """)
+
+
+def downgrade() -> None:
+    """Drop the membership version triggers and column."""
+    op.execute("DROP TRIGGER IF EXISTS users_claims_version ON users")
+    op.execute("DROP FUNCTION IF EXISTS bump_user_claims_version()")
+    op.execute("DROP TRIGGER IF EXISTS org_users_membership_version ON org_users")
+    op.execute("DROP FUNCTION IF EXISTS bump_membership_version()")
+    op.drop_column('users', 'membership_version')
@@ -0,0 +1,99 @@
+"""hash api keys
+
+Revision ID: f3a9d6b2c715
+Revises: e5c2a7d1f904
+Create Date: 2026-10-19 19:12:47.930166
+
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import uuid
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d6b2c715'
+down_revision: Union[str, Sequence[str], None] = 'e5c2a7d1f904'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Key scheme as of this revision, frozen so later changes to app.services.api_keys
+# cannot change what this migration writes.
+PREFIX_LENGTH = 12
+
+
+def _hash_key(key: str) -> str:
+    secret = settings.api_key_secret or settings.secret_key
+    return hmac.new(secret.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
+def upgrade() -> None:
+    """
+    Move API keys to api_keys as prefix + HMAC-SHA256 (keyed by API_KEY_SECRET,
+    falling back to SECRET_KEY, as configured when this runs) and drop the
+    plaintext orgs.api_key. Existing keys keep working.
+    """
+    op.create_table('api_keys',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('prefix', sa.String(length=16), nullable=False),
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['org_id'], ['orgs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key_hash')
+    )
+    op.create_index(op.f('ix_api_keys_org_id'), 'api_keys', ['org_id'], unique=False)
+    op.create_index(op.f('ix_api_keys_prefix'), 'api_keys', ['prefix'], unique=False)
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, api_key FROM orgs WHERE api_key IS NOT NULL")).all()
+    if rows:
+        conn.execute(
+            sa.text(
+                "INSERT INTO api_keys (id, org_id, prefix, key_hash, name) "
+                "VALUES (:id, :org_id, :prefix, :key_hash, 'migrated')"
+            ),
+            [
+                {"id": uuid.uuid4(), "org_id": org_id, "prefix": key[:PREFIX_LENGTH], "key_hash": _hash_key(key)}
+                for org_id, key in rows
+            ],
+        )
+
+    op.drop_index(op.f('ix_orgs_api_key'), table_name='orgs')
+    op.drop_column('orgs', 'api_key')
+
+
+def downgrade() -> None:
+    """
+    Restore orgs.api_key. Hashed keys cannot be recovered, so every org gets
+    a new random key. The new keys are written to the file given with
+    ``alembic -x api_keys_file=PATH downgrade ...`` (created with mode 0600);
+    the downgrade refuses to run without it.
+    """
+    path = context.get_x_argument(as_dictionary=True).get("api_keys_file")
+    if not path:
+        raise RuntimeError("Downgrading issues new API keys; pass -x api_keys_file=PATH to receive them")
+
+    op.add_column('orgs', sa.Column('api_key', sa.String(length=64), nullable=True))
+    conn = op.get_bind()
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as keys_file:
+        for (org_id,) in conn.execute(sa.text("SELECT id FROM orgs")).all():
+            key = secrets.token_hex(24)
+            conn.execute(sa.text("UPDATE orgs SET api_key = :key WHERE id = :id"), {"key": key, "id": org_id})
+            keys_file.write(f"{org_id} {key}\n")
+    op.alter_column('orgs', 'api_key', nullable=False)
+    op.create_index(op.f('ix_orgs_api_key'), 'orgs', ['api_key'], unique=True)
+
+    op.drop_index(op.f('ix_api_keys_prefix'), table_name='api_keys')
+    op.drop_index(op.f('ix_api_keys_org_id'), table_name='api_keys')
+    op.drop_table('api_keys')
@@ -0,0 +1,60 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.api_keys import (
+    API_KEY_PREFIX_LENGTH,
+    api_key_cache,
+    api_key_prefix,
+    generate_api_key,
+    hash_api_key,
+    verify_api_key,
+)
+
+
+class KeySession:
+    """Returns stored (org_id, key_hash, expires_at) rows for the prefix lookup."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+def test_keys_are_stored_as_prefix_and_keyed_hash():
+    key = generate_api_key()
+    assert len(api_key_prefix(key)) == API_KEY_PREFIX_LENGTH
+    assert len(hash_api_key(key)) == 64
+    assert key not in hash_api_key(key)
+    assert hash_api_key(key) == hash_api_key(key) != hash_api_key(generate_api_key())
+
+
+def test_verification_matches_the_hash_and_is_cached():
+    api_key_cache.clear()
+    org_id, other_org = uuid4(), uuid4()
+    key = generate_api_key()
+    # A colliding prefix with a different key must not match
+    db = KeySession([(other_org, hash_api_key(key + "x"), None), (org_id, hash_api_key(key), None)])
+
+    assert verify_api_key(db, key) == org_id
+    assert verify_api_key(db, key) == org_id
+    assert db.queries == 1
+
+    api_key_cache.forget_org(org_id)
+    verify_api_key(db, key)
+    assert db.queries == 2
+
+
+def test_unknown_missing_and_expired_keys_are_rejected():
+    api_key_cache.clear()
+    key = generate_api_key()
+    assert verify_api_key(KeySession([]), key) is None
+    assert verify_api_key(KeySession([]), None) is None
+
+    # A cached key stops working when it expires (rotation grace period)
+    org_id = uuid4()
+    api_key_cache.put(hash_api_key(key), org_id, datetime.now(UTC) - timedelta(seconds=1))
+    assert verify_api_key(KeySession([]), key) is None
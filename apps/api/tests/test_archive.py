@@ -0,0 +1,93 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from app.services.archive_service import ArchiveFile, ArchiveStore
+from app.services.audit_chain import GENESIS_HASH, compute_row_hash
+
+
+def _audit_rows(org_id, start: datetime, count: int) -> list[dict]:
+    rows = []
+    for i in range(count):
+        row = {
+            "id": uuid4(),
+            "org_id": org_id,
+            "user_email": "admin@example.com",
+            "action": "consent_exported" if i % 4 == 0 else "consent_created",
+            "entity_type": "consent",
+            "entity_id": uuid4(),
+            "metadata_json": {"purpose": "marketing", "n": i},
+            "created_at": start + timedelta(hours=i),
+            "chain_seq": i + 1,
+            "sensitivity": "sensitive" if i % 4 == 0 else "normal",
+        }
+        row["prev_hash"] = GENESIS_HASH
+        row["row_hash"] = compute_row_hash(row, GENESIS_HASH)
+        rows.append(row)
+    return rows
+
+
+def test_archive_roundtrip_preserves_rows_and_hashes(tmp_path):
+    store = ArchiveStore(tmp_path)
+    org_id = uuid4()
+    rows = _audit_rows(org_id, datetime(2024, 3, 1, tzinfo=UTC), 20)
+
+    store.append("audit_logs", org_id, "2024-03", rows)
+
+    with ArchiveFile(tmp_path / "audit_logs" / str(org_id) / "2024-03.cva") as archive:
+        assert archive.header["rows"] == 20
+        restored = {row["id"]: row for row in archive.rows()}
+    for row in rows:
+        assert restored[row["id"]] == row
+        assert compute_row_hash(restored[row["id"]], GENESIS_HASH) == row["row_hash"]
+
+
+def test_archive_append_merges_by_id(tmp_path):
+    store = ArchiveStore(tmp_path)
+    org_id = uuid4()
+    rows = _audit_rows(org_id, datetime(2024, 3, 1, tzinfo=UTC), 10)
+
+    store.append("audit_logs", org_id, "2024-03", rows[:6])
+    store.append("audit_logs", org_id, "2024-03", rows[4:])
+
+    (entry,) = store.entries("audit_logs", org_id)
+    assert entry["rows"] == 10
+    assert store.archived_until("audit_logs", org_id) == rows[-1]["created_at"]
+
+
+def test_archive_query_filters_ranges_and_pages(tmp_path):
+    store = ArchiveStore(tmp_path)
+    org_id = uuid4()
+    march = _audit_rows(org_id, datetime(2024, 3, 1, tzinfo=UTC), 30)
+    april = _audit_rows(org_id, datetime(2024, 4, 1, tzinfo=UTC), 30)
+    store.append("audit_logs", org_id, "2024-03", march)
+    store.append("audit_logs", org_id, "2024-04", april)
+    store.append("audit_logs", uuid4(), "2024-04", _audit_rows(uuid4(), datetime(2024, 4, 1, tzinfo=UTC), 5))
+
+    since = datetime(2024, 3, 2, tzinfo=UTC)
+    first = store.query("audit_logs", org_id, since=since, limit=25)
+    assert [row["created_at"] for row in first] == sorted(
+        (row["created_at"] for row in march + april if row["created_at"] >= since), reverse=True
+    )[:25]
+
+    last = first[-1]
+    second = store.query(
+        "audit_logs", org_id, since=since, before=(last["created_at"], last["id"]), limit=100
+    )
+    assert len(first) + len(second) == len([row for row in march + april if row["created_at"] >= since])
+    assert all(row["org_id"] == org_id for row in first + second)
+
+    created_only = store.query(
+        "audit_logs", org_id, match=lambda row: row["action"] == "consent_created", limit=100
+    )
+    assert len(created_only) == 44
+
+
+def test_find_locates_an_archived_row_by_id(tmp_path):
+    store = ArchiveStore(tmp_path)
+    org_id = uuid4()
+    rows = _audit_rows(org_id, datetime(2024, 3, 1, tzinfo=UTC), 5)
+    store.append("audit_logs", org_id, "2024-03", rows)
+
+    assert store.find("audit_logs", org_id, rows[2]["id"]) == rows[2]
+    assert store.find("audit_logs", org_id, uuid4()) is None
+    assert store.find("audit_logs", uuid4(), rows[2]["id"]) is None
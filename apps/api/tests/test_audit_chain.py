@@ -0,0 +1,44 @@
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from app.services.audit_chain import GENESIS_HASH, compute_row_hash, verify_chain_rows
+
+
+def _chain(count: int) -> list[dict]:
+    org_id = uuid4()
+    rows, prev_hash = [], GENESIS_HASH
+    for seq in range(1, count + 1):
+        row = {
+            "org_id": org_id,
+            "chain_seq": seq,
+            "user_email": "admin@example.com",
+            "action": "created",
+            "entity_type": "consent",
+            "entity_id": uuid4(),
+            "metadata_json": {"purpose": "marketing", "n": seq},
+            "created_at": datetime.now(UTC),
+            "prev_hash": prev_hash,
+        }
+        row["row_hash"] = prev_hash = compute_row_hash(row, prev_hash)
+        rows.append(row)
+    return rows
+
+
+def test_intact_chain_verifies_incrementally():
+    rows = _chain(5)
+
+    seq, last_hash, error = verify_chain_rows(rows[:3], 0, GENESIS_HASH)
+    assert (seq, error) == (3, None)
+
+    seq, last_hash, error = verify_chain_rows(rows[3:], seq, last_hash)
+    assert (seq, last_hash, error) == (5, rows[-1]["row_hash"], None)
+
+
+def test_tampered_or_missing_rows_are_detected():
+    rows = _chain(4)
+    rows[2]["metadata_json"] = {"purpose": "analytics", "n": 3}
+    assert "Tampered" in verify_chain_rows(rows, 0, GENESIS_HASH)[2]
+
+    rows = _chain(4)
+    del rows[1]
+    assert "Missing" in verify_chain_rows(rows, 0, GENESIS_HASH)[2]
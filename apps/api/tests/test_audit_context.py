@@ -0,0 +1,21 @@
+from uuid import uuid4
+
+import pytest
+
+from app.services.audit_service import AuditContext, log_event
+
+
+def test_for_org_keeps_actor_and_request_details():
+    context = AuditContext(actor_email="admin@example.com", via="jwt", ip="10.0.0.1", request_id="req-1")
+    org_id = uuid4()
+
+    scoped = context.for_org(org_id)
+
+    assert scoped.org_id == org_id and context.org_id is None
+    assert scoped.actor_email == "admin@example.com"
+    assert scoped.request_metadata() == {"via": "jwt", "ip": "10.0.0.1", "request_id": "req-1"}
+
+
+def test_log_event_requires_an_org_without_touching_the_database():
+    with pytest.raises(ValueError, match="missing org_id"):
+        log_event(db=None, context=AuditContext(actor_email="admin@example.com"), action="created", entity_type="org")
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.config import settings
+from app.services import audit_partitions
+from app.services.audit_partitions import add_months, month_bound, month_start, partition_name
+from app.services.metrics import metrics
+
+
+class Result:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows, self.rowcount = list(rows), rowcount
+
+    def scalars(self):
+        return Result([row[0] for row in self.rows])
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class Conn:
+    """Answers each statement with the first scripted result whose SQL fragment it contains."""
+
+    def __init__(self, answers):
+        self.answers, self.statements = answers, []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append((sql, params))
+        for fragment, answer in self.answers:
+            if fragment in sql:
+                return answer(params) if callable(answer) else answer
+        return Result()
+
+
+def _use_conn(monkeypatch, conn):
+    @contextmanager
+    def transaction():
+        yield conn
+
+    monkeypatch.setattr(audit_partitions, "engine", SimpleNamespace(begin=transaction, connect=transaction))
+    monkeypatch.setattr(audit_partitions.dashboard_cache, "invalidate_committed", lambda: None)
+    deltas = []
+    monkeypatch.setattr(audit_partitions, "apply_counter_deltas", lambda conn, delta: deltas.append(delta))
+    return deltas
+
+
+def test_missing_partitions_are_created_ahead_and_coverage_is_reported(monkeypatch, capsys):
+    current = month_start(datetime.now(UTC))
+    conn = Conn([("pg_inherits", Result([(partition_name(current),)]))])
+    _use_conn(monkeypatch, conn)
+    monkeypatch.setattr(settings, "audit_partition_min_months_ahead", 1)
+
+    created = audit_partitions.ensure_audit_partitions(months_ahead=2)
+
+    assert created == [partition_name(add_months(current, 1)), partition_name(add_months(current, 2))]
+    assert sum("CREATE TABLE IF NOT EXISTS" in sql for sql, _ in conn.statements) == 2
+    assert metrics.snapshot()["gauges"]["audit_partitions.covered_until"] == month_bound(add_months(current, 3)).timestamp()
+    assert capsys.readouterr().out == ""
+
+    audit_partitions.ensure_audit_partitions(months_ahead=0)
+    assert "only cover 0 month(s) ahead" in capsys.readouterr().out
+
+
+def test_detached_partitions_subtract_their_rows_from_org_counters(monkeypatch):
+    monkeypatch.setattr(settings, "audit_retention_months", 12)
+    org_a, org_b = uuid4(), uuid4()
+    old = add_months(month_start(datetime.now(UTC)), -14)
+    names = [partition_name(add_months(old, offset)) for offset in range(3)]
+    conn = Conn([
+        ("audit_retention_months FROM orgs", Result([(None,), (12,)])),
+        ("pg_inherits", Result([(name,) for name in names])),
+        (f"count(*) FROM {names[0]}", Result([(org_a, 3), (org_b, 1)])),
+        (f"count(*) FROM {names[1]}", Result([(org_a, 2)])),
+    ])
+    deltas = _use_conn(monkeypatch, conn)
+
+    detached = audit_partitions.detach_expired_audit_partitions()
+
+    # The third partition is still within the 12-month retention
+    assert detached == names[:2]
+    assert deltas == [{org_a: {"audit_events": -3}, org_b: {"audit_events": -1}}, {org_a: {"audit_events": -2}}]
+    assert any(f"ALTER TABLE {names[1]} SET SCHEMA audit_archive" in sql for sql, _ in conn.statements)
+
+
+def test_partitions_with_uncheckpointed_rows_stay_attached(monkeypatch):
+    monkeypatch.setattr(settings, "audit_retention_months", 1)
+    name = partition_name(add_months(month_start(datetime.now(UTC)), -3))
+    conn = Conn([
+        ("pg_inherits", Result([(name,)])),
+        (f"SELECT 1 FROM {name} l WHERE NOT", Result([(1,)])),
+    ])
+    deltas = _use_conn(monkeypatch, conn)
+
+    assert audit_partitions.detach_expired_audit_partitions() == []
+    assert deltas == []
+    assert not any("DETACH PARTITION" in sql for sql, _ in conn.statements)
+
+
+def test_purge_deletes_checkpointed_rows_in_batches_and_updates_counters(monkeypatch):
+    monkeypatch.setattr(settings, "audit_retention_months", None)
+    monkeypatch.setattr(audit_partitions, "PURGE_BATCH_SIZE", 2)
+    org_id = uuid4()
+    remaining = [2, 1]
+    conn = Conn([
+        ("SELECT id, audit_retention_months FROM orgs", Result([(org_id, 6), (uuid4(), None)])),
+        ("DELETE FROM audit_logs", lambda params: Result(rowcount=remaining.pop(0))),
+    ])
+    deltas = _use_conn(monkeypatch, conn)
+
+    assert audit_partitions.purge_org_expired_audit_logs() == 3
+
+    deletes = [(sql, params) for sql, params in conn.statements if sql.startswith("DELETE")]
+    assert len(deletes) == 2
+    assert "l.chain_seq <= COALESCE" in deletes[0][0]
+    assert deletes[0][1]["cutoff"] == month_bound(add_months(month_start(datetime.now(UTC)), -6))
+    assert deltas == [{org_id: {"audit_events": -2}}, {org_id: {"audit_events": -1}}]
@@ -0,0 +1,20 @@
+from app.config import settings
+from app.services.audit_sensitivity import NORMAL, SENSITIVE, classify_action
+
+
+def test_default_registry_flags_exports():
+    assert classify_action("consents_exported") == SENSITIVE
+    assert classify_action("Export") == SENSITIVE
+    assert classify_action("created") == NORMAL
+
+
+def test_registry_accepts_exact_action_names(monkeypatch):
+    monkeypatch.setattr(settings, "audit_sensitive_actions", "data_erased, role_changed")
+    classify_action.cache_clear()
+    try:
+        assert classify_action("data_erased") == SENSITIVE
+        assert classify_action("role_changed") == SENSITIVE
+        assert classify_action("data_erased_later") == NORMAL
+    finally:
+        monkeypatch.undo()
+        classify_action.cache_clear()
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from app.config import settings
+from app.services import audit_sink
+from app.services.audit_sink import AuditSink, replay_dead_letters
+from app.services.metrics import metrics
+
+
+def _row(action="created"):
+    return {
+        "id": uuid4(),
+        "org_id": uuid4(),
+        "user_email": "admin@example.com",
+        "action": action,
+        "entity_type": "consent",
+        "entity_id": None,
+        "metadata_json": {"request": {"via": "api_key"}},
+        "created_at": datetime.now(UTC),
+        "sensitivity": "normal",
+    }
+
+
+def _sink(batch_size=500, flush_interval=60.0, max_pending=10000):
+    sink = AuditSink()
+    sink.batch_size, sink.flush_interval, sink.max_pending = batch_size, flush_interval, max_pending
+    return sink
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class Writes:
+    """Stands in for copy_rows / insert_rows and records every batch written."""
+
+    def __init__(self, monkeypatch, copy_fails=False, rejected=()):
+        self.copied, self.inserted, self.rejected = [], [], set(rejected)
+        self.copy_fails = copy_fails
+        monkeypatch.setattr(audit_sink, "copy_rows", self.copy_rows)
+        monkeypatch.setattr(audit_sink, "insert_rows", self.insert_rows)
+
+    def copy_rows(self, rows):
+        if self.copy_fails:
+            raise RuntimeError("COPY failed")
+        self.copied.append(list(rows))
+
+    def insert_rows(self, rows):
+        if any(row["action"] in self.rejected for row in rows):
+            raise RuntimeError("violates foreign key constraint")
+        self.inserted.append(list(rows))
+
+
+def test_full_batches_are_flushed_and_stop_drains_the_rest(monkeypatch):
+    writes = Writes(monkeypatch)
+    sink = _sink(batch_size=3)
+    sink.start()
+    for _ in range(7):
+        sink.submit(_row())
+
+    assert _wait_for(lambda: len(writes.copied) == 2)
+    sink.stop()
+
+    assert [len(batch) for batch in writes.copied] == [3, 3, 1]
+    assert not sink.running
+
+
+def test_partial_batch_is_flushed_after_the_interval(monkeypatch):
+    writes = Writes(monkeypatch)
+    sink = _sink(batch_size=100, flush_interval=0.02)
+    sink.start()
+    try:
+        sink.submit(_row())
+        # Far below a full batch, but written once the interval elapses
+        assert _wait_for(lambda: len(writes.copied) == 1)
+        assert len(writes.copied[0]) == 1
+    finally:
+        sink.stop()
+
+
+def test_producers_flush_inline_once_the_buffer_is_full(monkeypatch):
+    writes = Writes(monkeypatch)
+    # Not started: only the inline backpressure flush writes anything
+    sink = _sink(batch_size=2, max_pending=3)
+
+    sink.submit(_row())
+    sink.submit(_row())
+    assert writes.copied == []
+    sink.submit(_row())
+
+    assert [len(batch) for batch in writes.copied] == [2]
+    assert len(sink._pending) == 1
+
+
+def test_failed_copy_retries_row_by_row_and_dead_letters_rejected_rows(monkeypatch, tmp_path):
+    dead_letters = tmp_path / "dead-letter.jsonl"
+    monkeypatch.setattr(settings, "audit_sink_dead_letter_path", str(dead_letters))
+    writes = Writes(monkeypatch, copy_fails=True, rejected={"orphaned"})
+    before = metrics.snapshot()["counters"].get("audit_sink.dead_lettered", 0)
+    rows = [_row(), _row("orphaned"), _row()]
+
+    AuditSink()._write_batch(rows)
+
+    assert writes.inserted == [[rows[0]], [rows[2]]]
+    spooled = [json.loads(line) for line in dead_letters.read_text().splitlines()]
+    assert [row["id"] for row in spooled] == [str(rows[1]["id"])]
+    assert "row_hash" not in spooled[0]
+    assert metrics.snapshot()["counters"]["audit_sink.dead_lettered"] == before + 1
+
+
+def test_rows_left_after_the_stop_timeout_are_dead_lettered_and_replayed(monkeypatch, tmp_path):
+    dead_letters = tmp_path / "dead-letter.jsonl"
+    monkeypatch.setattr(settings, "audit_sink_dead_letter_path", str(dead_letters))
+    writes = Writes(monkeypatch)
+    database_back = threading.Event()
+    copy_started = threading.Event()
+
+    def stuck_copy(rows):
+        copy_started.set()
+        database_back.wait(5)
+        writes.copied.append(rows)
+
+    monkeypatch.setattr(audit_sink, "copy_rows", stuck_copy)
+    sink = _sink(batch_size=1)
+    sink.start()
+    rows = [_row() for _ in range(3)]
+    for row in rows:
+        sink.submit(row)
+    assert copy_started.wait(2)
+
+    sink.stop(timeout=0.05)
+    database_back.set()
+
+    assert len(dead_letters.read_text().splitlines()) == 2
+    assert replay_dead_letters() == (2, 0)
+    assert [batch[0]["id"] for batch in writes.inserted] == [row["id"] for row in rows[1:]]
+    assert writes.inserted[0][0]["created_at"] == rows[1]["created_at"]
+    assert dead_letters.read_text() == ""
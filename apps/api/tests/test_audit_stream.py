@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app import deps
+from app.config import settings
+from app.routers import audit
+from app.security import create_access_token, create_stream_ticket
+from app.services.audit_stream import AuditBroadcaster
+
+
+def _row(org_id, action="created", sensitivity="normal"):
+    return {
+        "id": uuid4(),
+        "org_id": org_id,
+        "user_email": "admin@example.com",
+        "action": action,
+        "entity_type": "consent",
+        "entity_id": None,
+        "metadata_json": {},
+        "created_at": datetime.now(UTC),
+        "sensitivity": sensitivity,
+    }
+
+
+def test_broadcaster_scopes_events_by_org_and_sensitivity():
+    org_a, org_b = uuid4(), uuid4()
+    broadcaster = AuditBroadcaster()
+
+    async def scenario():
+        viewer = broadcaster.subscribe(org_a, include_sensitive=False)
+        admin = broadcaster.subscribe(org_a, include_sensitive=True)
+        superadmin = broadcaster.subscribe(None, include_sensitive=True)
+
+        rows = [_row(org_a), _row(org_a, "consents_exported", "sensitive"), _row(org_b)]
+        # Writers publish from worker threads after commit
+        writer = threading.Thread(target=broadcaster.publish, args=(rows,))
+        writer.start()
+        writer.join()
+        await asyncio.sleep(0)
+
+        def drain(subscription):
+            events = []
+            while not subscription.queue.empty():
+                events.append(subscription.queue.get_nowait()["event_type"])
+            return events
+
+        assert drain(viewer) == ["created"]
+        assert drain(admin) == ["created", "consents_exported"]
+        assert len(drain(superadmin)) == 3
+
+        for subscription in (viewer, admin, superadmin):
+            broadcaster.unsubscribe(subscription)
+        broadcaster.publish([_row(org_a)])
+        await asyncio.sleep(0)
+        assert viewer.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def _request():
+    return SimpleNamespace(state=SimpleNamespace(), client=None, headers={})
+
+
+def _stream_auth(monkeypatch):
+    user = SimpleNamespace(id=uuid4(), email="viewer@example.com", is_superadmin=False)
+    monkeypatch.setattr(deps, "SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+    monkeypatch.setattr(deps, "_load_user", lambda user_id, payload, db: user if user_id == user.id else None)
+    return user
+
+
+def test_query_string_only_accepts_stream_tickets(monkeypatch):
+    user = _stream_auth(monkeypatch)
+    access_token = create_access_token({"sub": str(user.id)})
+    session_expires_at = int(time.time()) + 3600
+    ticket = create_stream_ticket(user.id, session_expires_at)
+
+    request = _request()
+    assert deps.get_stream_user(request, None, ticket) is user
+    assert request.state.stream_expires_at == session_expires_at
+
+    with pytest.raises(HTTPException) as error:
+        deps.get_stream_user(_request(), None, access_token)
+    assert error.value.status_code == 401
+
+    # Tickets do not work as access tokens anywhere else
+    with pytest.raises(HTTPException):
+        deps.get_current_user(_request(), HTTPAuthorizationCredentials(scheme="Bearer", credentials=ticket), None)
+    assert deps.get_current_user_optional(
+        _request(), HTTPAuthorizationCredentials(scheme="Bearer", credentials=ticket), None
+    ) is None
+
+
+def _run_stream(monkeypatch, expires_at, allowed):
+    monkeypatch.setattr(audit, "audit_broadcaster", AuditBroadcaster())
+    monkeypatch.setattr(audit, "_stream_still_allowed", lambda user_id, org_id, include_sensitive: allowed)
+    monkeypatch.setattr(settings, "audit_stream_recheck_seconds", 0)
+    monkeypatch.setattr(settings, "audit_stream_keepalive_seconds", 0.01)
+
+    async def is_disconnected():
+        return False
+
+    async def collect():
+        request = SimpleNamespace(is_disconnected=is_disconnected)
+        stream = audit._stream_events(request, uuid4(), uuid4(), False, None, expires_at)
+        return [message async for message in stream]
+
+    return asyncio.run(collect())
+
+
+def test_stream_ends_when_membership_is_revoked(monkeypatch):
+    assert _run_stream(monkeypatch, time.time() + 3600, allowed=False) == ["retry: 3000\n\n", "event: revoked\ndata: {}\n\n"]
+
+
+def test_stream_ends_when_the_session_expires(monkeypatch):
+    assert _run_stream(monkeypatch, time.time() - 1, allowed=True) == ["retry: 3000\n\n", "event: expired\ndata: {}\n\n"]
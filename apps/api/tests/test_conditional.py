@@ -0,0 +1,69 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.utils import conditional
+from app.utils.conditional import check_not_modified, etag_matches, last_modified
+
+
+def _request(headers: dict | None = None, query: str = "") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/consents",
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+@pytest.fixture
+def version(monkeypatch):
+    state = {"version": "7", "updated_at": datetime.now(UTC) - timedelta(minutes=5)}
+    monkeypatch.setattr(conditional, "change_version", lambda db, org_id: (state["version"], state["updated_at"]))
+    return state
+
+
+def test_matching_etag_short_circuits_with_304(version):
+    org_id = uuid4()
+    response = Response()
+    check_not_modified(_request(), response, None, org_id)
+    etag = response.headers["etag"]
+
+    with pytest.raises(HTTPException) as exc:
+        check_not_modified(_request({"If-None-Match": f'W/"other", {etag}'}), Response(), None, org_id)
+    assert exc.value.status_code == 304
+    assert exc.value.headers["ETag"] == etag
+
+    version["version"] = "8"
+    check_not_modified(_request({"If-None-Match": etag}), Response(), None, org_id)
+
+
+def test_etag_varies_with_params_and_variant(version):
+    org_id = uuid4()
+    tags = set()
+    for query, variant in (("", ""), ("purpose=marketing", ""), ("", "normal")):
+        response = Response()
+        check_not_modified(_request(query=query), response, None, org_id, variant)
+        tags.add(response.headers["etag"])
+    assert len(tags) == 3
+
+
+def test_if_modified_since_is_honoured_without_etag(version):
+    response = Response()
+    check_not_modified(_request(), response, None, uuid4())
+    with pytest.raises(HTTPException):
+        check_not_modified(_request({"If-Modified-Since": response.headers["last-modified"]}), Response(), None, uuid4())
+
+
+def test_last_modified_waits_for_the_second_to_close():
+    assert last_modified(datetime.now(UTC) + timedelta(seconds=1)) is None
+    assert last_modified(datetime(2026, 1, 2, 3, 4, 5, 600000, tzinfo=UTC)) == "Fri, 02 Jan 2026 03:04:05 GMT"
+
+
+def test_etag_matching():
+    assert etag_matches("*", '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert not etag_matches('"b"', '"a"')
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.consent_breakdowns import refresh_view
+
+
+class Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class CatalogConnection:
+    """Answers the pg_matviews lookup and the row count; records everything else."""
+
+    def __init__(self, populated):
+        self.populated = populated
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_matviews" in sql:
+            return Result(self.populated)
+        if sql.startswith("SELECT count(*)"):
+            return Result(42)
+        return Result(None)
+
+
+def test_populated_views_refresh_concurrently_and_record_cost():
+    conn = CatalogConnection(populated=True)
+    result = refresh_view(conn, "consent_purpose_totals")
+
+    assert "REFRESH MATERIALIZED VIEW CONCURRENTLY consent_purpose_totals" in conn.statements
+    assert any(sql.startswith("INSERT INTO matview_refreshes") for sql in conn.statements)
+    assert result["concurrent"] and result["rows"] == 42
+
+
+def test_first_refresh_is_not_concurrent():
+    conn = CatalogConnection(populated=False)
+    assert not refresh_view(conn, "consent_user_agents")["concurrent"]
+    assert "REFRESH MATERIALIZED VIEW consent_user_agents" in conn.statements
+
+
+def test_unknown_or_missing_views_are_rejected():
+    with pytest.raises(ValueError):
+        refresh_view(CatalogConnection(populated=True), "consents; DROP TABLE orgs")
+    with pytest.raises(ValueError):
+        refresh_view(CatalogConnection(populated=None), "consent_user_agents")
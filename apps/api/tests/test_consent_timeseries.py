@@ -0,0 +1,73 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services.rollups import EPOCH, SINK_RETRY_BUDGET_SECONDS, bucket_start, consent_timeseries, rollup_lag
+
+
+class RowsSession:
+    """Session stand-in returning fixed (bucket, purpose, metric, count) rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, statement):
+        rows = self.rows
+
+        class Result:
+            def all(self):
+                return rows
+
+        return Result()
+
+
+def test_bucket_start_aligns_to_utc_buckets():
+    ts = datetime(2026, 10, 15, 13, 45, 12, tzinfo=UTC)  # a Thursday
+    assert bucket_start(ts, "hour") == datetime(2026, 10, 15, 13, tzinfo=UTC)
+    assert bucket_start(ts, "day") == datetime(2026, 10, 15, tzinfo=UTC)
+    assert bucket_start(ts, "week") == datetime(2026, 10, 12, tzinfo=UTC)
+
+
+def test_active_carries_forward_from_before_the_range():
+    day = lambda d: datetime(2026, 10, d, tzinfo=UTC)
+    db = RowsSession([
+        (EPOCH, "marketing", "consents", 10),
+        (EPOCH, "marketing", "consents_revoked", 4),
+        (day(2), "marketing", "consents", 3),
+        (day(3), "marketing", "consents_revoked", 2),
+        (day(3), "analytics", "consents", 1),
+        (day(9), "analytics", "consents", 7),  # past the range
+    ])
+
+    result = consent_timeseries(db, "day", day(1), day(4))
+
+    series = {s["purpose"]: s["points"] for s in result["series"]}
+    assert [p["active"] for p in series["marketing"]] == [6, 9, 7]
+    assert [p["net"] for p in series["marketing"]] == [0, 3, -2]
+    assert [p["granted"] for p in series["analytics"]] == [0, 0, 1]
+    assert [p["active"] for p in result["total"]] == [6, 9, 8]
+
+
+def test_oversized_ranges_are_rejected():
+    with pytest.raises(ValueError):
+        consent_timeseries(RowsSession([]), "hour", datetime(2025, 1, 1, tzinfo=UTC), datetime(2026, 1, 1, tzinfo=UTC))
+
+
+def test_naive_bounds_are_taken_as_utc():
+    result = consent_timeseries(RowsSession([]), "day", datetime(2026, 10, 1), datetime(2026, 10, 3))
+
+    assert [p["bucket"] for p in result["total"]] == [
+        datetime(2026, 10, 1, tzinfo=UTC).isoformat(),
+        datetime(2026, 10, 2, tzinfo=UTC).isoformat(),
+    ]
+
+
+def test_rollup_lag_covers_the_audit_sink(monkeypatch):
+    monkeypatch.setattr(settings, "rollup_lag_seconds", 5)
+    monkeypatch.setattr(settings, "audit_sink_enabled", False)
+    assert rollup_lag() == timedelta(seconds=5)
+
+    monkeypatch.setattr(settings, "audit_sink_enabled", True)
+    monkeypatch.setattr(settings, "audit_sink_flush_interval_ms", 2000)
+    assert rollup_lag() == timedelta(seconds=2 + SINK_RETRY_BUDGET_SECONDS)
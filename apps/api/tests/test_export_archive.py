@@ -0,0 +1,93 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.config import settings
+from app.routers import export
+from app.services import export_service
+from app.services.archive_service import ArchiveStore
+from app.services.export_service import ArchivedExport, _merge_archived
+
+
+def _consent(org_id, accepted_at, revoked_at, purpose="marketing"):
+    return {
+        "id": uuid4(),
+        "org_id": org_id,
+        "subject_id": "subject-1",
+        "subject_email": None,
+        "purpose": purpose,
+        "text": "I agree",
+        "version_hash": "abc",
+        "ip": None,
+        "user_agent": None,
+        "accepted_at": accepted_at,
+        "revoked_at": revoked_at,
+        "metadata_json": {},
+    }
+
+
+def test_archived_rows_follow_export_filters_and_as_of(tmp_path, monkeypatch):
+    store = ArchiveStore(tmp_path)
+    monkeypatch.setattr(export_service, "archive_store", store)
+    org_id = uuid4()
+    day = lambda d: datetime(2024, 3, d, tzinfo=UTC)
+    rows = [
+        _consent(org_id, day(1), day(10)),
+        _consent(org_id, day(2), day(3), purpose="analytics"),
+        _consent(org_id, day(20), day(25)),
+    ]
+    store.append("consents", org_id, "2024-03", rows)
+
+    exported = list(ArchivedExport(org_id, purpose="marketing", as_of=day(5)).rows())
+
+    # Accepted after as_of is excluded; a later revocation is hidden
+    assert [row.id for row in exported] == [rows[0]["id"]]
+    assert exported[0].revoked_at is None
+    assert [row.id for row in ArchivedExport(org_id).rows()] == [rows[2]["id"], rows[1]["id"], rows[0]["id"]]
+    assert [row.id for row in ArchivedExport(org_id).rows(day(2), day(20))] == [rows[1]["id"]]
+    assert ArchivedExport(org_id, as_of=day(5)).bounds() == (day(1), day(5))
+
+
+def test_archived_rows_are_read_one_file_at_a_time(tmp_path, monkeypatch):
+    store = ArchiveStore(tmp_path)
+    monkeypatch.setattr(export_service, "archive_store", store)
+    org_id = uuid4()
+    march = [_consent(org_id, datetime(2024, 3, d, tzinfo=UTC), None) for d in (5, 20)]
+    april = [_consent(org_id, datetime(2024, 4, d, tzinfo=UTC), None) for d in (2, 9)]
+    store.append("consents", org_id, "2024-03", march)
+    store.append("consents", org_id, "2024-04", april)
+    opened = []
+    read_entry = store._read_entry
+    monkeypatch.setattr(store, "_read_entry", lambda entry, *args: opened.append(entry["month"]) or read_entry(entry, *args))
+
+    rows = ArchivedExport(org_id).rows()
+
+    assert next(rows).accepted_at.day == 9
+    assert opened == ["2024-04"]
+    assert [row.accepted_at.day for row in rows] == [2, 20, 5]
+    assert opened == ["2024-04", "2024-03"]
+
+
+def test_merge_keeps_newest_first_order_and_skips_duplicates():
+    start = datetime(2024, 3, 1, tzinfo=UTC)
+    row = lambda hours: SimpleNamespace(id=uuid4(), accepted_at=start + timedelta(hours=hours))
+    hot = [row(9), row(7), row(3), row(1)]
+    archived = [row(8), hot[2], row(2)]  # hot[2] was archived while the export ran
+
+    merged = [r for chunk in _merge_archived([hot[:2], hot[2:]], iter(archived), chunk_size=2) for r in chunk]
+
+    assert [r.accepted_at.hour for r in merged] == [9, 8, 7, 3, 2, 1]
+
+
+def test_parallel_slices_are_limited_to_superadmins_and_large_orgs(monkeypatch):
+    monkeypatch.setattr(settings, "export_parallel_min_consents", 1000)
+    counts = {}
+    monkeypatch.setattr(export, "get_counters", lambda db, org_id: {"consents": counts[org_id]})
+    small, large = uuid4(), uuid4()
+    counts.update({small: 999, large: 1000})
+    viewer = SimpleNamespace(is_superadmin=False)
+    superadmin = SimpleNamespace(is_superadmin=True)
+
+    assert export._allowed_slices(8, viewer, None, small) == 1
+    assert export._allowed_slices(8, viewer, None, large) == 8
+    assert export._allowed_slices(8, superadmin, None, small) == 8
@@ -0,0 +1,45 @@
+import random
+
+from app.utils.hll import REGISTERS, STANDARD_ERROR, HyperLogLog
+
+
+def _subjects(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [f"subject-{rng.getrandbits(64):016x}@example.com" for _ in range(n)]
+
+
+def test_estimates_are_within_the_stated_error():
+    for n in (50, 1_000, 20_000, 100_000):
+        subjects = _subjects(n, seed=n)
+        sketch = HyperLogLog()
+        for subject in subjects:
+            sketch.add(subject)
+            sketch.add(subject)  # duplicates do not count
+        exact = len(set(subjects))
+        assert abs(sketch.count() - exact) <= 3 * STANDARD_ERROR * exact + 1, (n, sketch.count())
+
+
+def test_merged_daily_sketches_match_the_range_sketch():
+    subjects = _subjects(30_000, seed=7)
+    days = [HyperLogLog() for _ in range(30)]
+    whole = HyperLogLog()
+    for i, subject in enumerate(subjects):
+        # Returning subjects consent again on later days
+        for day in {i % 30, (i * 7) % 30}:
+            days[day].add(subject)
+        whole.add(subject)
+
+    merged = HyperLogLog()
+    for day in days:
+        merged.merge(day.to_bytes())
+
+    assert merged.registers == whole.registers
+    assert abs(merged.count() - len(subjects)) <= 3 * STANDARD_ERROR * len(subjects)
+
+
+def test_sketches_roundtrip_as_bytes():
+    sketch = HyperLogLog()
+    sketch.add("a@example.com")
+    restored = HyperLogLog(sketch.to_bytes())
+    assert len(restored.to_bytes()) == REGISTERS
+    assert restored.count() == 1
@@ -0,0 +1,15 @@
+from app.utils.jsonb import jsonb_contains
+
+
+def test_object_containment_matches_postgres():
+    metadata = {"purpose": "marketing", "subject_email": "a@example.com", "tags": ["x", "y"], "n": 1}
+    assert jsonb_contains(metadata, {"purpose": "marketing"})
+    assert jsonb_contains(metadata, {"tags": ["y"], "n": 1.0})
+    assert not jsonb_contains(metadata, {"purpose": "analytics"})
+    assert not jsonb_contains(metadata, {"missing": None})
+    assert not jsonb_contains(metadata, {"n": True})
+
+
+def test_bare_primitive_only_matches_top_level_arrays():
+    assert jsonb_contains(["a", "b"], "a")
+    assert not jsonb_contains({"tags": ["a"]}, {"tags": "a"})
@@ -0,0 +1,33 @@
+from uuid import uuid4
+
+from app.services.org_counters import apply_counter_deltas, count_audit_rows
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.calls = []
+        self.info = {}
+
+    def execute(self, statement, params=None):
+        self.calls.append(params)
+
+
+def test_audit_batches_become_one_delta_per_org():
+    conn = RecordingConnection()
+    first, second = uuid4(), uuid4()
+
+    count_audit_rows(conn, [{"org_id": first}, {"org_id": second}, {"org_id": first}])
+
+    (params,) = conn.calls
+    by_org = {row["org_id"]: row for row in params}
+    assert by_org[first] == {"org_id": first, "consents": 0, "consents_revoked": 0, "dsars": 0, "audit_events": 2}
+    assert by_org[second]["audit_events"] == 1
+    # Rows are locked in a stable order so concurrent batches cannot deadlock
+    assert [row["org_id"] for row in params] == sorted([first, second], key=str)
+
+
+def test_zero_deltas_skip_the_write():
+    conn = RecordingConnection()
+    apply_counter_deltas(conn, {uuid4(): {"consents": 0}})
+    count_audit_rows(conn, [])
+    assert conn.calls == []
@@ -0,0 +1,21 @@
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    created_at = datetime(2025, 11, 12, 8, 30, 15, 123456, tzinfo=UTC)
+    row_id = uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "|" not in cursor and "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+def test_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
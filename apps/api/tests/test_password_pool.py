@@ -0,0 +1,61 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.security import BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS, choose_bcrypt_rounds
+from app.security.password_pool import PasswordPool, PasswordPoolFull
+
+
+def test_saturated_pool_rejects_immediately():
+    pool = PasswordPool(workers=0, max_pending=2)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "done"
+
+    async def scenario():
+        running = [asyncio.create_task(pool.run(slow)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordPoolFull):
+            await pool.run(slow)
+        release.set()
+        assert await asyncio.gather(*running) == ["done", "done"]
+        # Slots are returned once the work finishes
+        assert await pool.run(lambda: "again") == "again"
+
+    asyncio.run(scenario())
+
+
+def test_work_runs_in_worker_processes():
+    pool = PasswordPool(workers=1, max_pending=4)
+    pool.start()
+    try:
+        async def scenario():
+            return await asyncio.gather(pool.run(os.getpid), pool.run(pow, 2, 10))
+
+        child_pid, result = asyncio.run(scenario())
+        assert child_pid != os.getpid() and result == 1024
+    finally:
+        pool.stop()
+
+
+def test_bcrypt_cost_follows_the_target_latency():
+    # 60 ms at the minimum cost: 120 ms at 11, 240 ms at 12, 480 ms at 13
+    assert choose_bcrypt_rounds(60, 250) == 12
+    assert choose_bcrypt_rounds(60, 239) == 11
+    # Never below the minimum, never above the maximum
+    assert choose_bcrypt_rounds(500, 250) == BCRYPT_MIN_ROUNDS
+    assert choose_bcrypt_rounds(0.001, 10_000) == BCRYPT_MAX_ROUNDS
+
+
+def test_hashes_below_the_pinned_floor_need_a_rehash():
+    # A worker that calibrated to 13 still only rehashes below the pinned floor of 12
+    policy = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=13, bcrypt__min_rounds=12)
+    salt_and_digest = "KE5wUUWIbpHmRpLdFlqfa.uDOYDC7CqSRmhJvkcQKcLQYT0NdAMS2"
+    assert policy.needs_update(f"$2b$10${salt_and_digest}")
+    assert not policy.needs_update(f"$2b$12${salt_and_digest}")
+    assert not policy.needs_update(f"$2b$13${salt_and_digest}")
@@ -0,0 +1,89 @@
+import threading
+from uuid import uuid4
+
+import pytest
+
+from app.services.response_cache import ResponseCache
+
+
+def test_cached_until_org_is_invalidated():
+    cache = ResponseCache()
+    org_id, other = uuid4(), uuid4()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute(("summary", org_id), org_id, compute) == 1
+    assert cache.get_or_compute(("summary", org_id), org_id, compute) == 1
+
+    cache.invalidate([other])
+    assert cache.get_or_compute(("summary", org_id), org_id, compute) == 1
+
+    cache.invalidate([org_id])
+    assert cache.get_or_compute(("summary", org_id), org_id, compute) == 2
+
+
+def test_any_org_write_invalidates_global_views():
+    cache = ResponseCache()
+    values = iter(range(10))
+    assert cache.get_or_compute(("summary", None), None, lambda: next(values)) == 0
+    cache.invalidate([uuid4()])
+    assert cache.get_or_compute(("summary", None), None, lambda: next(values)) == 1
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    org_id = uuid4()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute(("recent", org_id), org_id, slow)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    while not cache._inflight:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+
+
+def test_errors_are_not_cached():
+    cache = ResponseCache()
+    org_id = uuid4()
+
+    def fail():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(("org", org_id), org_id, fail)
+    assert cache.get_or_compute(("org", org_id), org_id, lambda: "ok") == "ok"
+
+
+
+def test_commit_invalidates_again_once_completed():
+    cache = ResponseCache()
+    org_id = uuid4()
+    values = iter(range(10))
+
+    cache.invalidate_committing([org_id])
+    # A read racing the commit stores pre-commit data under the new generation
+    assert cache.get_or_compute(("summary", org_id), org_id, lambda: next(values)) == 0
+    cache.invalidate_committed()
+    assert cache.get_or_compute(("summary", org_id), org_id, lambda: next(values)) == 1
+
+    cache.invalidate_committed()
+    assert cache.get_or_compute(("summary", org_id), org_id, lambda: next(values)) == 1
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.security.claims import TokenUser, membership_versions, role_claims, user_from_claims
+from app.security.roles import can_view_sensitive, can_write, get_user_org_membership
+
+
+class VersionSession:
+    """Answers the membership version lookup and counts queries."""
+
+    def __init__(self, version):
+        self.version = version
+        self.queries = 0
+
+    def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(scalar=lambda: self.version)
+
+    def query(self, *_args):
+        raise AssertionError("claims must not fall back to membership queries")
+
+
+def _payload(user, memberships, version):
+    return {"sub": str(user.id), "email": user.email, **role_claims(user, memberships, version)}
+
+
+def test_current_claims_authorize_without_membership_queries():
+    membership_versions.clear()
+    user = SimpleNamespace(id=uuid4(), email="viewer@example.com", is_superadmin=False)
+    org_a, org_b = uuid4(), uuid4()
+    memberships = [SimpleNamespace(org_id=org_a, role="viewer"), SimpleNamespace(org_id=org_b, role="admin")]
+    db = VersionSession(version=3)
+
+    token_user = user_from_claims(db, user.id, _payload(user, memberships, 3))
+
+    assert isinstance(token_user, TokenUser) and token_user.email == "viewer@example.com"
+    assert get_user_org_membership(token_user, db).org_id == org_a
+    assert get_user_org_membership(token_user, db, org_b).role == "admin"
+    assert get_user_org_membership(token_user, db, uuid4()) is None
+    assert not can_write(token_user, db) and not can_view_sensitive(token_user, db)
+
+    # The version check is cached
+    user_from_claims(db, user.id, _payload(user, memberships, 3))
+    assert db.queries == 1
+
+
+def test_outdated_or_missing_claims_fall_back_to_the_database():
+    membership_versions.clear()
+    user = SimpleNamespace(id=uuid4(), email="admin@example.com", is_superadmin=False)
+    memberships = [SimpleNamespace(org_id=uuid4(), role="admin")]
+
+    assert user_from_claims(VersionSession(version=4), user.id, _payload(user, memberships, 3)) is None
+    membership_versions.clear()
+    assert user_from_claims(VersionSession(version=None), user.id, _payload(user, memberships, 3)) is None
+    assert user_from_claims(VersionSession(version=0), user.id, {"sub": str(user.id)}) is None
@@ -0,0 +1,55 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from app.services.scheduler import CronTrigger, IntervalTrigger, Scheduler, advisory_key
+
+
+def _at(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def test_cron_daily_and_stepped_fields():
+    daily = CronTrigger("30 2 * * *")
+    assert daily.next_run(_at(2026, 10, 19, 1, 0)) == _at(2026, 10, 19, 2, 30)
+    assert daily.next_run(_at(2026, 10, 19, 2, 30)) == _at(2026, 10, 20, 2, 30)
+
+    quarter = CronTrigger("*/15 * * * *")
+    assert quarter.next_run(_at(2026, 10, 19, 1, 7, 42)) == _at(2026, 10, 19, 1, 15)
+    assert quarter.next_run(_at(2026, 10, 19, 23, 50)) == _at(2026, 10, 20, 0, 0)
+
+
+def test_cron_month_rollover_and_weekdays():
+    assert CronTrigger("0 0 1 * *").next_run(_at(2026, 12, 15)) == _at(2027, 1, 1)
+    assert CronTrigger("0 0 31 * *").next_run(_at(2026, 11, 1)) == _at(2026, 12, 31)
+    # 2026-10-19 is a Monday; 7 means Sunday like 0
+    assert CronTrigger("0 9 * * 7").next_run(_at(2026, 10, 19)) == _at(2026, 10, 25, 9, 0)
+    assert CronTrigger("0 9 * * 1-5").next_run(_at(2026, 10, 23, 10, 0)) == _at(2026, 10, 26, 9, 0)
+    # Restricted day-of-month and day-of-week match if either does
+    assert CronTrigger("0 0 25 * 3").next_run(_at(2026, 10, 19)) == _at(2026, 10, 21)
+
+
+def test_cron_rejects_bad_expressions():
+    for expression in ("* * * *", "60 * * * *", "0 0 32 * *", "0 0 30 2 *"):
+        with pytest.raises(ValueError):
+            CronTrigger(expression).next_run(_at(2026, 10, 19))
+
+
+def test_interval_jitter_stays_in_bounds():
+    trigger = IntervalTrigger(60, jitter=10)
+    start = _at(2026, 10, 19)
+    for _ in range(100):
+        delay = (trigger.next_run(start) - start).total_seconds()
+        assert 60 <= delay <= 70
+    with pytest.raises(ValueError):
+        IntervalTrigger(0)
+
+
+def test_jobs_register_once_with_stable_lock_keys():
+    scheduler = Scheduler()
+    scheduler.add_job("refresh", lambda: None, IntervalTrigger(60))
+    with pytest.raises(ValueError):
+        scheduler.add_job("refresh", lambda: None, IntervalTrigger(60))
+    assert advisory_key("refresh") == advisory_key("refresh")
+    assert -(1 << 63) <= advisory_key("refresh") < (1 << 63)
+    assert scheduler.status()[0]["trigger"] == "every 60s"
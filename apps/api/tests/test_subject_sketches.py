@@ -0,0 +1,25 @@
+from datetime import UTC, date, datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.services.subject_sketches import sketch_consents
+
+
+def test_consents_are_sketched_per_org_purpose_and_utc_day():
+    org_id = uuid4()
+    late_evening = datetime(2026, 10, 1, 23, 30, tzinfo=timezone(timedelta(hours=-2)))  # Oct 2 in UTC
+
+    class Conn:
+        def execute(self, statement):
+            return [
+                (org_id, "marketing", datetime(2026, 10, 1, 9, tzinfo=UTC), "A@example.com", None),
+                (org_id, "marketing", datetime(2026, 10, 1, 17, tzinfo=UTC), "a@example.com ", None),
+                (org_id, "marketing", late_evening, None, "legacy-1"),
+                (org_id, "marketing", datetime(2026, 10, 1, 12, tzinfo=UTC), None, None),
+            ]
+
+    sketches = sketch_consents(Conn(), datetime(2026, 10, 1, tzinfo=UTC), datetime(2026, 10, 3, tzinfo=UTC))
+
+    assert {key: sketch.count() for key, sketch in sketches.items()} == {
+        (org_id, "marketing", date(2026, 10, 1)): 1,
+        (org_id, "marketing", date(2026, 10, 2)): 1,
+    }
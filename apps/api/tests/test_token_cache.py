@@ -0,0 +1,50 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from jose import jwt
+
+from app.security import create_access_token, verify_token
+from app.security.token_cache import VerifiedTokenCache, token_cache
+from app.services.metrics import metrics
+
+
+def test_repeated_tokens_skip_verification():
+    token_cache.clear()
+    token = create_access_token({"sub": "user-1", "email": "a@example.com"})
+
+    first = verify_token(token)
+    with patch("app.security.jwt.decode", side_effect=AssertionError("should be cached")):
+        second = verify_token(token)
+    assert first == second and second["sub"] == "user-1"
+
+    # Callers get copies, so mutating one cannot poison the cache
+    second["sub"] = "someone-else"
+    assert verify_token(token)["sub"] == "user-1"
+    assert metrics.snapshot()["counters"]["auth.token_cache.hits"] >= 2
+
+
+def test_invalid_and_expired_tokens_are_not_served_from_cache():
+    token_cache.clear()
+    with pytest.raises(ValueError):
+        verify_token(jwt.encode({"sub": "user-1"}, "wrong-key", algorithm="HS256"))
+
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("expired", {"sub": "user-1", "exp": 1})
+    cache.put("no-exp", {"sub": "user-1"})
+    assert cache.get("expired") is None and cache.get("no-exp") is None
+
+    expired = create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(ValueError):
+        verify_token(expired)
+
+
+def test_cache_is_bounded_lru():
+    cache = VerifiedTokenCache(max_entries=2)
+    far = 4_000_000_000
+    cache.put("a", {"exp": far})
+    cache.put("b", {"exp": far})
+    assert cache.get("a") is not None  # a is now most recent
+    cache.put("c", {"exp": far})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
@@ -0,0 +1,47 @@
+from app.utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_at_their_own_deadline():
+    clock = FakeClock()
+    cache = TTLCache(10, clock=clock)
+    cache.set("short", 1, clock.now + 5)
+    cache.set("long", 2, clock.now + 60)
+
+    clock.now += 10
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_cached_none_is_distinguished_from_missing():
+    cache = TTLCache(10)
+    missing = object()
+    cache.set("deleted-user", None, cache.clock() + 60)
+    assert cache.get("deleted-user", missing) is None
+    assert cache.get("unknown", missing) is missing
+
+
+def test_least_recently_used_are_evicted_and_discard_filters():
+    cache = TTLCache(2)
+    deadline = cache.clock() + 60
+    cache.set("a", "org-1", deadline)
+    cache.set("b", "org-2", deadline)
+    assert cache.get("a") == "org-1"  # a is now most recent
+    cache.set("c", "org-1", deadline)
+    assert cache.get("b") is None
+
+    cache.discard(lambda key, org: org == "org-1")
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_zero_capacity_disables_caching():
+    cache = TTLCache(0)
+    cache.set("a", 1, cache.clock() + 60)
+    assert cache.get("a") is None
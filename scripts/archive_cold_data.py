@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Move old audit logs and revoked consents into the compressed cold archive."""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from app.config import settings
+from app.services.archive_service import run_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.archive_after_days,
+        help="Archive rows older than this many days (default: ARCHIVE_AFTER_DAYS)",
+    )
+    args = parser.parse_args()
+
+    if args.older_than_days is None:
+        print("⚠️  Archiving is disabled: set ARCHIVE_AFTER_DAYS or pass --older-than-days")
+        sys.exit(1)
+
+    try:
+        moved = run_archive(args.older_than_days)
+    except Exception as e:
+        print(f"❌ Archiving failed: {e}")
+        sys.exit(1)
+
+    print(f"✅ Archived {moved['audit_logs']} audit logs and {moved['consents']} revoked consents")
+    print(f"   Archive: {settings.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
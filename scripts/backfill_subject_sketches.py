@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Build daily subject sketches from existing consents (hot and archived).
+
+Safe to re-run: sketches are merged with what is stored, and adding a subject
+twice does not change a sketch.
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+from datetime import UTC
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from sqlalchemy import select
+
+from app.db import Consent, Org, engine
+from app.services.archive_service import ArchiveFile, archive_store
+from app.services.subject_sketches import merge_into_stored, subject_key
+from app.utils.hll import HyperLogLog
+
+
+def sketch_org(org_id) -> dict:
+    sketches: dict[tuple, HyperLogLog] = defaultdict(HyperLogLog)
+
+    def add(purpose, accepted_at, subject_email, subject_id):
+        subject = subject_key(subject_email, subject_id)
+        if subject:
+            sketches[(purpose, accepted_at.astimezone(UTC).date())].add(subject)
+
+    with engine.connect() as conn:
+        rows = conn.execution_options(yield_per=5000).execute(
+            select(Consent.purpose, Consent.accepted_at, Consent.subject_email, Consent.subject_id)
+            .where(Consent.org_id == org_id)
+        )
+        for row in rows:
+            add(*row)
+
+    for entry in archive_store.entries("consents", org_id):
+        with ArchiveFile(archive_store.root / entry["path"]) as archive:
+            columns = [archive.column(name) for name in ("purpose", "accepted_at", "subject_email", "subject_id")]
+        for row in zip(*columns):
+            add(*row)
+    return sketches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--org-id", help="Only this organization")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        query = select(Org.id)
+        if args.org_id:
+            query = query.where(Org.id == args.org_id)
+        org_ids = conn.execute(query).scalars().all()
+
+    total = 0
+    for org_id in org_ids:
+        try:
+            sketches = sketch_org(org_id)
+            with engine.begin() as conn:
+                for (purpose, day), sketch in sorted(sketches.items()):
+                    merge_into_stored(conn, org_id, purpose, day, sketch)
+        except Exception as e:
+            print(f"❌ Failed to sketch org {org_id}: {e}")
+            sys.exit(1)
+        total += len(sketches)
+        print(f"   {org_id}: {len(sketches)} daily sketches")
+
+    print(f"✅ Backfilled {total} subject sketches for {len(org_ids)} organizations")
+
+
+if __name__ == "__main__":
+    main()
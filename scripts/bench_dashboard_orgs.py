@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Benchmark /dashboard/orgs: per-org COUNT loop vs. the single grouped query.
+
+Seeds synthetic orgs (1000 by default) with members, consents, audit logs and
+DSARs inside a transaction that is rolled back at the end, so the database is
+left untouched.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from fastapi import Response
+from sqlalchemy import event, insert
+
+from app.db import AuditLog, Consent, DataRightRequest, Org, OrgUser, SessionLocal, User, engine
+from app.routers.dashboard import list_orgs_with_stats
+
+
+def seed(db, orgs: int, per_org: int):
+    now = datetime.now(UTC)
+    org_rows = [
+        {"id": uuid.uuid4(), "name": f"bench-org-{i:05d}", "region": "UAE"}
+        for i in range(orgs)
+    ]
+    db.execute(insert(Org), org_rows)
+
+    user_rows = [{"id": uuid.uuid4(), "email": f"bench-{i}@example.com", "password_hash": "x"} for i in range(orgs)]
+    db.execute(insert(User), user_rows)
+    db.execute(insert(OrgUser), [
+        {"id": uuid.uuid4(), "org_id": org["id"], "user_id": user["id"], "role": "admin"}
+        for org, user in zip(org_rows, user_rows)
+    ])
+
+    consents, logs, dsars = [], [], []
+    for org in org_rows:
+        for n in range(per_org):
+            consents.append({
+                "id": uuid.uuid4(), "org_id": org["id"], "subject_email": f"s{n}@example.com",
+                "purpose": "marketing", "version_hash": "0" * 64, "accepted_at": now, "metadata_json": {},
+            })
+            logs.append({
+                "id": uuid.uuid4(), "org_id": org["id"], "action": "created", "entity_type": "consent",
+                "metadata_json": {}, "created_at": now,
+            })
+        dsars.append({
+            "id": uuid.uuid4(), "org_id": org["id"], "subject_email": "s0@example.com",
+            "request_type": "access", "status": "pending",
+        })
+    db.execute(insert(Consent), consents)
+    db.execute(insert(AuditLog), logs)
+    db.execute(insert(DataRightRequest), dsars)
+    db.flush()
+
+
+def legacy_list_orgs(db):
+    """The original implementation: four COUNT queries per org."""
+    result = []
+    for org in db.query(Org).all():
+        result.append({
+            "id": str(org.id),
+            "users": db.query(OrgUser).filter(OrgUser.org_id == org.id).count(),
+            "consents": db.query(Consent).filter(Consent.org_id == org.id).count(),
+            "api_logs": db.query(AuditLog).filter(AuditLog.org_id == org.id).count(),
+            "data_rights": db.query(DataRightRequest).filter(DataRightRequest.org_id == org.id).count(),
+        })
+    return result
+
+
+def measure(label: str, fn, runs: int):
+    statements = []
+
+    def count(*_args, **_kwargs):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    timings = []
+    try:
+        for _ in range(runs):
+            statements.clear()
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    print(
+        f"{label:<16} median {statistics.median(timings):8.1f} ms   "
+        f"max {max(timings):8.1f} ms   queries/request {len(statements)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orgs", type=int, default=1000)
+    parser.add_argument("--per-org", type=int, default=20, help="Consents and audit logs per org")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    superadmin = SimpleNamespace(is_superadmin=True)
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.orgs} orgs x {args.per_org} consents/audit logs (rolled back afterwards)...")
+        seed(db, args.orgs, args.per_org)
+
+        measure("legacy loop", lambda: legacy_list_orgs(db), args.runs)
+        measure(
+            "grouped, page",
+            lambda: list_orgs_with_stats(Response(), "consents", "desc", 100, 0, db, superadmin),
+            args.runs,
+        )
+        measure(
+            "grouped, all",
+            lambda: list_orgs_with_stats(Response(), "name", "asc", 1000, 0, db, superadmin),
+            args.runs,
+        )
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
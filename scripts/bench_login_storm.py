@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Benchmark other routes' latency during a login storm.
+
+Probes a cheap sync route (``/healthz`` by default) at a steady rate, first
+alone and then while ``--concurrency`` clients hammer ``/auth/login``, and
+prints the probe's p50/p99 for both phases plus how the logins fared. Run it
+against a server started with PASSWORD_POOL_WORKERS=0 (bcrypt in the request
+threadpool, the old behaviour) and with the pool enabled to compare.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+
+def request(url: str, body: dict | None = None) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def probe(url: str, seconds: float, interval: float) -> list[float]:
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        request(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))]
+
+
+def report(label: str, latencies: list[float]):
+    print(
+        f"{label:<14} n={len(latencies):<5} p50 {statistics.median(latencies):8.1f} ms   "
+        f"p99 {percentile(latencies, 0.99):8.1f} ms   max {max(latencies):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="An existing user's email")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--probe", default="/healthz", help="Route whose latency is measured")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    args = parser.parse_args()
+
+    probe_url = args.url.rstrip("/") + args.probe
+    login_url = args.url.rstrip("/") + "/auth/login"
+    credentials = {"email": args.email, "password": args.password}
+
+    report("baseline", probe(probe_url, args.seconds, args.probe_interval))
+
+    stop = threading.Event()
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def storm():
+        while not stop.is_set():
+            code = request(login_url, credentials)
+            with lock:
+                statuses[code] += 1
+
+    clients = [threading.Thread(target=storm, daemon=True) for _ in range(args.concurrency)]
+    for client in clients:
+        client.start()
+    try:
+        report("login storm", probe(probe_url, args.seconds, args.probe_interval))
+    finally:
+        stop.set()
+        for client in clients:
+            client.join()
+
+    logins = ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items()))
+    print(f"logins ({sum(statuses.values())} in {args.seconds:g}s) by status: {logins}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,10 @@ import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
-import secrets
 
 from app.db import SessionLocal, Org
-from app.services.audit_service import log_event
+from app.services.api_keys import create_api_key
+from app.services.audit_service import AuditContext, log_event
 
 
 def main():
@@ -16,15 +16,16 @@ def main():
     
     db = SessionLocal()
     try:
-        org = Org(name=name, region=region, api_key=secrets.token_hex(32))
+        org = Org(name=name, region=region)
         db.add(org)
+        db.flush()
+        _, api_key = create_api_key(db, org.id, name="default")
         db.commit()
         db.refresh(org)
         
-        # Use the org itself as the actor context
         log_event(
             db=db,
-            actor=org,
+            context=AuditContext.system(org_id=org.id),
             action="org_created",
             entity_type="org",
             entity_id=org.id,
@@ -33,7 +34,7 @@ def main():
         )
         
         print(f"✅ Created org {org.name} ({org.id})")
-        print(f"   API Key: {org.api_key}")
+        print(f"   API Key: {api_key}  (shown only once)")
     except Exception as e:
         db.rollback()
         print(f"❌ Error creating org: {e}")
@@ -4,9 +4,9 @@ import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
-import secrets
 
-from app.db import engine, SessionLocal, Org
+from app.db import engine, SessionLocal, ApiKey, Org
+from app.services.api_keys import create_api_key
 from sqlalchemy import text
 
 def fix_schema():
@@ -31,33 +31,17 @@ def fix_schema():
             print(f"⚠️  Could not add region column: {e}")
             conn.rollback()
 
-        # Check and add api_key column
-        try:
-            conn.execute(text("""
-                DO $$ 
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='orgs' AND column_name='api_key'
-                    ) THEN
-                        ALTER TABLE orgs ADD COLUMN api_key VARCHAR(64) UNIQUE;
-                        CREATE INDEX IF NOT EXISTS ix_orgs_api_key ON orgs(api_key);
-                    END IF;
-                END $$;
-            """))
-            conn.commit()
-            print("✅ Added 'api_key' column to orgs table")
-        except Exception as e:
-            print(f"⚠️  Could not add api_key column: {e}")
-            conn.rollback()
-
-    # Generate API keys for orgs that don't have them
+    # Generate API keys for orgs that don't have an active one
     db = SessionLocal()
     try:
-        orgs_without_keys = db.query(Org).filter(Org.api_key == None).all()
+        orgs_without_keys = (
+            db.query(Org)
+            .filter(~Org.api_keys.any(ApiKey.revoked_at.is_(None)))
+            .all()
+        )
         for org in orgs_without_keys:
-            org.api_key = secrets.token_hex(16)
-            print(f"✅ Generated API key for org: {org.name}")
+            _, api_key = create_api_key(db, org.id, name="default")
+            print(f"✅ Generated API key for org {org.name}: {api_key}")
         db.commit()
     except Exception as e:
         print(f"⚠️  Could not generate API keys: {e}")
@@ -6,7 +6,7 @@ import sys
 sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
 
 from app.db import SessionLocal, Org, User, OrgUser
-from app.services.audit_service import log_event
+from app.services.audit_service import AuditContext, log_event
 
 
 def main():
@@ -65,15 +65,9 @@ def main():
         org_user.role = new_role
         db.commit()
         
-        # Create a mock actor object for superadmin
-        class SuperadminActor:
-            def __init__(self, email):
-                self.email = email
-        
-        actor = SuperadminActor("superadmin")
         log_event(
             db=db,
-            actor=actor,
+            context=AuditContext.system("superadmin"),
             action="user_role_changed",
             entity_type="org_user",
             entity_id=org_user.id,
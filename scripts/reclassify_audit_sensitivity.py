@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""Re-apply the configured sensitivity registry to stored audit rows.
+
+Run after changing AUDIT_SENSITIVE_ACTIONS or AUDIT_SENSITIVE_KEYWORDS; rows
+written earlier keep the classification they were stored with until then.
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from app.db import engine
+from app.services.audit_sensitivity import reclassify_audit_sensitivity
+
+
+def main():
+    try:
+        with engine.begin() as conn:
+            updated = reclassify_audit_sensitivity(conn)
+    except Exception as e:
+        print(f"❌ Reclassification failed: {e}")
+        sys.exit(1)
+    print(f"✅ Reclassified {updated} audit rows")
+
+
+if __name__ == "__main__":
+    main()
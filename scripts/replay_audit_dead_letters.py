@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Write audit rows from the audit sink's dead-letter file to audit_logs.
+
+Rows land there when the database rejected them or when the API shut down
+before it could flush them. Rows that fail again stay in the file.
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from app.services.audit_sink import replay_dead_letters
+
+
+def main():
+    written, failed = replay_dead_letters()
+    print(f"✅ Replayed {written} audit rows")
+    if failed:
+        print(f"⚠️  {failed} rows still failing, kept in the dead-letter file")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
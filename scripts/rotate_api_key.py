@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Issue a new API key for an organization.
+
+The org's other active keys keep working for --grace-hours (default 24) so
+clients can switch without downtime; --revoke-now revokes them instead. The
+new key is printed once and only its hash is stored.
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from app.db import Org, SessionLocal
+from app.services.api_keys import rotate_api_key
+from app.services.audit_service import AuditContext, log_event
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("org_id", help="Organization ID")
+    parser.add_argument("--name", help="Label for the new key")
+    parser.add_argument("--grace-hours", type=int, default=24, help="Hours the current keys stay valid")
+    parser.add_argument("--revoke-now", action="store_true", help="Expire the current keys immediately")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).filter(Org.id == args.org_id).first()
+        if not org:
+            print(f"❌ Organization {args.org_id} not found")
+            sys.exit(1)
+
+        grace = timedelta(0) if args.revoke_now else timedelta(hours=args.grace_hours)
+        api_key, key = rotate_api_key(db, org.id, grace, args.name)
+        db.commit()
+
+        log_event(
+            db=db,
+            context=AuditContext.system(org_id=org.id),
+            action="api_key_created",
+            entity_type="api_key",
+            entity_id=api_key.id,
+            org_id=org.id,
+            metadata={"prefix": api_key.prefix, "expire_existing_after_hours": grace.total_seconds() / 3600},
+        )
+
+        print(f"✅ New API key for {org.name}: {key}  (shown only once)")
+        print(f"   Previous keys expire in {grace}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rotating API key: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Run one background job now, outside the API process.
+
+The job runs under the same advisory lock as scheduled runs, so it never
+overlaps a run started by the API's scheduler.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
+
+from app.services.jobs import register_jobs
+from app.services.scheduler import scheduler
+
+
+def main():
+    register_jobs()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("job", nargs="?", choices=sorted(scheduler.jobs), help="Job to run")
+    parser.add_argument("--list", action="store_true", help="List jobs and their schedules")
+    args = parser.parse_args()
+
+    if args.list or not args.job:
+        for job in scheduler.jobs.values():
+            print(f"{job.name:<26} {str(job.trigger):<20} {job.description}")
+        return
+
+    try:
+        result = scheduler.run_job(args.job)
+    except Exception as e:
+        print(f"❌ Job {args.job} failed: {e}")
+        sys.exit(1)
+    job = scheduler.jobs[args.job]
+    print(f"✅ Job {args.job} finished in {job.last_duration:.2f}s: {result}")
+
+
+if __name__ == "__main__":
+    main()
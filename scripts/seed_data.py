@@ -6,9 +6,9 @@ import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/.."))
-import secrets
 
 from app.db import SessionLocal, Org, OrgMember
+from app.services.api_keys import create_api_key
 
 
 def print_info(msg):
@@ -63,20 +63,20 @@ def main():
             print_info(f"Organization '{org_data['name']}' already exists, skipping.")
             org_map[org_data["name"]] = existing
         else:
-            # Generate secure API key
-            api_key = secrets.token_hex(16)
             org = Org(
                 name=org_data["name"],
                 region=org_data["region"],
-                api_key=api_key,
             )
             db.add(org)
+            db.flush()
+            # Generate secure API key (only its hash is stored)
+            _, api_key = create_api_key(db, org.id, name="default")
             db.commit()
             db.refresh(org)
             org_map[org_data["name"]] = org
             print_success(f"Seeded {org.name}")
             print(f"  ID: {org.id}")
-            print(f"  API Key: {org.api_key}")
+            print(f"  API Key: {api_key}")
 
     # Create users
     for user_data in users_data:
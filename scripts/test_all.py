@@ -1,9 +1,10 @@
 import requests, json
+import os
 import time
 import sys
 
-# Will be set dynamically after fetching orgs
-API_KEY = None
+# API keys are only shown when created; pass one via CONSENTVAULT_API_KEY
+API_KEY = os.getenv("CONSENTVAULT_API_KEY")
 ORG_ID = None
 BASE_URL = "http://localhost:8000"
 HEADERS = {"Content-Type": "application/json"}
@@ -44,7 +45,7 @@ def list_orgs():
     
     # Set API key and org_id from first org for subsequent tests
     if orgs and len(orgs) > 0:
-        API_KEY = orgs[0].get("api_key")
+        API_KEY = API_KEY or orgs[0].get("api_key")
         ORG_ID = orgs[0].get("id")
         HEADERS["X-API-Key"] = API_KEY
         if API_KEY: